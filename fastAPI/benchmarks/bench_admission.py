@@ -0,0 +1,220 @@
+"""
+Admission Control Load Test
+
+Overloads ``POST /security/check`` on one uvicorn server and compares the
+latency callers see with admission control off and on. The server's
+capacity is measured first with a few keep-alive connections; requests
+then arrive at ``OVERLOAD`` times that rate (open loop: arrivals do not
+wait for answers, as with independent Express callers) for ``DURATION``
+seconds. Requests unanswered after ``TIMEOUT`` seconds count as timed out,
+like a caller giving up.
+
+Without admission control every request is accepted and latency grows for
+as long as the overload lasts; with it, latency of admitted requests stays
+bounded by the concurrency limit and queue timeout, and the excess is
+answered with fast 503s.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_admission
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+# Keep the load test itself from being rate limited
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "1000000000")
+
+from benchmarks.suite import CHECK_BODY, ROOT, _free_port  # noqa: E402
+
+OVERLOAD = 2.0
+DURATION = 5.0
+TIMEOUT = 2.0
+
+# Server settings of the admission-on run
+ADMISSION_ENV = {
+    "ADMISSION_MAX_IN_FLIGHT": "16",
+    "ADMISSION_QUEUE_SIZE": "32",
+    "ADMISSION_QUEUE_TIMEOUT": "0.1",
+    "ADMISSION_MAX_LOOP_LAG": "0.1",
+    "METRICS_LOOP_LAG_INTERVAL": "0.05",
+}
+
+
+def _request(port: int) -> bytes:
+    body = json.dumps(CHECK_BODY).encode("utf-8")
+    head = (
+        "POST /api/v1/security/check HTTP/1.1\r\n"
+        f"Host: 127.0.0.1:{port}\r\n"
+        f"X-API-Key: {os.environ['EXPRESS_API_KEY']}\r\n"
+        "Content-Type: application/json\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    )
+    return head.encode("latin-1") + body
+
+
+class Connection:
+    """Minimal keep-alive HTTP/1.1 client, so the load generator stays cheap next to the server."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    @classmethod
+    async def open(cls, port: int) -> "Connection":
+        return cls(*await asyncio.open_connection("127.0.0.1", port))
+
+    async def send(self, request: bytes) -> int:
+        """Send one request and return the response status."""
+        self.writer.write(request)
+        head = await self.reader.readuntil(b"\r\n\r\n")
+        lines = head.split(b"\r\n")
+        length = 0
+        for line in lines[1:]:
+            name, _, value = line.partition(b":")
+            if name.lower() == b"content-length":
+                length = int(value)
+        await self.reader.readexactly(length)
+        return int(lines[0].split()[1])
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _start_server(port: int, workdir: str, env: Dict[str, str]) -> subprocess.Popen:
+    # Run from a scratch directory so logs and .env of the checkout are left alone
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=dict(os.environ, PYTHONPATH=ROOT, **env),
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def _wait_ready(port: int, server: subprocess.Popen) -> None:
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            conn = await Connection.open(port)
+            conn.close()
+            return
+        except OSError:
+            if server.poll() is not None or time.monotonic() > deadline:
+                raise RuntimeError("uvicorn did not start")
+            await asyncio.sleep(0.1)
+
+
+async def capacity(port: int, connections: int = 8, duration: float = 2.0) -> float:
+    """Requests per second the server answers with ``connections`` closed-loop clients."""
+    request = _request(port)
+    done = 0
+
+    async def client(deadline: float) -> None:
+        nonlocal done
+        conn = await Connection.open(port)
+        try:
+            while time.perf_counter() < deadline:
+                await conn.send(request)
+                done += 1
+        finally:
+            conn.close()
+
+    await asyncio.gather(*(client(time.perf_counter() + 0.5) for _ in range(connections)))  # warm up
+    done = 0
+    start = time.perf_counter()
+    await asyncio.gather(*(client(start + duration) for _ in range(connections)))
+    return done / (time.perf_counter() - start)
+
+
+async def open_loop(port: int, rate: float, duration: float, timeout: float) -> List[Tuple[float, Optional[int]]]:
+    """Send requests at ``rate`` per second; return (latency, status or None on timeout) per request."""
+    request = _request(port)
+    idle: List[Connection] = []
+    results: List[Tuple[float, Optional[int]]] = []
+    loop = asyncio.get_running_loop()
+
+    async def one(scheduled: float) -> None:
+        try:
+            conn = idle.pop() if idle else await Connection.open(port)
+        except OSError:
+            results.append((timeout, None))
+            return
+        try:
+            status = await asyncio.wait_for(conn.send(request), timeout - (loop.time() - scheduled))
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, OSError, ValueError):
+            conn.close()
+            results.append((timeout, None))
+            return
+        # Measured from when the request was due, so a slow sender does not hide latency
+        results.append((loop.time() - scheduled, status))
+        idle.append(conn)
+
+    tasks = []
+    start = loop.time()
+    sent = 0
+    while loop.time() - start < duration:
+        due = int((loop.time() - start) * rate)
+        while sent < due:
+            tasks.append(asyncio.ensure_future(one(start + sent / rate)))
+            sent += 1
+        await asyncio.sleep(0.001)
+    await asyncio.gather(*tasks)
+    for conn in idle:
+        conn.close()
+    return results
+
+
+def _percentile(values: List[float], p: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, round(p / 100 * (len(values) - 1)))] * 1000
+
+
+def report(results: List[Tuple[float, Optional[int]]]) -> Dict[str, float]:
+    ok = [latency for latency, status in results if status == 200]
+    shed = [latency for latency, status in results if status == 503]
+    return {
+        "requests": len(results),
+        "ok": len(ok),
+        "shed": len(shed),
+        "timed_out": sum(1 for _, status in results if status is None),
+        "ok_p50_ms": _percentile(ok, 50),
+        "ok_p99_ms": _percentile(ok, 99),
+        "shed_p99_ms": _percentile(shed, 99),
+    }
+
+
+async def run(overload: float = OVERLOAD, duration: float = DURATION, timeout: float = TIMEOUT) -> Dict[str, dict]:
+    results = {}
+    for name, env in (("admission_off", {"ADMISSION_ENABLED": "false"}), ("admission_on", ADMISSION_ENV)):
+        port = _free_port()
+        server = _start_server(port, tempfile.mkdtemp(prefix="bench-admission-"), env)
+        try:
+            await _wait_ready(port, server)
+            rate = await capacity(port) * overload
+            results[name] = dict(report(await open_loop(port, rate, duration, timeout)), rate=rate)
+        finally:
+            server.terminate()
+            server.wait(10)
+    return results
+
+
+def main() -> None:
+    results = asyncio.run(run())
+    print(f"{'run':<14} {'rate':>7} {'ok':>7} {'shed':>7} {'timeout':>8} {'ok p50':>8} {'ok p99':>8} {'503 p99':>8}")
+    for name, r in results.items():
+        print(
+            f"{name:<14} {r['rate']:7.0f} {r['ok']:7d} {r['shed']:7d} {r['timed_out']:8d} "
+            f"{r['ok_p50_ms']:8.1f} {r['ok_p99_ms']:8.1f} {r['shed_p99_ms']:8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Body Scan Benchmark
+
+Measures body scanning at 1 KB, 100 KB and 1 MB bodies, inline on the event
+loop and offloaded to the scan pool: scans per second, and how long the
+event loop is blocked while scans run. A ticker coroutine sleeping
+``TICK`` seconds at a time runs alongside the scans; its lateness is the
+time other requests would have waited.
+
+Offloaded scans send the raw request, which the worker decodes, as
+``/security/check`` does; inline scans walk the already decoded body.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_body_scan
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Awaitable, Callable, Dict, List
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+
+from src.services.body_scanner import BodyScanner, BodyScanPool  # noqa: E402
+
+SIZES = {"1kb": 1_000, "100kb": 100_000, "1mb": 1_000_000}
+DURATION = 2.0
+TICK = 0.001
+WORKERS = 2
+
+
+def make_request(size: int) -> dict:
+    """A check request whose body is about ``size`` bytes of JSON records."""
+    rows = []
+    encoded = 2
+    while encoded < size:
+        row = {
+            "id": len(rows),
+            "name": f"customer {len(rows)}",
+            "email": "user@example.com",
+            "note": "Please deliver after 5pm and ring the bell twice.",
+            "tags": ["vip", "repeat"],
+        }
+        rows.append(row)
+        encoded += len(json.dumps(row)) + 2
+    return {"headers": {"content-type": "application/json"}, "path": "/api/v1/orders", "method": "POST",
+            "body": {"rows": rows}}
+
+
+async def measure(scan: Callable[[], Awaitable], concurrency: int, duration: float = DURATION) -> Dict[str, float]:
+    """Run ``scan`` from ``concurrency`` callers for ``duration`` seconds next to a ticker."""
+    loop = asyncio.get_running_loop()
+    lags: List[float] = []
+    running = True
+
+    async def ticker() -> None:
+        while running:
+            start = loop.time()
+            await asyncio.sleep(TICK)
+            lags.append(max(0.0, loop.time() - start - TICK))
+
+    async def caller(deadline: float) -> int:
+        count = 0
+        while time.perf_counter() < deadline:
+            await scan()
+            count += 1
+            # Yield between scans, as separate requests would
+            await asyncio.sleep(0)
+        return count
+
+    await scan()  # warm up
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.05)
+    lags.clear()
+    start = time.perf_counter()
+    counts = await asyncio.gather(*(caller(start + duration) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    running = False
+    await tick
+    lags.sort()
+    return {
+        "scans_per_s": sum(counts) / elapsed,
+        "loop_blocked_max_ms": lags[-1] * 1000 if lags else 0.0,
+        "loop_blocked_p99_ms": lags[min(len(lags) - 1, round(0.99 * (len(lags) - 1)))] * 1000 if lags else 0.0,
+    }
+
+
+async def run() -> Dict[str, dict]:
+    scanner = BodyScanner()
+    pool = BodyScanPool(WORKERS)
+    pool.start()
+    results = {}
+    try:
+        for name, size in SIZES.items():
+            request = make_request(size)
+            raw = json.dumps(request).encode("utf-8")
+            body = request["body"]
+
+            async def inline() -> None:
+                scanner.scan(body)
+
+            async def offloaded() -> None:
+                await pool.scan(scanner, raw=raw)
+
+            results[f"{name}.inline"] = await measure(inline, 1)
+            results[f"{name}.offloaded"] = await measure(offloaded, WORKERS * 2)
+    finally:
+        pool.stop()
+    return results
+
+
+def main() -> None:
+    results = asyncio.run(run())
+    print(f"{'body':<16} {'scans/s':>9} {'loop p99 ms':>12} {'loop max ms':>12}")
+    for name, r in results.items():
+        print(f"{name:<16} {r['scans_per_s']:9.0f} {r['loop_blocked_p99_ms']:12.2f} {r['loop_blocked_max_ms']:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Security Check Fast Path Benchmark
+
+Compares ``POST /security/check`` with and without ``SECURITY_FAST_PATH``
+for a small, a typical and a 100 KB request, in-process through an ASGI
+transport, and the decode step alone. The verdict cache is disabled so
+every request is analyzed and encoded.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_check_fast_path
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import httpx
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+os.environ["VERDICT_CACHE_ENABLED"] = "false"
+
+from benchmarks.bench_security_batch import HEADERS, create_bench_app  # noqa: E402
+from src.core.config import get_settings, reload_settings  # noqa: E402
+from src.schemas.security import SecurityCheckRequest  # noqa: E402
+from src.services.request_decoder import decode_check_request, decode_check_request_fast  # noqa: E402
+
+PAYLOADS = {
+    "small": {
+        "method": "GET",
+        "path": "/api/v1/users/42",
+        "headers": {"host": "example.com", "accept": "*/*"},
+        "body": None,
+    },
+    "typical": {
+        "method": "POST",
+        "path": "/api/v1/orders",
+        "headers": {
+            "host": "example.com",
+            "user-agent": "Mozilla/5.0",
+            "accept": "application/json",
+            "content-type": "application/json",
+        },
+        "body": {"item": "book", "quantity": 2, "note": "gift wrap"},
+    },
+    "100kb": {
+        "method": "POST",
+        "path": "/api/v1/upload",
+        "headers": {"host": "example.com", "content-type": "application/json"},
+        "body": {"rows": [{"id": i, "name": f"row-{i}", "tags": ["a", "b"]} for i in range(2600)]},
+    },
+}
+
+
+def decode_full(raw: bytes, max_body_size: int):
+    data, body_size = decode_check_request(raw, max_body_size)
+    return SecurityCheckRequest.model_validate(data), body_size
+
+
+def decode_fast(raw: bytes, max_body_size: int):
+    data, body_size = decode_check_request_fast(raw, max_body_size)
+    return SecurityCheckRequest.model_validate(data), body_size
+
+
+def per_call(func, raw: bytes, max_body_size: int, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func(raw, max_body_size)
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def per_request(client: httpx.AsyncClient, raw: bytes, number: int) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        response = await client.post("/api/v1/security/check", content=raw)
+        response.raise_for_status()
+    return (time.perf_counter() - start) / number * 1e6
+
+
+async def run() -> dict:
+    """Return decode and request costs in microseconds per payload and mode."""
+    max_body_size = get_settings().MAX_BODY_SIZE
+    results = {}
+    for name, payload in PAYLOADS.items():
+        raw = json.dumps(payload).encode()
+        number = 200 if len(raw) > 10_000 else 5000
+        results[name] = {
+            "bytes": len(raw),
+            "decode_us": per_call(decode_full, raw, max_body_size, number),
+            "decode_fast_us": per_call(decode_fast, raw, max_body_size, number),
+        }
+
+    transport = httpx.ASGITransport(app=create_bench_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=HEADERS) as client:
+        for fast in (False, True):
+            os.environ["SECURITY_FAST_PATH"] = str(fast).lower()
+            reload_settings()
+            for name, payload in PAYLOADS.items():
+                raw = json.dumps(payload).encode()
+                number = 100 if len(raw) > 10_000 else 1000
+                key = "request_fast_us" if fast else "request_us"
+                results[name][key] = await per_request(client, raw, number)
+    return results
+
+
+def main() -> None:
+    results = asyncio.run(run())
+    print(f"{'payload':<8} {'bytes':>7} {'decode':>10} {'fast':>10} {'request':>10} {'fast':>10}")
+    for name, r in results.items():
+        print(
+            f"{name:<8} {r['bytes']:>7} {r['decode_us']:>8.1f}us {r['decode_fast_us']:>8.1f}us "
+            f"{r['request_us']:>8.1f}us {r['request_fast_us']:>8.1f}us"
+        )
+
+
+if __name__ == "__main__":
+    main()
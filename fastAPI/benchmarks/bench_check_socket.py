@@ -0,0 +1,114 @@
+"""
+Check Socket Benchmark
+
+Compares ``POST /security/check`` over HTTP/1.1 on TCP with the binary
+protocol on the Unix check socket, against one uvicorn server started for
+the run. Each transport is measured one request at a time (round-trip
+latency) and with ``CONCURRENCY`` requests in flight (throughput): HTTP
+over that many keep-alive connections, the socket over one multiplexed
+connection.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_check_socket
+"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+
+import httpx
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+# Keep the HTTP side from being rate limited
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "1000000000")
+
+from benchmarks.suite import CHECK_BODY, ROOT, _free_port, summarize  # noqa: E402
+from src.services.check_socket import CheckSocketClient  # noqa: E402
+
+REQUESTS = 5000
+CONCURRENCY = 32
+CHECK_RAW = json.dumps(CHECK_BODY).encode("utf-8")
+
+
+async def measure(call: Callable[[], Awaitable], requests: int, concurrency: int) -> Dict[str, float]:
+    """Run ``requests`` calls from ``concurrency`` concurrent callers."""
+    latencies: List[float] = []
+
+    async def worker(share: int) -> None:
+        for _ in range(share):
+            start = time.perf_counter()
+            await call()
+            latencies.append(time.perf_counter() - start)
+
+    for _ in range(200):
+        await call()
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(share) for share in shares))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+async def run(requests: int = REQUESTS, concurrency: int = CONCURRENCY) -> Dict[str, dict]:
+    port = _free_port()
+    workdir = tempfile.mkdtemp(prefix="bench-check-socket-")
+    socket_path = os.path.join(workdir, "check.sock")
+    env = dict(os.environ, PYTHONPATH=ROOT, CHECK_SOCKET_PATH=socket_path)
+    # Run from a scratch directory so logs and .env of the checkout are left alone
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    results = {}
+    try:
+        headers = {"X-API-Key": os.environ["EXPRESS_API_KEY"], "Content-Type": "application/json"}
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    await client.get("/api/v1/health")
+                    if os.path.exists(socket_path):
+                        break
+                except httpx.TransportError:
+                    pass
+                if server.poll() is not None or time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start")
+                await asyncio.sleep(0.1)
+
+            async def http_check() -> None:
+                response = await client.post("/api/v1/security/check", content=CHECK_RAW, headers=headers)
+                response.raise_for_status()
+
+            results["http.sequential"] = await measure(http_check, requests, 1)
+            results[f"http.concurrent_{concurrency}"] = await measure(http_check, requests, concurrency)
+
+        socket_client = await CheckSocketClient.connect(socket_path, os.environ["EXPRESS_API_KEY"])
+        try:
+            async def socket_check() -> None:
+                await socket_client.check(CHECK_RAW)
+
+            results["socket.sequential"] = await measure(socket_check, requests, 1)
+            results[f"socket.pipelined_{concurrency}"] = await measure(socket_check, requests, concurrency)
+        finally:
+            await socket_client.close()
+    finally:
+        server.terminate()
+        server.wait(10)
+    return results
+
+
+def main() -> None:
+    results = asyncio.run(run())
+    print(f"{'transport':<24} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, r in results.items():
+        print(f"{name:<24} {r['throughput_rps']:9.0f} {r['p50_ms']:8.3f} {r['p99_ms']:8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Log Formatter Benchmark
+
+Compares ``FastJsonFormatter`` with ``pythonjsonlogger``'s ``JsonFormatter``
+in records per second, for the record shapes the service logs: dict
+messages from the middleware, plain messages with ``extra`` fields, and the
+pre-encoded ``json.dumps`` strings the test routers used to log.
+
+Run from the fastAPI directory:
+    python -m benchmarks.bench_log_formatter
+"""
+
+import json
+import logging
+import time
+
+from pythonjsonlogger import jsonlogger
+
+from src.core.log_formatter import FastJsonFormatter
+
+RECORDS = 50000
+FORMAT = '%(asctime)s %(levelname)s %(name)s %(message)s'
+
+REQUEST_COMPLETED = {
+    "type": "request_completed",
+    "request_id": "3470f173-c519-414a-849c-a988859f021f",
+    "method": "POST",
+    "path": "/api/v1/security/check",
+    "status_code": 200,
+    "duration": 0.0042,
+    "client_host": "127.0.0.1",
+    "query_params": {},
+    "user_agent": "node-fetch/1.0",
+    "content_length": "40",
+    "response_size": 75,
+}
+
+
+def make_record(msg, extra=None) -> logging.LogRecord:
+    record = logging.LogRecord("fastapi", logging.INFO, __file__, 1, msg, None, None)
+    for key, value in (extra or {}).items():
+        setattr(record, key, value)
+    return record
+
+
+def records_per_second(formatter: logging.Formatter, record: logging.LogRecord, count: int) -> float:
+    fmt = formatter.format
+    start = time.perf_counter()
+    for _ in range(count):
+        fmt(record)
+    return count / (time.perf_counter() - start)
+
+
+def run(count: int = RECORDS) -> list:
+    """Return one row per record shape with records/s for both formatters."""
+    legacy = jsonlogger.JsonFormatter(FORMAT)
+    fast = FastJsonFormatter()
+    cases = [
+        ("dict message", make_record(REQUEST_COMPLETED), make_record(REQUEST_COMPLETED)),
+        ("str + extra", make_record("Test log message", {"endpoint": "/test-log"}),
+         make_record("Test log message", {"endpoint": "/test-log"})),
+        ("json.dumps vs dict", make_record(json.dumps(REQUEST_COMPLETED)), make_record(REQUEST_COMPLETED)),
+    ]
+    rows = []
+    for name, legacy_record, fast_record in cases:
+        legacy_rps = records_per_second(legacy, legacy_record, count)
+        fast_rps = records_per_second(fast, fast_record, count)
+        rows.append({"case": name, "legacy_rps": legacy_rps, "fast_rps": fast_rps, "speedup": fast_rps / legacy_rps})
+    return rows
+
+
+def main() -> None:
+    print(f"{'case':<20} {'JsonFormatter':>14} {'FastJsonFormatter':>18} {'speedup':>8}")
+    for row in run():
+        print(f"{row['case']:<20} {row['legacy_rps']:>12,.0f}/s {row['fast_rps']:>16,.0f}/s {row['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
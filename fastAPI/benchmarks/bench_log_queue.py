@@ -0,0 +1,98 @@
+"""
+Log Queue Benchmark
+
+Measures how long a ``logger.info`` call blocks the caller during a burst,
+with handlers attached directly (formatting and disk writes inline) and
+behind the ``LogPipeline`` queue.
+
+Run from the fastAPI directory:
+    python -m benchmarks.bench_log_queue
+"""
+
+import logging
+import os
+import tempfile
+import time
+
+from pythonjsonlogger import jsonlogger
+
+from src.core.log_queue import LogPipeline, LogQueueHandler
+
+BURST = 20000
+
+
+def make_logger(path: str) -> logging.Logger:
+    logger = logging.getLogger(f"bench.{os.path.basename(path)}")
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    handler = logging.FileHandler(path)
+    handler.setFormatter(jsonlogger.JsonFormatter('%(asctime)s %(levelname)s %(name)s %(message)s'))
+    logger.handlers = [handler]
+    return logger
+
+
+def burst(logger: logging.Logger, count: int) -> list:
+    """Log ``count`` request-sized records; return each call's duration in seconds."""
+    durations = []
+    for i in range(count):
+        record = {
+            "type": "request_completed",
+            "request_id": str(i),
+            "method": "GET",
+            "path": "/api/v1/health",
+            "status_code": 200,
+            "duration": 0.001,
+        }
+        start = time.perf_counter()
+        logger.info(record)
+        durations.append(time.perf_counter() - start)
+    return durations
+
+
+def percentile(values: list, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def run(count: int = BURST) -> dict:
+    """Return caller-side p50/p99/max latency in microseconds for both modes."""
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        direct = make_logger(os.path.join(tmp, "direct.log"))
+        results["direct"] = burst(direct, count)
+
+        queued = make_logger(os.path.join(tmp, "queued.log"))
+        pipeline = LogPipeline(queued.handlers[:], maxsize=count)
+        pipeline.start()
+        queued.handlers = [LogQueueHandler(pipeline)]
+        results["queued"] = burst(queued, count)
+        pipeline.stop()
+        results["queued_stats"] = pipeline.stats()
+
+        for logger in (direct, queued):
+            for handler in logger.handlers:
+                handler.close()
+        for handler in pipeline.handlers:
+            handler.close()
+
+    summary = {"queued_stats": results.pop("queued_stats")}
+    for mode, durations in results.items():
+        summary[mode] = {
+            "p50_us": percentile(durations, 0.50) * 1e6,
+            "p99_us": percentile(durations, 0.99) * 1e6,
+            "max_us": max(durations) * 1e6,
+        }
+    return summary
+
+
+def main() -> None:
+    summary = run()
+    print(f"{BURST} records, caller-side latency per logger.info call:")
+    for mode in ("direct", "queued"):
+        r = summary[mode]
+        print(f"  {mode:<7} p50 {r['p50_us']:7.1f} us  p99 {r['p99_us']:7.1f} us  max {r['max_us']:8.1f} us")
+    print(f"  pipeline: {summary['queued_stats']}")
+
+
+if __name__ == "__main__":
+    main()
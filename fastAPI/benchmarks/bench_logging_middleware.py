@@ -0,0 +1,138 @@
+"""
+Logging Middleware Benchmark
+
+Measures the per-request overhead of the ASGI ``LoggingMiddleware``
+against the previous ``BaseHTTPMiddleware`` implementation, by calling a
+minimal Starlette app directly through the ASGI interface. Log records go
+to a ``NullHandler`` so only the middleware itself is measured.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_logging_middleware
+"""
+
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Callable
+
+from starlette.applications import Starlette
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+
+from src.core.logger import logger  # noqa: E402
+from src.middleware.logging import LoggingMiddleware  # noqa: E402
+
+REQUESTS = 5000
+
+
+class LegacyLoggingMiddleware(BaseHTTPMiddleware):
+    """The previous ``BaseHTTPMiddleware``-based implementation."""
+    slow_request_threshold = 1.0
+
+    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+        request_id = str(uuid.uuid4())
+        start_time = time.perf_counter()
+        logger.info({
+            "type": "request_started",
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "client_host": request.client.host if request.client else None,
+            "user_agent": request.headers.get("user-agent"),
+            "content_length": request.headers.get("content-length", 0),
+        })
+        response = await call_next(request)
+        duration = time.perf_counter() - start_time
+        log_data = {
+            "type": "request_completed",
+            "request_id": request_id,
+            "method": request.method,
+            "path": request.url.path,
+            "status_code": response.status_code,
+            "duration": duration,
+            "client_host": request.client.host if request.client else None,
+            "query_params": dict(request.query_params),
+            "user_agent": request.headers.get("user-agent"),
+            "content_length": request.headers.get("content-length", 0),
+            "response_size": response.headers.get("content-length", 0),
+        }
+        if duration > self.slow_request_threshold:
+            log_data["performance_warning"] = "Slow request detected"
+            logger.warning(log_data)
+        else:
+            logger.info(log_data)
+        return response
+
+
+async def endpoint(request: Request) -> Response:
+    return JSONResponse({"status": "healthy", "service": "fastapi"})
+
+
+def make_scope() -> dict:
+    return {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/api/v1/health",
+        "raw_path": b"/api/v1/health",
+        "root_path": "",
+        "query_string": b"verbose=1",
+        "headers": [(b"host", b"bench"), (b"user-agent", b"bench/1.0"), (b"accept", b"*/*")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 8000),
+    }
+
+
+async def drive(app, requests: int) -> float:
+    """Send ``requests`` GETs straight into the ASGI app; return seconds per request."""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    for _ in range(100):
+        await app(make_scope(), receive, send)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await app(make_scope(), receive, send)
+    return (time.perf_counter() - start) / requests
+
+
+def run(requests: int = REQUESTS) -> dict:
+    """Return per-request cost in microseconds with and without each middleware."""
+    handlers = logger.handlers[:]
+    logger.handlers = [logging.NullHandler()]
+    try:
+        bare = Starlette(routes=[Route("/api/v1/health", endpoint)])
+        legacy = LegacyLoggingMiddleware(bare)
+        current = LoggingMiddleware(bare)
+        results = {
+            "bare_us": asyncio.run(drive(bare, requests)) * 1e6,
+            "legacy_us": asyncio.run(drive(legacy, requests)) * 1e6,
+            "asgi_us": asyncio.run(drive(current, requests)) * 1e6,
+        }
+    finally:
+        logger.handlers = handlers
+    results["legacy_overhead_us"] = results["legacy_us"] - results["bare_us"]
+    results["asgi_overhead_us"] = results["asgi_us"] - results["bare_us"]
+    return results
+
+
+def main() -> None:
+    r = run()
+    print(f"bare app:                 {r['bare_us']:8.1f} us/request")
+    print(f"BaseHTTPMiddleware:       {r['legacy_us']:8.1f} us/request  (+{r['legacy_overhead_us']:.1f} us)")
+    print(f"ASGI LoggingMiddleware:   {r['asgi_us']:8.1f} us/request  (+{r['asgi_overhead_us']:.1f} us)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Logstash Shipper Benchmark
+
+Measures records per second shipped by ``LogstashShipper`` to a local TCP
+sink that counts received lines, and the peak buffered record count.
+
+Run from the fastAPI directory:
+    python -m benchmarks.bench_logstash_shipper
+"""
+
+import json
+import socket
+import threading
+import time
+
+from src.core.logstash import LogstashShipper
+
+RECORDS = 200000
+
+
+class CountingSink:
+    """TCP server that counts newline-terminated records."""
+
+    def __init__(self):
+        self.server = socket.create_server(("127.0.0.1", 0))
+        self.port = self.server.getsockname()[1]
+        self.lines = 0
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        conn, _ = self.server.accept()
+        with conn:
+            while True:
+                data = conn.recv(1 << 20)
+                if not data:
+                    return
+                self.lines += data.count(b"\n")
+
+
+def run(records: int = RECORDS) -> dict:
+    """Return shipping throughput in records per second."""
+    sink = CountingSink()
+    shipper = LogstashShipper("127.0.0.1", sink.port, buffer_size=records, flush_interval=0.01)
+    line = (json.dumps({
+        "asctime": "2024-12-20 13:12:07,000",
+        "levelname": "INFO",
+        "name": "fastapi",
+        "type": "request_completed",
+        "path": "/api/v1/health",
+        "status_code": 200,
+        "service": "fastapi-app",
+        "environment": "development",
+    }) + "\n").encode()
+
+    shipper.start()
+    start = time.perf_counter()
+    for _ in range(records):
+        shipper.submit(line)
+    submitted = time.perf_counter() - start
+    while sink.lines < records and time.perf_counter() - start < 30:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - start
+    shipper.stop()
+    sink.server.close()
+    return {
+        "records": sink.lines,
+        "submit_us": submitted / records * 1e6,
+        "records_per_second": sink.lines / elapsed,
+        "batches": shipper.batches,
+    }
+
+
+def main() -> None:
+    r = run()
+    print(f"shipped {r['records']} records in {r['batches']} batches")
+    print(f"  submit cost:  {r['submit_us']:.2f} us/record")
+    print(f"  throughput:   {r['records_per_second']:,.0f} records/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Metrics Benchmark
+
+Measures the cost of recording request metrics: a bare histogram
+observation, and the per-request overhead of ``MetricsMiddleware`` on a
+minimal Starlette app driven through the ASGI interface.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_metrics
+"""
+
+import asyncio
+import os
+import time
+
+from starlette.applications import Starlette
+from starlette.routing import Route
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+
+from benchmarks.bench_logging_middleware import drive, endpoint  # noqa: E402
+from src.core.metrics import Histogram, collect, render  # noqa: E402
+from src.middleware.metrics import MetricsMiddleware  # noqa: E402
+
+OBSERVATIONS = 1_000_000
+REQUESTS = 5000
+
+
+def run(observations: int = OBSERVATIONS, requests: int = REQUESTS) -> dict:
+    """Return observation, middleware and scrape costs in microseconds."""
+    histogram = Histogram("bench_seconds", "bench", ("method", "route", "status"))
+    labels = ("GET", "/api/v1/health", "2xx")
+    observe = histogram.observe
+    start = time.perf_counter()
+    for i in range(observations):
+        observe(labels, (i % 1000) / 10000)
+    observe_us = (time.perf_counter() - start) / observations * 1e6
+
+    bare = Starlette(routes=[Route("/api/v1/health", endpoint)])
+    bare_us = asyncio.run(drive(bare, requests)) * 1e6
+    metered_us = asyncio.run(drive(MetricsMiddleware(bare), requests)) * 1e6
+
+    start = time.perf_counter()
+    for _ in range(100):
+        render(collect())
+    scrape_us = (time.perf_counter() - start) / 100 * 1e6
+    return {
+        "observe_us": observe_us,
+        "bare_us": bare_us,
+        "metered_us": metered_us,
+        "overhead_us": metered_us - bare_us,
+        "scrape_us": scrape_us,
+    }
+
+
+def main() -> None:
+    r = run()
+    print(f"histogram observe:        {r['observe_us']:8.3f} us")
+    print(f"bare app:                 {r['bare_us']:8.1f} us/request")
+    print(f"with MetricsMiddleware:   {r['metered_us']:8.1f} us/request  (+{r['overhead_us']:.1f} us)")
+    print(f"/metrics collect+render:  {r['scrape_us']:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Rate Limit Benchmark
+
+Measures the per-request decision cost of ``RateLimiter`` for each backend
+and algorithm, spreading hits over a configurable number of client keys.
+
+Run from the fastAPI directory:
+    python -m benchmarks.bench_rate_limit
+"""
+
+import os
+import tempfile
+import time
+
+from src.core.rate_limit import ALGORITHMS, MemoryBackend, RateLimiter, SharedMemoryBackend
+
+DECISIONS = 200000
+KEYS = 10000
+
+
+def measure(limiter: RateLimiter, decisions: int, keys: int) -> float:
+    """Return microseconds per decision."""
+    names = [f"security|key:client-{i}" for i in range(keys)]
+    hit = limiter.hit
+    start = time.perf_counter()
+    for i in range(decisions):
+        hit(names[i % keys], 1000, 60.0)
+    return (time.perf_counter() - start) / decisions * 1e6
+
+
+def run(decisions: int = DECISIONS, keys: int = KEYS) -> list:
+    """Return one row per backend and algorithm."""
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for algorithm in ALGORITHMS:
+            memory = RateLimiter(MemoryBackend(), algorithm)
+            rows.append({"backend": "memory", "algorithm": algorithm, "us": measure(memory, decisions, keys)})
+            shared_backend = SharedMemoryBackend(os.path.join(tmp, f"{algorithm}.shm"))
+            shared = RateLimiter(shared_backend, algorithm)
+            rows.append({"backend": "shared", "algorithm": algorithm, "us": measure(shared, decisions, keys)})
+            shared_backend.close()
+    return rows
+
+
+def main() -> None:
+    print(f"{DECISIONS} decisions over {KEYS} keys")
+    for row in run():
+        print(f"  {row['backend']:<7} {row['algorithm']:<15} {row['us']:6.2f} us/decision")
+
+
+if __name__ == "__main__":
+    main()
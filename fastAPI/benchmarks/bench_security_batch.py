@@ -0,0 +1,78 @@
+"""
+Security Batch Benchmark
+
+Measures the per-check cost of ``POST /security/check`` called once per
+item against the batch and NDJSON streaming endpoints, in-process through
+an ASGI transport.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_security_batch
+"""
+
+import asyncio
+import json
+import os
+import time
+
+import httpx
+from fastapi import FastAPI
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+
+from src.api.v1.security.router import router as security_router  # noqa: E402
+
+ITEMS = 500
+HEADERS = {"X-API-Key": os.environ["EXPRESS_API_KEY"]}
+ITEM = {
+    "headers": {"host": "example.com", "user-agent": "bench", "accept": "*/*"},
+    "path": "/api/v1/users/42",
+    "method": "GET",
+    "body": {"name": "bench"},
+}
+
+
+def create_bench_app() -> FastAPI:
+    """Build an app with only the security router mounted."""
+    app = FastAPI()
+    app.include_router(security_router, prefix="/api/v1")
+    return app
+
+
+async def run(items: int = ITEMS) -> dict:
+    """Return the per-check cost in microseconds for each mode."""
+    transport = httpx.ASGITransport(app=create_bench_app())
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=HEADERS) as client:
+        start = time.perf_counter()
+        for _ in range(items):
+            response = await client.post("/api/v1/security/check", json=ITEM)
+            response.raise_for_status()
+        single = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = await client.post("/api/v1/security/check/batch", json=[ITEM] * items)
+        response.raise_for_status()
+        batch = time.perf_counter() - start
+
+        payload = (json.dumps(ITEM) + "\n").encode() * items
+        start = time.perf_counter()
+        response = await client.post("/api/v1/security/check/stream", content=payload)
+        response.raise_for_status()
+        stream = time.perf_counter() - start
+
+    return {
+        "single_us": single / items * 1e6,
+        "batch_us": batch / items * 1e6,
+        "stream_us": stream / items * 1e6,
+    }
+
+
+def main() -> None:
+    result = asyncio.run(run())
+    print(f"{ITEMS} checks, per-check cost:")
+    for mode in ("single", "batch", "stream"):
+        cost = result[f"{mode}_us"]
+        print(f"  {mode:<7} {cost:>9.1f} us  ({result['single_us'] / cost:>5.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
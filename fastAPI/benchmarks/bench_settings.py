@@ -0,0 +1,44 @@
+"""
+Settings Benchmark
+
+Compares building a fresh ``Config()`` on every call (the previous
+behaviour of ``get_settings``) with serving the in-memory snapshot. A
+security check resolves settings twice: once in ``verify_express_origin``
+and once in ``SecurityService``.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_settings
+"""
+
+import os
+import timeit
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+
+from src.core.config import Config, get_settings  # noqa: E402
+
+CALLS_PER_REQUEST = 2
+
+
+def run(number: int = 500) -> dict:
+    """Return the per-call and per-request cost in microseconds."""
+    get_settings()
+    rebuild = min(timeit.repeat(Config, number=number, repeat=3)) / number * 1e6
+    snapshot = min(timeit.repeat(get_settings, number=number * 100, repeat=3)) / (number * 100) * 1e6
+    return {
+        "rebuild_us": rebuild,
+        "snapshot_us": snapshot,
+        "rebuild_per_request_us": rebuild * CALLS_PER_REQUEST,
+        "snapshot_per_request_us": snapshot * CALLS_PER_REQUEST,
+    }
+
+
+def main() -> None:
+    result = run()
+    print(f"{'':<10} {'per call (us)':>14} {'per request (us)':>17}")
+    print(f"{'Config()':<10} {result['rebuild_us']:>14.2f} {result['rebuild_per_request_us']:>17.2f}")
+    print(f"{'snapshot':<10} {result['snapshot_us']:>14.3f} {result['snapshot_per_request_us']:>17.3f}")
+
+
+if __name__ == "__main__":
+    main()
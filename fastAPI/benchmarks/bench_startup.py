@@ -0,0 +1,91 @@
+"""
+Startup Benchmark
+
+Measures cold-start cost: the time to import ``src.main`` (which creates
+the application) in a fresh interpreter, and an import-time report of the
+modules that contribute most, from ``python -X importtime``.
+
+Run from the fastAPI directory:
+    EXPRESS_API_KEY=bench python -m benchmarks.bench_startup
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+
+RUNS = 5
+TOP = 15
+
+TIMER = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "import src.main\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def measure_startup(runs: int = RUNS) -> List[float]:
+    """Return the import plus app creation time of ``src.main`` per fresh interpreter, in seconds."""
+    times = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", TIMER], capture_output=True, text=True, check=True
+        ).stdout
+        times.append(float(out.strip().splitlines()[-1]))
+    return times
+
+
+def import_report() -> List[Tuple[str, int, int]]:
+    """Return ``(module, self_us, cumulative_us)`` for every module imported by ``src.main``."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import src.main"],
+        capture_output=True, text=True, check=True,
+    ).stderr
+    modules = []
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+    return modules
+
+
+def by_package(modules: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    """Sum self time per top-level package."""
+    totals: Dict[str, int] = {}
+    for name, self_us, _ in modules:
+        package = name.split(".")[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return totals
+
+
+def run(runs: int = RUNS) -> dict:
+    times = measure_startup(runs)
+    modules = import_report()
+    return {
+        "startup_median_s": statistics.median(times),
+        "startup_min_s": min(times),
+        "modules": modules,
+        "packages": by_package(modules),
+    }
+
+
+def main() -> None:
+    r = run()
+    print(f"import src.main (incl. create_app): median {r['startup_median_s'] * 1000:.0f} ms, "
+          f"min {r['startup_min_s'] * 1000:.0f} ms over {RUNS} runs")
+    print(f"\nTop {TOP} packages by self import time:")
+    for package, us in sorted(r["packages"].items(), key=lambda item: -item[1])[:TOP]:
+        print(f"  {package:<28} {us / 1000:8.1f} ms")
+    print(f"\nTop {TOP} application modules by cumulative import time:")
+    own = [m for m in r["modules"] if m[0].startswith("src.")]
+    for name, self_us, cumulative_us in sorted(own, key=lambda m: -m[2])[:TOP]:
+        print(f"  {name:<40} {cumulative_us / 1000:8.1f} ms  (self {self_us / 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
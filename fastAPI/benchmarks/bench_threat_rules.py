@@ -0,0 +1,97 @@
+"""
+Threat Rules Benchmark
+
+Compares the compiled ThreatPatternEngine with the original per-request
+linear scans at 10, 100 and 5,000 rules.
+
+Run from the fastAPI directory:
+    python -m benchmarks.bench_threat_rules
+"""
+
+import random
+import string
+import timeit
+
+from src.services.threat_rules import (
+    DEFAULT_HEADER_NAMES,
+    DEFAULT_PATH_PATTERNS,
+    ThreatPatternEngine,
+)
+
+RULE_COUNTS = (10, 100, 5000)
+SAMPLE_PATHS = [
+    "/api/v1/users/42/profile",
+    "/static/js/app.bundle.min.js",
+    "/api/v1/orders?page=3&sort=created_at",
+    "/../../etc/passwd",
+]
+SAMPLE_HEADERS = {
+    "Host": "example.com",
+    "User-Agent": "Mozilla/5.0",
+    "Accept": "application/json",
+    "Content-Type": "application/json",
+    "X-Request-Id": "b0c1f2",
+    "x-real-ip": "10.0.0.1",
+}
+
+
+def legacy_is_suspicious_path(path: str, patterns: list) -> bool:
+    """Original implementation: lowercase and scan every pattern."""
+    return any(pattern in path.lower() for pattern in patterns)
+
+
+def legacy_check_suspicious_headers(headers: dict, names: list) -> dict:
+    """Original implementation: scan every header name against ``headers.keys()``."""
+    suspicious = {}
+    for header in names:
+        if header in headers.keys():
+            suspicious[header] = "Potentially dangerous header detected"
+    return suspicious
+
+
+def make_rules(count: int, defaults: list, seed: int) -> list:
+    """Pad the default signatures with random ones up to ``count``."""
+    rng = random.Random(seed)
+    rules = list(defaults[:count])
+    while len(rules) < count:
+        rules.append("".join(rng.choices(string.ascii_lowercase + "-_/.", k=rng.randint(4, 12))))
+    return rules
+
+
+def run(number: int = 2000) -> list:
+    """Run the benchmark and return one result row per rule count."""
+    results = []
+    for count in RULE_COUNTS:
+        paths = make_rules(count, DEFAULT_PATH_PATTERNS, seed=count)
+        headers = make_rules(count, DEFAULT_HEADER_NAMES, seed=count + 1)
+        engine = ThreatPatternEngine(paths, headers)
+
+        def legacy():
+            for path in SAMPLE_PATHS:
+                legacy_is_suspicious_path(path, paths)
+            legacy_check_suspicious_headers(SAMPLE_HEADERS, headers)
+
+        def compiled():
+            for path in SAMPLE_PATHS:
+                engine.match_path(path)
+            engine.match_headers(SAMPLE_HEADERS)
+
+        legacy_us = min(timeit.repeat(legacy, number=number, repeat=3)) / number * 1e6
+        compiled_us = min(timeit.repeat(compiled, number=number, repeat=3)) / number * 1e6
+        results.append({
+            "rules": count,
+            "legacy_us": legacy_us,
+            "compiled_us": compiled_us,
+            "speedup": legacy_us / compiled_us,
+        })
+    return results
+
+
+def main() -> None:
+    print(f"{'rules':>6} {'legacy (us)':>12} {'compiled (us)':>14} {'speedup':>8}")
+    for row in run():
+        print(f"{row['rules']:>6} {row['legacy_us']:>12.2f} {row['compiled_us']:>14.2f} {row['speedup']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
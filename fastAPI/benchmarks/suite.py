@@ -0,0 +1,362 @@
+"""
+Benchmark Suite
+
+Load tests the application's endpoints and microbenchmarks its hot paths,
+saves the results as JSON and compares them with a baseline.
+
+Endpoints are driven in-process through an ASGI transport and, with
+``--uvicorn``, against a locally launched uvicorn server; each reports
+throughput and p50/p95/p99 latency. The microbenchmarks cover
+``SecurityService.analyze_request``, the middleware stack, the log
+formatter and ``get_settings``.
+
+Run from the fastAPI directory:
+    python -m benchmarks.suite                    # run and compare with the baseline
+    python -m benchmarks.suite --save-baseline    # record a new baseline
+    python -m benchmarks.suite --uvicorn --threshold 0.25
+
+Exits with status 1 when a metric is worse than the baseline by more than
+the threshold (``--threshold`` or ``BENCH_REGRESSION_THRESHOLD``, as a
+fraction; default 0.15). Baselines are machine-specific: record one on the
+machine that runs the comparison.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import logging
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+from typing import Dict, Iterator, List, Optional
+
+import httpx
+
+os.environ.setdefault("EXPRESS_API_KEY", "bench")
+# Keep the load test itself from being rate limited
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "1000000000")
+
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.cors import CORSMiddleware  # noqa: E402
+from starlette.routing import Route  # noqa: E402
+
+from benchmarks.bench_logging_middleware import drive, endpoint  # noqa: E402
+from src.core.config import get_settings  # noqa: E402
+from src.core.log_formatter import FastJsonFormatter  # noqa: E402
+from src.core.logger import logger  # noqa: E402
+from src.middleware.logging import LoggingMiddleware  # noqa: E402
+from src.middleware.metrics import MetricsMiddleware  # noqa: E402
+from src.middleware.rate_limit import RateLimitHeadersMiddleware  # noqa: E402
+from src.schemas.security import SecurityCheckRequest  # noqa: E402
+from src.services.security import SecurityService, _create_verdict_cache  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(ROOT, "benchmarks", "baselines", "baseline.json")
+DEFAULT_THRESHOLD = float(os.environ.get("BENCH_REGRESSION_THRESHOLD", "0.15"))
+
+CHECK_BODY = {
+    "headers": {"host": "example.com", "user-agent": "bench", "accept": "*/*"},
+    "path": "/api/v1/users/42",
+    "method": "GET",
+    "body": {"name": "bench"},
+}
+
+# name -> (method, path, JSON body)
+ENDPOINTS = {
+    "health": ("GET", "/api/v1/health", None),
+    "security_check": ("POST", "/api/v1/security/check", CHECK_BODY),
+}
+
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms", "us_per_op")
+HIGHER_IS_BETTER = ("throughput_rps",)
+
+
+def summarize(latencies: List[float], wall: float) -> Dict[str, float]:
+    """Turn per-request latencies (seconds) into throughput and percentiles."""
+    latencies = sorted(latencies)
+    count = len(latencies)
+
+    def percentile(p: float) -> float:
+        return latencies[min(count - 1, round(p / 100 * (count - 1)))] * 1000
+
+    return {
+        "requests": count,
+        "throughput_rps": count / wall,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+    }
+
+
+async def load(
+    client: httpx.AsyncClient,
+    method: str,
+    path: str,
+    body: Optional[dict],
+    requests: int,
+    concurrency: int,
+) -> Dict[str, float]:
+    """Send ``requests`` requests from ``concurrency`` concurrent clients."""
+    headers = {"X-API-Key": os.environ["EXPRESS_API_KEY"]}
+    latencies: List[float] = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        response = await client.request(method, path, json=body, headers=headers)
+        latencies.append(time.perf_counter() - start)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {path} returned {response.status_code}: {response.text}")
+
+    async def worker(share: int) -> None:
+        for _ in range(share):
+            await one()
+
+    for _ in range(min(100, requests)):
+        await one()
+    latencies.clear()
+
+    shares = [requests // concurrency + (i < requests % concurrency) for i in range(concurrency)]
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(share) for share in shares))
+    return summarize(latencies, time.perf_counter() - start)
+
+
+@contextlib.contextmanager
+def quiet_logger(directory: str) -> Iterator[None]:
+    """Log to a scratch file instead of ``logs/app.log`` and the console."""
+    handlers = logger.handlers[:]
+    handler = logging.FileHandler(os.path.join(directory, "app.log"), encoding="utf-8")
+    handler.setFormatter(FastJsonFormatter())
+    logger.handlers = [handler]
+    try:
+        yield
+    finally:
+        logger.handlers = handlers
+        handler.close()
+
+
+async def run_inprocess(requests: int, concurrency: int) -> Dict[str, dict]:
+    """Load test each endpoint through ``httpx.ASGITransport``."""
+    from src.main import app
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for name, (method, path, body) in ENDPOINTS.items():
+                results[f"inprocess.{name}"] = await load(client, method, path, body, requests, concurrency)
+    return results
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def run_uvicorn(requests: int, concurrency: int, workdir: str) -> Dict[str, dict]:
+    """Load test each endpoint on a uvicorn server started for the run."""
+    port = _free_port()
+    env = dict(os.environ, PYTHONPATH=ROOT, PORT=str(port))
+    # Run from a scratch directory so logs and .env of the checkout are left alone
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.main:app", "--port", str(port),
+         "--log-level", "warning", "--no-access-log"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    results = {}
+    try:
+        limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    await client.get("/api/v1/health")
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("uvicorn did not start")
+                    await asyncio.sleep(0.1)
+            for name, (method, path, body) in ENDPOINTS.items():
+                results[f"uvicorn.{name}"] = await load(client, method, path, body, requests, concurrency)
+    finally:
+        server.terminate()
+        server.wait(10)
+    return results
+
+
+def per_op(fn, number: int, repeat: int = 5) -> Dict[str, float]:
+    """Best-of-``repeat`` cost of ``fn`` in microseconds."""
+    return {"us_per_op": min(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6}
+
+
+def _run_sync(coro):
+    """Run a coroutine that never suspends, without event loop overhead."""
+    try:
+        coro.send(None)
+    except StopIteration as stop:
+        return stop.value
+    coro.close()
+    raise RuntimeError("coroutine suspended")
+
+
+def run_micro() -> Dict[str, dict]:
+    """Microbenchmark the hot paths behind every request."""
+    results = {}
+    check_request = SecurityCheckRequest(**CHECK_BODY)
+
+    for name, service in (
+        ("micro.analyze_request", SecurityService()),
+        ("micro.analyze_request_cached", SecurityService(cache=_create_verdict_cache(get_settings()))),
+    ):
+        results[name] = per_op(lambda: _run_sync(service.analyze_request(None, check_request)), number=5000)
+
+    bare = Starlette(routes=[Route("/api/v1/health", endpoint)])
+    stack = Starlette(routes=[Route("/api/v1/health", endpoint)])
+    stack.add_middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+    stack.add_middleware(RateLimitHeadersMiddleware)
+    stack.add_middleware(LoggingMiddleware)
+    stack.add_middleware(MetricsMiddleware)
+    bare_us = min(asyncio.run(drive(bare, 2000)) for _ in range(3)) * 1e6
+    stack_us = min(asyncio.run(drive(stack, 2000)) for _ in range(3)) * 1e6
+    results["micro.middleware_stack"] = {"us_per_op": stack_us - bare_us}
+
+    formatter = FastJsonFormatter()
+    record = logging.LogRecord("fastapi", logging.INFO, __file__, 0, {
+        "type": "request_completed",
+        "request_id": "5f0c6d7e-2a1b-4c3d-9e8f-0a1b2c3d4e5f",
+        "method": "GET",
+        "path": "/api/v1/health",
+        "status_code": 200,
+        "duration": 0.00123,
+        "client_host": "127.0.0.1",
+        "query_params": {},
+        "user_agent": "bench/1.0",
+        "content_length": 0,
+        "response_size": 40,
+    }, None, None)
+    results["micro.log_formatter"] = per_op(lambda: formatter.format(record), number=20000)
+    results["micro.get_settings"] = per_op(get_settings, number=200000)
+    return results
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """
+    List the metrics that are worse than the baseline by more than ``threshold``.
+
+    Args:
+        results: Current results
+        baseline: Baseline results
+        threshold: Allowed relative slowdown, e.g. 0.15 for 15%
+
+    Returns:
+        One description per regression
+    """
+    regressions = []
+    for name, metrics in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric, value in metrics.items():
+            previous = base.get(metric)
+            if not previous:
+                continue
+            if metric in LOWER_IS_BETTER and value > previous * (1 + threshold):
+                regressions.append(f"{name} {metric}: {previous:.4g} -> {value:.4g} (+{value / previous - 1:.0%})")
+            elif metric in HIGHER_IS_BETTER and value < previous * (1 - threshold):
+                regressions.append(f"{name} {metric}: {previous:.4g} -> {value:.4g} ({value / previous - 1:.0%})")
+    return regressions
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(results: Dict[str, dict]) -> None:
+    for name, metrics in results.items():
+        if "us_per_op" in metrics:
+            print(f"{name:<32} {metrics['us_per_op']:10.2f} us/op")
+        else:
+            print(
+                f"{name:<32} {metrics['throughput_rps']:10.0f} req/s"
+                f"  p50 {metrics['p50_ms']:7.2f} ms  p95 {metrics['p95_ms']:7.2f} ms"
+                f"  p99 {metrics['p99_ms']:7.2f} ms"
+            )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--requests", type=int, default=2000, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--uvicorn", action="store_true", help="also load test a local uvicorn server")
+    parser.add_argument("--no-inprocess", action="store_true", help="skip the in-process load test")
+    parser.add_argument("--no-micro", action="store_true", help="skip the microbenchmarks")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline JSON file")
+    parser.add_argument("--save-baseline", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--output", help="also write the results to this JSON file")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed relative regression (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as workdir, quiet_logger(workdir):
+        if not args.no_micro:
+            results.update(run_micro())
+        if not args.no_inprocess:
+            results.update(asyncio.run(run_inprocess(args.requests, args.concurrency)))
+        if args.uvicorn:
+            results.update(asyncio.run(run_uvicorn(args.requests, args.concurrency, workdir)))
+    print_results(results)
+
+    report = {
+        "meta": {
+            "created": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.baseline), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nBaseline saved to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"\nNo baseline at {args.baseline}; run with --save-baseline to record one")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,23 +6,30 @@ It uses a factory pattern to create and configure the application.
 """
 
 from src.main import app
-from src.core.logger import logger
+from src.core.logger import configure_file_logging, logger
 
 if __name__ == "__main__":
     import uvicorn
     from src.core.config import get_settings
     
+    from src.core.launcher import serve
+
     settings = get_settings()
+    configure_file_logging(settings)
     logger.info("Starting FastAPI application", extra={
-        "host": "0.0.0.0",
+        "host": settings.HOST,
         "port": settings.PORT,
         "debug": settings.DEBUG
     })
-    uvicorn.run(
-        app,
-        host="0.0.0.0",
-        port=settings.PORT,
-        reload=settings.DEBUG,
-        log_level="info",
-        access_log=True
-    )
+    if settings.DEBUG:
+        # Reloading needs an import string rather than the app object
+        uvicorn.run(
+            "src.main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=settings.DEBUG,
+            log_level="info",
+            access_log=True
+        )
+    else:
+        serve(app, settings)
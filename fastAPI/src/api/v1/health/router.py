@@ -4,8 +4,9 @@ Health Check Router
 This module provides health check endpoints for the FastAPI service.
 """
 
-from fastapi import APIRouter, Request, Depends
+from fastapi import APIRouter, Request, Depends, Response
 from src.core.dependencies import verify_express_origin
+from src.core.health import get_health_monitor
 
 router = APIRouter(
     tags=["health"]
@@ -25,3 +26,23 @@ async def secure_health_check(request: Request):
         "client": request.client.host if request.client else None,
         "authenticated": True
     }
+
+@router.get("/health/ready")
+async def readiness_check():
+    """
+    Whether this instance should receive traffic.
+
+    Serves the snapshot of the last background check: 200 when ready, 503
+    while starting, draining or when a check fails. No check runs per probe.
+    """
+    status_code, body = get_health_monitor().ready_response()
+    return Response(content=body, status_code=status_code, media_type="application/json")
+
+@router.get("/health/live")
+async def liveness_check():
+    """
+    Whether this instance is running: 503 once the background checks stop
+    refreshing, which means the event loop is stuck.
+    """
+    status_code, body = get_health_monitor().live_response()
+    return Response(content=body, status_code=status_code, media_type="application/json")
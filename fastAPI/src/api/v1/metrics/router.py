@@ -0,0 +1,33 @@
+"""
+Metrics Router
+
+This module exposes the metrics registry in the Prometheus text format.
+"""
+
+import asyncio
+from fastapi import APIRouter
+from fastapi.responses import Response
+from src.core.config import get_settings
+from src.core.metrics import CONTENT_TYPE, collect, merge_worker_snapshots, render
+
+router = APIRouter(
+    tags=["metrics"]
+)
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus scrape endpoint.
+
+    With ``METRICS_DIR`` set, the snapshots of every worker are merged.
+    This worker's registry is snapshotted on the event loop, so it is not
+    read while a request is recording into it; the other workers' snapshot
+    files are read and merged in a thread.
+    """
+    directory = get_settings().METRICS_DIR
+    snapshot = collect()
+    if directory:
+        snapshot = await asyncio.get_running_loop().run_in_executor(
+            None, merge_worker_snapshots, directory, snapshot
+        )
+    return Response(render(snapshot), media_type=CONTENT_TYPE)
@@ -4,11 +4,22 @@ Security Router
 This module handles the routing for security-related endpoints.
 """
 
-from fastapi import APIRouter, Depends, Request
-from fastapi.responses import JSONResponse
+import json
+from typing import AsyncIterator, Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import ValidationError
+from src.core.config import get_settings
 from src.core.dependencies import verify_express_origin
-from src.schemas.security import SecurityCheckRequest, SecurityCheckResponse
-from src.services.security import SecurityService
+from src.core.timing import phase
+from src.schemas.security import (
+    SecurityCheckBatchResponse,
+    SecurityCheckRequest,
+    SecurityCheckResponse,
+)
+from src.services.request_decoder import decode_check_request, decode_check_request_fast
+from src.services.security import SecurityService, get_security_service
 
 router = APIRouter(
     prefix="/security",
@@ -16,14 +27,257 @@ router = APIRouter(
     dependencies=[Depends(verify_express_origin)]
 )
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Older Starlette releases only have HTTP_413_REQUEST_ENTITY_TOO_LARGE, which newer ones deprecate
+HTTP_413_CONTENT_TOO_LARGE = getattr(status, "HTTP_413_CONTENT_TOO_LARGE", 413)
+
+# Request bodies read by the endpoints themselves are documented explicitly
+CHECK_REQUEST_SCHEMA = SecurityCheckRequest.model_json_schema()
+
+
+class NDJSONStreamingResponse(StreamingResponse):
+    """
+    Streaming response that leaves the request body to the endpoint.
+
+    ``StreamingResponse`` listens for client disconnects by consuming
+    ``receive()`` while it streams, which would swallow the request body the
+    generator is still reading. Disconnects surface through
+    ``request.stream()`` instead.
+    """
+    media_type = NDJSON_MEDIA_TYPE
+
+    async def __call__(self, scope, receive, send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+async def _iter_ndjson_lines(request: Request, max_line_size: int) -> AsyncIterator[Optional[bytes]]:
+    """
+    Split the request body into NDJSON lines as it streams in.
+
+    Blank lines are skipped. A line longer than ``max_line_size`` is
+    discarded and reported as ``None`` so the caller can emit an error
+    for it without buffering it.
+    """
+    buffer = bytearray()
+    oversized = False
+    async for chunk in request.stream():
+        start = 0
+        while True:
+            end = chunk.find(b"\n", start)
+            if end < 0:
+                if not oversized:
+                    buffer += chunk[start:]
+                    if len(buffer) > max_line_size:
+                        oversized = True
+                        buffer.clear()
+                break
+            if oversized:
+                oversized = False
+                yield None
+            else:
+                buffer += chunk[start:end]
+                if len(buffer) > max_line_size:
+                    yield None
+                elif buffer.strip():
+                    yield bytes(buffer)
+                buffer.clear()
+            start = end + 1
+    if oversized:
+        yield None
+    elif buffer.strip():
+        yield bytes(buffer)
+
+
+async def _read_body(request: Request, limit: int) -> bytes:
+    """
+    Read the request body, refusing it once it grows past ``limit`` bytes.
+
+    A declared ``Content-Length`` over the limit is refused before anything
+    is read, so an oversized request is never buffered.
+
+    Raises:
+        HTTPException: 413 if the body exceeds ``limit``
+    """
+    declared = request.headers.get("content-length")
+    if declared is not None and declared.isdigit() and int(declared) > limit:
+        raise _too_large(int(declared), limit)
+    chunks = []
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > limit:
+            raise _too_large(size, limit)
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+def _too_large(size: int, limit: int) -> HTTPException:
+    return HTTPException(
+        status_code=HTTP_413_CONTENT_TOO_LARGE,
+        detail=f"Request of {size} bytes exceeds limit of {limit}"
+    )
+
+
+def _json_invalid(error: ValueError) -> RequestValidationError:
+    """Report undecodable JSON the way FastAPI does for body parameters."""
+    position = getattr(error, "pos", 0)
+    return RequestValidationError([{
+        "type": "json_invalid",
+        "loc": ("body", position),
+        "msg": "JSON decode error",
+        "input": {},
+        "ctx": {"error": getattr(error, "msg", str(error))},
+    }])
+
 
 """endpoint /security/check"""
 
-@router.post("/check", response_model=SecurityCheckResponse)
-async def check_security(request: Request, check_request: SecurityCheckRequest):
+@router.post(
+    "/check",
+    response_model=SecurityCheckResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {"application/json": {"schema": CHECK_REQUEST_SCHEMA}},
+        }
+    },
+)
+async def check_security(
+    request: Request,
+    security_service: SecurityService = Depends(get_security_service)
+):
     """
     Check incoming request for security threats
+
+    The body size is taken from the raw request bytes. Requests larger than
+    ``MAX_CHECK_REQUEST_SIZE`` are rejected with 413 before being parsed.
+    With ``SECURITY_FAST_PATH`` the request is decoded by orjson and the
+    body sized without walking it; invalid JSON takes the standard decoder
+    so errors are unchanged.
     """
-    security_service = SecurityService()
-    result = await security_service.analyze_request(request, check_request)
-    return JSONResponse(content=result)
+    settings = get_settings()
+    with phase("read"):
+        raw = await _read_body(request, settings.MAX_CHECK_REQUEST_SIZE)
+    with phase("decode"):
+        decoded = decode_check_request_fast(raw, settings.MAX_BODY_SIZE) if settings.SECURITY_FAST_PATH else None
+        if decoded is not None:
+            data, body_size = decoded
+        else:
+            try:
+                data, body_size = decode_check_request(raw, settings.MAX_BODY_SIZE)
+            except ValueError as e:
+                raise _json_invalid(e)
+    try:
+        with phase("validate"):
+            check_request = SecurityCheckRequest.model_validate(data)
+    except ValidationError as e:
+        raise RequestValidationError(
+            [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)],
+            body=data
+        )
+    body = await security_service.analyze_request_json(request, check_request, body_size, raw)
+    return Response(content=body, media_type="application/json")
+
+
+"""endpoint /security/check/batch"""
+
+@router.post(
+    "/check/batch",
+    response_model=SecurityCheckBatchResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {
+                    "schema": {
+                        "type": "array",
+                        "items": CHECK_REQUEST_SCHEMA,
+                        "description": "Security check requests to analyze",
+                    }
+                }
+            },
+        }
+    },
+)
+async def check_security_batch(
+    request: Request,
+    security_service: SecurityService = Depends(get_security_service)
+):
+    """
+    Check several requests for security threats in one call.
+
+    Results are returned in submission order; an invalid item yields an
+    error entry instead of failing the whole batch. Requests larger than
+    ``MAX_CHECK_REQUEST_SIZE`` are rejected with 413 before being parsed.
+    """
+    settings = get_settings()
+    raw = await _read_body(request, settings.MAX_CHECK_REQUEST_SIZE)
+    try:
+        items = json.loads(raw)
+    except ValueError as e:
+        raise _json_invalid(e)
+    if not isinstance(items, list):
+        raise RequestValidationError([{
+            "type": "list_type",
+            "loc": ("body",),
+            "msg": "Input should be a valid list",
+            "input": items,
+        }])
+    max_batch_size = settings.MAX_BATCH_SIZE
+    if len(items) > max_batch_size:
+        raise HTTPException(
+            status_code=HTTP_413_CONTENT_TOO_LARGE,
+            detail=f"Batch of {len(items)} items exceeds limit of {max_batch_size}"
+        )
+    results = [
+        await security_service.analyze_item(request, index, item)
+        for index, item in enumerate(items)
+    ]
+    return JSONResponse(content={"results": results})
+
+
+"""endpoint /security/check/stream"""
+
+@router.post(
+    "/check/stream",
+    response_class=NDJSONStreamingResponse,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                NDJSON_MEDIA_TYPE: {"schema": CHECK_REQUEST_SCHEMA}
+            },
+        }
+    },
+)
+async def check_security_stream(
+    request: Request,
+    security_service: SecurityService = Depends(get_security_service)
+):
+    """
+    Check a stream of newline-delimited JSON requests for security threats.
+
+    Each input line is answered with one NDJSON result line, in order,
+    while the rest of the body is still being read.
+    """
+    max_line_size = get_settings().MAX_NDJSON_LINE_SIZE
+
+    async def verdicts() -> AsyncIterator[bytes]:
+        index = 0
+        async for line in _iter_ndjson_lines(request, max_line_size):
+            if line is None:
+                item = {"index": index, "result": None, "error": f"Line exceeds limit of {max_line_size} bytes"}
+            else:
+                try:
+                    decoded = json.loads(line)
+                except ValueError as e:
+                    item = {"index": index, "result": None, "error": f"Invalid JSON: {e}"}
+                else:
+                    item = await security_service.analyze_item(request, index, decoded, len(line))
+            index += 1
+            yield json.dumps(item).encode() + b"\n"
+
+    return NDJSONStreamingResponse(verdicts())
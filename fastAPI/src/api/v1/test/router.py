@@ -1,7 +1,6 @@
 """
 Test router for generating logs.
 """
-import json
 from fastapi import APIRouter, HTTPException
 from src.core.logger import logger
 
@@ -13,44 +12,44 @@ async def test_logs():
     Generate test logs of different levels.
     """
     # Generate debug log
-    logger.debug(json.dumps({
+    logger.debug({
         "type": "test_debug",
         "message": "This is a debug message",
         "endpoint": "/api/v1/test/test-logs"
-    }))
+    })
 
     # Generate info log
-    logger.info(json.dumps({
+    logger.info({
         "type": "test_info",
         "message": "This is an info message",
         "endpoint": "/api/v1/test/test-logs"
-    }))
+    })
 
     # Generate warning log
-    logger.warning(json.dumps({
+    logger.warning({
         "type": "test_warning",
         "message": "This is a warning message",
         "endpoint": "/api/v1/test/test-logs"
-    }))
+    })
 
     # Generate error log
-    logger.error(json.dumps({
+    logger.error({
         "type": "test_error",
         "message": "This is an error message",
         "endpoint": "/api/v1/test/test-logs"
-    }))
+    })
 
     # Generate exception
     try:
         raise ValueError("Test exception")
     except Exception as e:
-        logger.error(json.dumps({
+        logger.error({
             "type": "test_exception",
             "message": str(e),
             "endpoint": "/api/v1/test/test-logs",
             "error": str(e),
             "error_type": e.__class__.__name__
-        }))
+        })
 
     return {"message": "Logs generated successfully"}
 
@@ -62,11 +61,11 @@ async def test_root():
     Returns:
         dict: A simple message indicating the test endpoint is working
     """
-    logger.info(json.dumps({
+    logger.info({
         "event": "test_access",
         "message": "Test root endpoint accessed",
         "endpoint": "/test/"
-    }))
+    })
     return {"message": "Test endpoint working"}
 
 @router.get("/logs/{item_id}")
@@ -84,22 +83,22 @@ async def test_logging(item_id: int):
         HTTPException: If item_id is negative
     """
     # Log successful access
-    logger.info(json.dumps({
+    logger.info({
         "event": "item_access",
         "message": f"Accessed item {item_id}",
         "endpoint": f"/logs/{item_id}",
         "item_id": item_id
-    }))
+    })
     
     # Demonstrate error logging for negative IDs
     if item_id < 0:
-        error_data = json.dumps({
+        error_data = {
             "event": "item_access_error",
             "message": "Invalid item ID",
             "endpoint": f"/logs/{item_id}",
             "item_id": item_id,
             "error": "Item ID cannot be negative"
-        })
+        }
         logger.error(error_data)
         raise HTTPException(status_code=400, detail="Item ID cannot be negative")
     
@@ -116,11 +115,11 @@ async def test_error():
     Raises:
         HTTPException: Always raises a 500 error for testing
     """
-    error_data = json.dumps({
+    error_data = {
         "event": "test_error",
         "message": "Test error endpoint accessed",
         "endpoint": "/error",
         "error": "Intentional test error"
-    })
+    }
     logger.error(error_data)
     raise HTTPException(status_code=500, detail="Test error")
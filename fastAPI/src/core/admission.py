@@ -0,0 +1,174 @@
+"""
+Admission Control
+
+This module bounds the number of requests each router works on at once, so
+a burst is answered with fast 503s instead of every request queueing behind
+the others until the Express callers time out anyway.
+
+Each router has a concurrency limit (``ADMISSION_ROUTES``, else
+``ADMISSION_MAX_IN_FLIGHT``) and a bounded FIFO wait queue. A request that
+finds the router full waits up to ``ADMISSION_QUEUE_TIMEOUT`` seconds for a
+slot; it is shed when the queue is full, when the wait times out, or at once
+while the event-loop lag is above ``ADMISSION_MAX_LOOP_LAG``.
+
+Requests fall in one of three priority classes:
+    critical: health probes and metrics scrapes. Always admitted, so the
+        orchestrator sees the instance as it is and does not kill it for
+        being busy.
+    normal: requests with a key of the keyring. Limited and queued.
+    low: requests without a valid key. Admitted only into a free slot and
+        never queued, so failing callers cannot take the place of the
+        Express servers in the queue.
+
+Limits are per worker process.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from .config import Config as Settings
+from .metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_TIME, ADMISSION_SHED, EVENT_LOOP_LAG
+
+CRITICAL = "critical"
+NORMAL = "normal"
+LOW = "low"
+
+# Reasons a request is shed
+LOOP_LAG = "loop_lag"
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+NO_SLOT = "no_slot"
+
+
+class Gate:
+    """In-flight count and wait queue of one router."""
+
+    __slots__ = ("name", "limit", "in_flight", "waiters")
+
+    def __init__(self, name: str, limit: int):
+        self.name = name
+        self.limit = limit
+        self.in_flight = 0
+        self.waiters: Deque[asyncio.Future] = deque()
+
+
+class AdmissionController:
+    """
+    Concurrency limits with bounded wait queues, one gate per router.
+
+    Args:
+        max_in_flight: Requests per router worked on at once
+        routes: Router name -> limit, overriding ``max_in_flight``
+        queue_size: Requests per router waiting for a slot
+        queue_timeout: Seconds a request waits for a slot
+        max_loop_lag: Event-loop lag (in seconds) above which requests are
+            shed without waiting; 0 disables it
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int = 64,
+        routes: Optional[Dict[str, int]] = None,
+        queue_size: int = 128,
+        queue_timeout: float = 1.0,
+        max_loop_lag: float = 0.2,
+    ):
+        self.max_in_flight = max_in_flight
+        self.routes = dict(routes or {})
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.max_loop_lag = max_loop_lag
+        self.gates: Dict[str, Gate] = {}
+
+    def gate(self, name: str) -> Gate:
+        """Return the gate of router ``name``, created on first use."""
+        gate = self.gates.get(name)
+        if gate is None:
+            gate = self.gates[name] = Gate(name, self.routes.get(name, self.max_in_flight))
+        return gate
+
+    def overloaded(self) -> bool:
+        """Whether the last event-loop lag probe was above the target."""
+        return bool(self.max_loop_lag) and EVENT_LOOP_LAG.values.get((), 0.0) > self.max_loop_lag
+
+    async def acquire(self, gate: Gate, priority: str) -> Optional[str]:
+        """
+        Take a slot of ``gate``, waiting in its queue if need be.
+
+        Args:
+            gate: Gate of the request's router
+            priority: ``NORMAL`` or ``LOW``
+
+        Returns:
+            None once the slot is taken, else the reason the request is shed
+        """
+        if self.overloaded():
+            return self._shed(gate, priority, LOOP_LAG)
+        if gate.in_flight < gate.limit and not gate.waiters:
+            gate.in_flight += 1
+            ADMISSION_IN_FLIGHT.set((gate.name,), gate.in_flight)
+            return None
+        if priority == LOW:
+            return self._shed(gate, priority, NO_SLOT)
+        if len(gate.waiters) >= self.queue_size:
+            return self._shed(gate, priority, QUEUE_FULL)
+
+        waiter = asyncio.get_running_loop().create_future()
+        gate.waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            # release() takes the slot on behalf of the waiter it wakes
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # Woken in the same loop iteration the timeout fired
+                return None
+            return self._shed(gate, priority, QUEUE_TIMEOUT)
+        except asyncio.CancelledError:
+            # The client went away; give back a slot handed over meanwhile
+            if waiter.done() and not waiter.cancelled():
+                self.release(gate)
+            raise
+        finally:
+            ADMISSION_QUEUE_TIME.observe((gate.name,), time.perf_counter() - start)
+            if not waiter.done() or waiter.cancelled():
+                try:
+                    gate.waiters.remove(waiter)
+                except ValueError:
+                    pass
+        return None
+
+    def release(self, gate: Gate) -> None:
+        """
+        Give back a slot of ``gate``, and hand free slots to the oldest waiters.
+
+        Waiters get a slot only while the gate is below its current limit,
+        so a limit lowered by a reload applies even while requests queue.
+        """
+        gate.in_flight -= 1
+        waiters = gate.waiters
+        while waiters and gate.in_flight < gate.limit:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                gate.in_flight += 1
+        ADMISSION_IN_FLIGHT.set((gate.name,), gate.in_flight)
+
+    @staticmethod
+    def _shed(gate: Gate, priority: str, reason: str) -> str:
+        ADMISSION_SHED.inc((gate.name, priority, reason))
+        return reason
+
+    def apply_settings(self, settings: Settings) -> None:
+        """Pick up limits, queue bounds and the lag target after a reload."""
+        self.max_in_flight = settings.ADMISSION_MAX_IN_FLIGHT
+        self.routes = dict(settings.ADMISSION_ROUTES)
+        self.queue_size = settings.ADMISSION_QUEUE_SIZE
+        self.queue_timeout = settings.ADMISSION_QUEUE_TIMEOUT
+        self.max_loop_lag = settings.ADMISSION_MAX_LOOP_LAG
+        for gate in self.gates.values():
+            # Requests already in flight finish; the new limit applies to the next ones
+            gate.limit = self.routes.get(gate.name, self.max_in_flight)
+
@@ -4,9 +4,13 @@ Core Configuration
 This module handles application configuration using environment variables.
 """
 
+import threading
+import weakref
 from functools import lru_cache
+from typing import Callable, Dict, List, Literal, Optional
 from pydantic import Field
 from pydantic_settings import BaseSettings
+from .logger import logger
 
 class AppConfig(BaseSettings):
     """
@@ -19,6 +23,9 @@ class AppConfig(BaseSettings):
         DESCRIPTION (str): Short description of the application.
         DOCS_URL (str): URL path for API documentation.
         REDOC_URL (str): URL path for ReDoc documentation.
+        SERVICE_NAME (str): Service name attached to shipped log records.
+        ENVIRONMENT (str): Deployment environment attached to shipped log records.
+        OPENAPI_SCHEMA_FILE (str | None): Pre-built openapi.json served instead of generating the schema; ignored when built for another version or set of routes.
     """
     API_V1_PREFIX: str = "/api/v1"
     PROJECT_NAME: str = "FastAPI Security Service"
@@ -26,6 +33,9 @@ class AppConfig(BaseSettings):
     DESCRIPTION: str = "FastAPI Security Service with Elasticsearch logging integration"
     DOCS_URL: str = "/docs"
     REDOC_URL: str = "/redoc"
+    SERVICE_NAME: str = Field("fastapi-app", env="SERVICE_NAME")
+    ENVIRONMENT: str = Field("development", env="ENVIRONMENT")
+    OPENAPI_SCHEMA_FILE: Optional[str] = Field(None, env="OPENAPI_SCHEMA_FILE")
 
 class RuntimeConfig(BaseSettings):
     """
@@ -34,9 +44,69 @@ class RuntimeConfig(BaseSettings):
     Attributes:
         DEBUG (bool): Debug mode toggle.
         PORT (int): Port the application listens on.
+        SETTINGS_WATCH_INTERVAL (float): Interval (in seconds) for polling the env file for changes; 0 disables it.
+        LOG_QUEUE_ENABLED (bool): Format and write logs on a background thread instead of the event loop.
+        LOG_QUEUE_SIZE (int): Maximum number of log records waiting to be written.
+        LOG_QUEUE_OVERFLOW (str): What to do when the log queue is full: drop_debug, block or drop.
+        LOG_BATCH_SIZE (int): Maximum number of log records formatted and written together.
+        LOG_SAMPLE_RATE (float): Fraction of clean requests whose request log records are written.
+        LOG_SAMPLE_ROUTES (dict[str, float]): Sample rates per path prefix, overriding LOG_SAMPLE_RATE.
+        LOG_SAMPLE_BUDGET (float): Request log records per second per worker above which sample rates are lowered; 0 disables it.
+        LOG_ROTATE_MAX_BYTES (int): Size (in bytes) at which logs/app.log is rotated; 0 disables it.
+        LOG_ROTATE_INTERVAL (float): Interval (in seconds, aligned to UTC) at which logs/app.log is rotated; 0 disables it.
+        LOG_RETENTION_COUNT (int): Maximum number of rotated log segments kept; 0 keeps all.
+        LOG_RETENTION_MAX_BYTES (int): Maximum total size (in bytes) of rotated log segments; 0 disables it.
+        LOG_COMPRESS (bool): Gzip rotated log segments on a background thread.
+        HOST (str): Address the production launcher binds.
+        WORKERS (int): Number of worker processes; 0 uses one per CPU core.
+        REUSE_PORT (bool): Give each worker its own SO_REUSEPORT socket instead of sharing one.
+        BACKLOG (int): Listen backlog of the server socket.
+        CHECK_SOCKET_PATH (Optional[str]): Unix socket serving security checks over the binary protocol; unset disables it.
+        KEEP_ALIVE_TIMEOUT (int): Seconds an idle keep-alive connection is held open.
+        WORKER_MAX_REQUESTS (int): Recycle a worker after about this many requests; 0 disables it.
+        WORKER_MAX_RSS_MB (int): Recycle a worker whose resident memory exceeds this many MiB; 0 disables it.
+        GRACEFUL_TIMEOUT (int): Seconds workers get to finish in-flight requests on shutdown.
+        METRICS_ENABLED (bool): Record request metrics and serve them on /metrics.
+        METRICS_DIR (Optional[str]): Directory where workers share metrics snapshots; unset for a single process.
+        METRICS_FLUSH_INTERVAL (float): Interval (in seconds) between metrics snapshot writes.
+        METRICS_LOOP_LAG_INTERVAL (float): Interval (in seconds) between event-loop lag probes.
+        HEALTH_CHECK_INTERVAL (float): Interval (in seconds) between readiness checks.
+        HEALTH_MAX_LOOP_LAG (float): Event-loop lag (in seconds) above which /health/ready reports not ready.
+        HEALTH_MAX_LOG_QUEUE_FILL (float): Log queue fill fraction above which /health/ready reports not ready.
+        HEALTH_MAX_RSS_MB (int): Resident memory (in MiB) above which /health/ready reports not ready; 0 disables it.
     """
     DEBUG: bool = Field(False, env="DEBUG")
     PORT: int = Field(8000, env="PORT")
+    SETTINGS_WATCH_INTERVAL: float = Field(0.0, env="SETTINGS_WATCH_INTERVAL")
+    LOG_QUEUE_ENABLED: bool = Field(True, env="LOG_QUEUE_ENABLED")
+    LOG_QUEUE_SIZE: int = Field(10000, env="LOG_QUEUE_SIZE")
+    LOG_QUEUE_OVERFLOW: Literal["drop_debug", "block", "drop"] = Field("drop_debug", env="LOG_QUEUE_OVERFLOW")
+    LOG_BATCH_SIZE: int = Field(256, env="LOG_BATCH_SIZE")
+    LOG_SAMPLE_RATE: float = Field(1.0, env="LOG_SAMPLE_RATE")
+    LOG_SAMPLE_ROUTES: Dict[str, float] = Field(default_factory=dict, env="LOG_SAMPLE_ROUTES")
+    LOG_SAMPLE_BUDGET: float = Field(0.0, env="LOG_SAMPLE_BUDGET")
+    LOG_ROTATE_MAX_BYTES: int = Field(100 * 1024 * 1024, env="LOG_ROTATE_MAX_BYTES")
+    LOG_ROTATE_INTERVAL: float = Field(86400.0, env="LOG_ROTATE_INTERVAL")
+    LOG_RETENTION_COUNT: int = Field(14, env="LOG_RETENTION_COUNT")
+    LOG_RETENTION_MAX_BYTES: int = Field(1024 * 1024 * 1024, env="LOG_RETENTION_MAX_BYTES")
+    LOG_COMPRESS: bool = Field(True, env="LOG_COMPRESS")
+    HOST: str = Field("0.0.0.0", env="HOST")
+    WORKERS: int = Field(0, env="WORKERS")
+    REUSE_PORT: bool = Field(False, env="REUSE_PORT")
+    BACKLOG: int = Field(2048, env="BACKLOG")
+    CHECK_SOCKET_PATH: Optional[str] = Field(None, env="CHECK_SOCKET_PATH")
+    KEEP_ALIVE_TIMEOUT: int = Field(5, env="KEEP_ALIVE_TIMEOUT")
+    WORKER_MAX_REQUESTS: int = Field(0, env="WORKER_MAX_REQUESTS")
+    WORKER_MAX_RSS_MB: int = Field(0, env="WORKER_MAX_RSS_MB")
+    GRACEFUL_TIMEOUT: int = Field(30, env="GRACEFUL_TIMEOUT")
+    METRICS_ENABLED: bool = Field(True, env="METRICS_ENABLED")
+    METRICS_DIR: Optional[str] = Field(None, env="METRICS_DIR")
+    METRICS_FLUSH_INTERVAL: float = Field(5.0, env="METRICS_FLUSH_INTERVAL")
+    METRICS_LOOP_LAG_INTERVAL: float = Field(0.5, env="METRICS_LOOP_LAG_INTERVAL")
+    HEALTH_CHECK_INTERVAL: float = Field(5.0, env="HEALTH_CHECK_INTERVAL")
+    HEALTH_MAX_LOOP_LAG: float = Field(0.5, env="HEALTH_MAX_LOOP_LAG")
+    HEALTH_MAX_LOG_QUEUE_FILL: float = Field(0.9, env="HEALTH_MAX_LOG_QUEUE_FILL")
+    HEALTH_MAX_RSS_MB: int = Field(0, env="HEALTH_MAX_RSS_MB")
 
 class SecurityConfig(BaseSettings):
     """
@@ -44,13 +114,91 @@ class SecurityConfig(BaseSettings):
 
     Attributes:
         CORS_ORIGINS (list[str]): Allowed origins for CORS.
-        MAX_BODY_SIZE (int): Maximum allowed body size for requests (in KB).
+        MAX_BODY_SIZE (int): Maximum allowed body size for requests (in bytes).
         RATE_LIMIT_PER_MINUTE (int): Maximum number of requests allowed per minute.
+        RATE_LIMIT_ALGORITHM (str): Rate limit algorithm: sliding_window or token_bucket.
+        RATE_LIMIT_BACKEND (str): Where rate limit state lives: memory (per worker) or shared (per host).
+        RATE_LIMIT_SHARED_PATH (str): Memory-mapped file backing the shared rate limit state.
+        RATE_LIMIT_SHARED_BUCKETS (int): Number of hash buckets in the shared rate limit table.
+        RATE_LIMIT_ROUTES (dict[str, int]): Per-router limits per minute, overriding RATE_LIMIT_PER_MINUTE.
+        RATE_LIMIT_API_KEYS (dict[str, int]): Per-API-key limits per minute, overriding router limits; such a key is counted apart from other keys of its label.
+        ADMISSION_ENABLED (bool): Shed requests with 503 when a router is at its concurrency limit or the event loop lags.
+        ADMISSION_MAX_IN_FLIGHT (int): Requests per router and worker worked on at once.
+        ADMISSION_ROUTES (dict[str, int]): Per-router concurrency limits, overriding ADMISSION_MAX_IN_FLIGHT.
+        ADMISSION_QUEUE_SIZE (int): Requests per router and worker waiting for a slot.
+        ADMISSION_QUEUE_TIMEOUT (float): Time (in seconds) a request waits for a slot before it is shed.
+        ADMISSION_MAX_LOOP_LAG (float): Event-loop lag (in seconds) above which requests are shed at once; 0 disables it.
+        ADMISSION_RETRY_AFTER (int): Retry-After value (in seconds) of shed requests.
+        SLOW_REQUEST_THRESHOLD (float): Duration (in seconds) above which a request is logged as slow.
+        REQUEST_TIMING_ENABLED (bool): Time request phases and add them to slow-request log records.
+        SERVER_TIMING_HEADER (bool): Also return the phase timings in a Server-Timing response header.
+        SLOW_REQUEST_PROFILE (bool): Sample the event loop and attach the stacks to slow-request log records.
+        SLOW_REQUEST_PROFILE_INTERVAL (float): Interval (in seconds) between event loop stack samples.
+        THREAT_RULES_FILE (str | None): Optional JSON rule pack with path, header and body signatures.
+        MAX_BATCH_SIZE (int): Maximum number of items accepted by a batch security check.
+        MAX_NDJSON_LINE_SIZE (int): Maximum size (in bytes) of one line of a streaming security check.
+        MAX_CHECK_REQUEST_SIZE (int): Hard cap (in bytes) on a security check request; larger ones are rejected unparsed.
+        SECURITY_FAST_PATH (bool): Decode security check requests with orjson and size the analyzed body without re-encoding it; requests are still validated.
+        BODY_SCAN_ENABLED (bool): Match strings in analyzed bodies against SQL injection, XSS and command injection signatures.
+        BODY_SCAN_MAX_DEPTH (int): Deepest body nesting level scanned.
+        BODY_SCAN_MAX_NODES (int): Most body values scanned.
+        BODY_SCAN_MAX_CHARS (int): Most body string characters scanned.
+        BODY_SCAN_INLINE_MAX_BYTES (int): Bodies up to this size (in bytes) are scanned on the event loop; larger ones in the scan pool.
+        BODY_SCAN_WORKERS (int): Scan pool processes per worker; 0 scans every body inline.
+        VERDICT_CACHE_ENABLED (bool): Cache security check verdicts by request fingerprint.
+        VERDICT_CACHE_MAX_ENTRIES (int): Maximum number of cached verdicts.
+        VERDICT_CACHE_MAX_BYTES (int): Approximate memory cap (in bytes) for cached verdicts.
+        VERDICT_CACHE_TTL (float): Lifetime (in seconds) of a cached verdict.
+        REPUTATION_ENABLED (bool): Track verdicts per client and escalate repeat offenders.
+        REPUTATION_WINDOW (float): Sliding window (in seconds) over which client verdicts are counted.
+        REPUTATION_THREAT_THRESHOLD (int): Threats per window above which a client's threats are raised one level.
+        REPUTATION_MAX_BYTES (int): Approximate memory cap (in bytes) for the reputation store.
+        REPUTATION_SNAPSHOT_PATH (str | None): Path prefix of the per-worker reputation snapshots; unset disables them.
+        REPUTATION_SNAPSHOT_INTERVAL (float): Interval (in seconds) between reputation snapshots.
     """
     CORS_ORIGINS: list[str] = Field(default_factory=lambda: ["http://example.com", "http://anotherdomain.com"], env="CORS_ORIGINS")  # Configurable via environment
     MAX_BODY_SIZE: int = Field(100, env="MAX_BODY_SIZE")
     RATE_LIMIT_PER_MINUTE: int = Field(100, env="RATE_LIMIT_PER_MINUTE")
+    RATE_LIMIT_ALGORITHM: Literal["sliding_window", "token_bucket"] = Field("sliding_window", env="RATE_LIMIT_ALGORITHM")
+    RATE_LIMIT_BACKEND: Literal["memory", "shared"] = Field("memory", env="RATE_LIMIT_BACKEND")
+    RATE_LIMIT_SHARED_PATH: str = Field("/dev/shm/fastapi-rate-limit", env="RATE_LIMIT_SHARED_PATH")
+    RATE_LIMIT_SHARED_BUCKETS: int = Field(16384, env="RATE_LIMIT_SHARED_BUCKETS")
+    RATE_LIMIT_ROUTES: Dict[str, int] = Field(default_factory=dict, env="RATE_LIMIT_ROUTES")
+    RATE_LIMIT_API_KEYS: Dict[str, int] = Field(default_factory=dict, env="RATE_LIMIT_API_KEYS")
+    ADMISSION_ENABLED: bool = Field(True, env="ADMISSION_ENABLED")
+    ADMISSION_MAX_IN_FLIGHT: int = Field(64, env="ADMISSION_MAX_IN_FLIGHT")
+    ADMISSION_ROUTES: Dict[str, int] = Field(default_factory=dict, env="ADMISSION_ROUTES")
+    ADMISSION_QUEUE_SIZE: int = Field(128, env="ADMISSION_QUEUE_SIZE")
+    ADMISSION_QUEUE_TIMEOUT: float = Field(1.0, env="ADMISSION_QUEUE_TIMEOUT")
+    ADMISSION_MAX_LOOP_LAG: float = Field(0.2, env="ADMISSION_MAX_LOOP_LAG")
+    ADMISSION_RETRY_AFTER: int = Field(1, env="ADMISSION_RETRY_AFTER")
     SLOW_REQUEST_THRESHOLD: float = Field(1.0, env="SLOW_REQUEST_THRESHOLD")
+    REQUEST_TIMING_ENABLED: bool = Field(False, env="REQUEST_TIMING_ENABLED")
+    SERVER_TIMING_HEADER: bool = Field(False, env="SERVER_TIMING_HEADER")
+    SLOW_REQUEST_PROFILE: bool = Field(False, env="SLOW_REQUEST_PROFILE")
+    SLOW_REQUEST_PROFILE_INTERVAL: float = Field(0.005, env="SLOW_REQUEST_PROFILE_INTERVAL")
+    THREAT_RULES_FILE: Optional[str] = Field(None, env="THREAT_RULES_FILE")
+    MAX_BATCH_SIZE: int = Field(1000, env="MAX_BATCH_SIZE")
+    MAX_NDJSON_LINE_SIZE: int = Field(1_048_576, env="MAX_NDJSON_LINE_SIZE")
+    MAX_CHECK_REQUEST_SIZE: int = Field(1_048_576, env="MAX_CHECK_REQUEST_SIZE")
+    SECURITY_FAST_PATH: bool = Field(False, env="SECURITY_FAST_PATH")
+    BODY_SCAN_ENABLED: bool = Field(True, env="BODY_SCAN_ENABLED")
+    BODY_SCAN_MAX_DEPTH: int = Field(64, env="BODY_SCAN_MAX_DEPTH")
+    BODY_SCAN_MAX_NODES: int = Field(200_000, env="BODY_SCAN_MAX_NODES")
+    BODY_SCAN_MAX_CHARS: int = Field(2_097_152, env="BODY_SCAN_MAX_CHARS")
+    BODY_SCAN_INLINE_MAX_BYTES: int = Field(32768, env="BODY_SCAN_INLINE_MAX_BYTES")
+    BODY_SCAN_WORKERS: int = Field(2, env="BODY_SCAN_WORKERS")
+    VERDICT_CACHE_ENABLED: bool = Field(True, env="VERDICT_CACHE_ENABLED")
+    VERDICT_CACHE_MAX_ENTRIES: int = Field(10000, env="VERDICT_CACHE_MAX_ENTRIES")
+    VERDICT_CACHE_MAX_BYTES: int = Field(16 * 1024 * 1024, env="VERDICT_CACHE_MAX_BYTES")
+    VERDICT_CACHE_TTL: float = Field(300.0, env="VERDICT_CACHE_TTL")
+    REPUTATION_ENABLED: bool = Field(False, env="REPUTATION_ENABLED")
+    REPUTATION_WINDOW: float = Field(60.0, env="REPUTATION_WINDOW")
+    REPUTATION_THREAT_THRESHOLD: int = Field(10, env="REPUTATION_THREAT_THRESHOLD")
+    REPUTATION_MAX_BYTES: int = Field(8 * 1024 * 1024, env="REPUTATION_MAX_BYTES")
+    REPUTATION_SNAPSHOT_PATH: Optional[str] = Field(None, env="REPUTATION_SNAPSHOT_PATH")
+    REPUTATION_SNAPSHOT_INTERVAL: float = Field(60.0, env="REPUTATION_SNAPSHOT_INTERVAL")
+
 class ExternalServicesConfig(BaseSettings):
     """
     Configuration for external services.
@@ -58,9 +206,31 @@ class ExternalServicesConfig(BaseSettings):
     Attributes:
         EXPRESS_API_KEY (str): API key for the external ExpressJS service.
         EXPRESS_SERVER_URL (str): Base URL for the ExpressJS server.
+        KEYRING_FILE (str | None): JSON file of further accepted API keys with labels, expiries and rate limits.
+        KEYRING_WATCH_INTERVAL (float): Interval (in seconds) between checks of KEYRING_FILE for changes; 0 disables it.
+        LOGSTASH_ENABLED (bool): Ship logs directly to the Logstash json_lines TCP input.
+        LOGSTASH_HOST (str): Logstash host.
+        LOGSTASH_PORT (int): Logstash json_lines TCP input port.
+        LOGSTASH_BATCH_SIZE (int): Maximum number of records sent in one write.
+        LOGSTASH_FLUSH_INTERVAL (float): Maximum time (in seconds) a record waits for a batch to fill.
+        LOGSTASH_BUFFER_SIZE (int): Maximum number of records held in memory.
+        LOGSTASH_SPOOL_PATH (str): Append-only file records are spooled to while Logstash is unreachable; shared by the workers under a lock.
+        LOGSTASH_SPOOL_MAX_BYTES (int): Maximum spool file size (in bytes).
+        LOGSTASH_RECONNECT_MAX_DELAY (float): Upper bound (in seconds) of the reconnect backoff.
     """
     EXPRESS_API_KEY: str = Field(..., env="EXPRESS_API_KEY")  # Sourced from environment variables; required for security
     EXPRESS_SERVER_URL: str = Field("<PLACEHOLDER_URL>", env="EXPRESS_SERVER_URL")  # Use placeholder and ensure environment-specific overrides
+    KEYRING_FILE: Optional[str] = Field(None, env="KEYRING_FILE")
+    KEYRING_WATCH_INTERVAL: float = Field(0.0, env="KEYRING_WATCH_INTERVAL")
+    LOGSTASH_ENABLED: bool = Field(False, env="LOGSTASH_ENABLED")
+    LOGSTASH_HOST: str = Field("logstash", env="LOGSTASH_HOST")
+    LOGSTASH_PORT: int = Field(5000, env="LOGSTASH_PORT")
+    LOGSTASH_BATCH_SIZE: int = Field(500, env="LOGSTASH_BATCH_SIZE")
+    LOGSTASH_FLUSH_INTERVAL: float = Field(0.5, env="LOGSTASH_FLUSH_INTERVAL")
+    LOGSTASH_BUFFER_SIZE: int = Field(10000, env="LOGSTASH_BUFFER_SIZE")
+    LOGSTASH_SPOOL_PATH: str = Field("logs/logstash.spool", env="LOGSTASH_SPOOL_PATH")
+    LOGSTASH_SPOOL_MAX_BYTES: int = Field(256 * 1024 * 1024, env="LOGSTASH_SPOOL_MAX_BYTES")
+    LOGSTASH_RECONNECT_MAX_DELAY: float = Field(30.0, env="LOGSTASH_RECONNECT_MAX_DELAY")
 
 class Config(AppConfig, RuntimeConfig, SecurityConfig, ExternalServicesConfig):
     """
@@ -73,20 +243,105 @@ class Config(AppConfig, RuntimeConfig, SecurityConfig, ExternalServicesConfig):
         case_sensitive (bool): Whether environment variable names are case-sensitive.
         env_file (str): Name of the environment file.
         extra (str): How to handle extra fields in the environment file.
+        frozen (bool): Whether instances are immutable once built.
     """
     class Config:
         case_sensitive = True
         env_file = ".env"
         extra = "forbid"  # Prevent unintentional issues by disallowing extra fields explicitly
+        frozen = True  # Snapshots are shared between requests and must not change
+
+ENV_FILE = Config.model_config["env_file"]
+
+_settings: Optional[Config] = None
+_settings_lock = threading.Lock()
+_reload_listeners: List[Callable[[], Optional[Callable[[Config], None]]]] = []
 
 def get_settings() -> Config:
     """
     Get settings instance.
 
-    This function does not use caching to ensure configuration changes
-    during runtime (if needed) are applied dynamically.
+    Settings are parsed once and served from an immutable in-memory snapshot.
+    Use ``reload_settings`` to pick up changes to the environment or env file.
 
     Returns:
         Config: Consolidated configuration instance with all application settings.
     """
-    return Config()
+    settings = _settings
+    if settings is None:
+        with _settings_lock:
+            if _settings is None:
+                _swap_settings(Config())
+            settings = _settings
+    return settings
+
+def reload_settings() -> Config:
+    """
+    Re-read the environment and env file and swap in a new settings snapshot.
+
+    The swap is atomic: requests in flight keep the snapshot they already hold.
+    Registered listeners are notified with the new snapshot. If the new
+    configuration is invalid, the error propagates and the current snapshot
+    stays in place. Every listener runs even if an earlier one fails; each
+    failure is logged and they are raised together once all have run, with
+    the new snapshot already in place.
+
+    Returns:
+        Config: The new settings snapshot.
+
+    Raises:
+        ReloadListenerError: If one or more listeners failed
+    """
+    settings = Config()
+    with _settings_lock:
+        _swap_settings(settings)
+    errors = []
+    for listener_ref in list(_reload_listeners):
+        listener = listener_ref()
+        if listener is None:
+            _reload_listeners.remove(listener_ref)
+            continue
+        try:
+            listener(settings)
+        except Exception as e:
+            errors.append(e)
+            logger.error({
+                "type": "reload_listener_failed",
+                "listener": getattr(listener, "__qualname__", repr(listener)),
+                "error": str(e),
+                "error_type": e.__class__.__name__,
+            })
+    if errors:
+        raise ReloadListenerError(errors)
+    return settings
+
+class ReloadListenerError(ValueError):
+    """
+    Raised by ``reload_settings`` when reload listeners failed.
+
+    Args:
+        errors: The exception raised by each failed listener, in order
+    """
+
+    def __init__(self, errors: List[Exception]):
+        self.errors = errors
+        super().__init__("; ".join(f"{e.__class__.__name__}: {e}" for e in errors))
+
+def add_reload_listener(listener: Callable[[Config], None]) -> None:
+    """
+    Register a callback to run with the new snapshot after each reload.
+
+    Bound methods are held weakly so that registering does not keep their
+    owner alive.
+
+    Args:
+        listener: Callable taking the new settings snapshot.
+    """
+    if hasattr(listener, "__self__"):
+        _reload_listeners.append(weakref.WeakMethod(listener))
+    else:
+        _reload_listeners.append(lambda: listener)
+
+def _swap_settings(settings: Config) -> None:
+    global _settings
+    _settings = settings
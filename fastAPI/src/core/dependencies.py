@@ -4,8 +4,18 @@ Core Dependencies
 This module contains FastAPI dependencies for authentication and authorization.
 """
 
+from functools import lru_cache
+from urllib.parse import urlsplit
 from fastapi import Request, HTTPException, status, Depends
 from .config import Config as Settings, get_settings
+from .keyring import authenticate_request
+from .timing import phase
+
+@lru_cache(maxsize=16)
+def _origin_of(url: str) -> str:
+    """Reduce a URL to its ``scheme://host[:port]`` origin, lowercased."""
+    parts = urlsplit(url.strip())
+    return f"{parts.scheme}://{parts.netloc}".lower() if parts.netloc else url.strip().rstrip("/").lower()
 
 async def verify_express_origin(
     request: Request,
@@ -14,6 +24,9 @@ async def verify_express_origin(
     """
     Verify that the request comes from the authorized Express.js server.
     
+    The ``X-API-Key`` header must match a key of the keyring; the
+    ``Origin`` header, when sent, must be the origin of ``EXPRESS_SERVER_URL``.
+    
     Args:
         request: The FastAPI request object
         settings: Application settings
@@ -24,20 +37,20 @@ async def verify_express_origin(
     Raises:
         HTTPException: If authentication fails
     """
-    # Verify API key
-    api_key = request.headers.get("X-API-Key")
-    if not api_key or api_key != settings.EXPRESS_API_KEY:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Invalid API key"
-        )
-    
-    # Verify origin
-    origin = request.headers.get("origin")
-    if origin and origin != str(settings.EXPRESS_SERVER_URL):
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Invalid origin"
-        )
+    with phase("auth"):
+        # Verify API key
+        if authenticate_request(request) is None:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid API key"
+            )
+        
+        # Verify origin
+        origin = request.headers.get("origin")
+        if origin and _origin_of(origin) != _origin_of(str(settings.EXPRESS_SERVER_URL)):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Invalid origin"
+            )
     
     return True
@@ -0,0 +1,226 @@
+"""
+Health Monitor
+
+This module computes the instance's readiness and liveness on a background
+task, so ``/health/ready`` and ``/health/live`` serve a pre-rendered
+snapshot and a probe costs no more than a clock read, however often
+orchestrators and load balancers ask.
+
+Every ``HEALTH_CHECK_INTERVAL`` seconds the monitor checks the log queue
+fill, Logstash reachability, event-loop lag, RSS and the rate limiter. A
+check reports ``ok``, ``degraded`` (reported, but traffic is still taken)
+or ``fail`` (the instance is not ready). The instance is live while the
+monitor keeps refreshing the snapshot.
+"""
+
+import asyncio
+import json
+import time
+from functools import lru_cache
+from typing import Dict, NamedTuple, Optional
+
+from .config import get_settings
+from .log_queue import get_log_pipeline
+from .logger import logger
+from .metrics import EVENT_LOOP_LAG, PROCESS_RESIDENT_MEMORY, collect_process_metrics
+from .rate_limit import get_rate_limiter
+
+OK = "ok"
+DEGRADED = "degraded"
+FAIL = "fail"
+
+# A rate limiter update slower than this (in seconds) is reported as degraded
+RATE_LIMITER_SLOW = 0.05
+
+# The instance stops being live when the snapshot is older than this many intervals
+STALE_INTERVALS = 3
+
+
+class HealthSnapshot(NamedTuple):
+    """Pre-rendered readiness response and when it was computed."""
+    ready: bool
+    ready_body: bytes
+    checked_at: float
+
+
+def _render(payload: dict) -> bytes:
+    return json.dumps(payload, separators=(",", ":")).encode("utf-8")
+
+
+def _check(status: str, **values) -> dict:
+    return {"status": status, **values}
+
+
+_STARTING = HealthSnapshot(False, _render({"status": "starting"}), 0.0)
+_ALIVE_BODY = _render({"status": "alive"})
+_STALLED_BODY = _render({"status": "stalled"})
+
+
+class HealthMonitor:
+    """
+    Background task keeping the readiness and liveness snapshot current.
+
+    Args:
+        interval: Seconds between checks
+        max_loop_lag: Event-loop lag (in seconds) above which the instance is not ready
+        max_log_queue_fill: Log queue fill fraction above which the instance is not ready
+        max_rss_bytes: Resident memory above which the instance is not ready; 0 disables it
+    """
+
+    def __init__(
+        self,
+        interval: float = 5.0,
+        max_loop_lag: float = 0.5,
+        max_log_queue_fill: float = 0.9,
+        max_rss_bytes: int = 0,
+    ):
+        self.interval = interval
+        self.max_loop_lag = max_loop_lag
+        self.max_log_queue_fill = max_log_queue_fill
+        self.max_rss_bytes = max_rss_bytes
+        self.snapshot = _STARTING
+        self.draining = False
+        self._loop_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Take the first snapshot and start refreshing it."""
+        self.refresh()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def drain(self) -> None:
+        """Report not ready from now on, so traffic moves away before shutdown."""
+        self.draining = True
+        self.refresh()
+
+    def live(self, now: Optional[float] = None) -> bool:
+        """Whether the snapshot is fresh, meaning the event loop and the monitor are running."""
+        if self._task is None:
+            return True
+        now = time.monotonic() if now is None else now
+        return now - self.snapshot.checked_at <= self.interval * STALE_INTERVALS
+
+    def live_response(self):
+        """Return the liveness status code and body."""
+        if self.live():
+            return 200, _ALIVE_BODY
+        return 503, _STALLED_BODY
+
+    def ready_response(self):
+        """Return the readiness status code and body."""
+        snapshot = self.snapshot
+        return (200 if snapshot.ready else 503), snapshot.ready_body
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self._loop_lag = max(0.0, loop.time() - scheduled)
+            try:
+                self.refresh()
+            except Exception:
+                logger.exception({"type": "health_check_failed"})
+
+    def refresh(self) -> HealthSnapshot:
+        """Run every check and swap in a new snapshot."""
+        checks = self.run_checks()
+        ready = not self.draining and all(check["status"] != FAIL for check in checks.values())
+        if self.draining:
+            status = "draining"
+        elif not ready:
+            status = "not_ready"
+        elif any(check["status"] == DEGRADED for check in checks.values()):
+            status = "degraded"
+        else:
+            status = "ready"
+        checked_at = time.monotonic()
+        payload = {"status": status, "checked_at": round(time.time(), 3), "checks": checks}
+        previous = self.snapshot
+        self.snapshot = HealthSnapshot(ready, _render(payload), checked_at)
+        if ready != previous.ready and previous is not _STARTING:
+            log = logger.info if ready else logger.warning
+            log({"type": "readiness_changed", "ready": ready, "status": status, "checks": checks})
+        return self.snapshot
+
+    def run_checks(self) -> Dict[str, dict]:
+        """Return the result of each check."""
+        return {
+            "log_queue": self._check_log_queue(),
+            "logstash": self._check_logstash(),
+            "event_loop": self._check_event_loop(),
+            "memory": self._check_memory(),
+            "rate_limiter": self._check_rate_limiter(),
+        }
+
+    def _check_log_queue(self) -> dict:
+        pipeline = get_log_pipeline()
+        if pipeline is None:
+            return _check(OK, enabled=False)
+        stats = pipeline.stats()
+        fill = stats["queue_depth"] / stats["queue_size"] if stats["queue_size"] else 0.0
+        status = FAIL if fill > self.max_log_queue_fill else OK
+        return _check(status, depth=stats["queue_depth"], size=stats["queue_size"], dropped=stats["dropped"])
+
+    @staticmethod
+    def _check_logstash() -> dict:
+        # Imported here so the application imports the shipper only when it starts one
+        from .logstash import get_logstash_shipper
+
+        shipper = get_logstash_shipper()
+        if shipper is None:
+            return _check(OK, enabled=False)
+        # Records are spooled to disk while Logstash is away, so this never fails readiness
+        stats = shipper.stats()
+        return _check(
+            OK if shipper.connected else DEGRADED,
+            connected=shipper.connected,
+            buffered=stats["buffered"],
+            spool_bytes=stats["spool_bytes"],
+        )
+
+    def _check_event_loop(self) -> dict:
+        # The lag monitor of the metrics probes more often; take the worse of both
+        lag = max(self._loop_lag, EVENT_LOOP_LAG.values.get((), 0.0))
+        return _check(FAIL if lag > self.max_loop_lag else OK, lag_seconds=round(lag, 4))
+
+    def _check_memory(self) -> dict:
+        collect_process_metrics()
+        rss = int(PROCESS_RESIDENT_MEMORY.values.get((), 0))
+        status = FAIL if self.max_rss_bytes and rss > self.max_rss_bytes else OK
+        return _check(status, rss_bytes=rss)
+
+    @staticmethod
+    def _check_rate_limiter() -> dict:
+        start = time.perf_counter()
+        try:
+            limiter = get_rate_limiter()
+            # Straight to the backend, so the probe is not counted as a request
+            limiter.backend.update("health|probe", limiter.algorithm, limiter.clock(), 1 << 30, 60.0)
+        except Exception as e:
+            return _check(FAIL, error=str(e))
+        elapsed = time.perf_counter() - start
+        return _check(DEGRADED if elapsed > RATE_LIMITER_SLOW else OK, probe_seconds=round(elapsed, 6))
+
+
+@lru_cache
+def get_health_monitor() -> HealthMonitor:
+    """
+    Get the process-wide health monitor, configured from settings.
+
+    Returns:
+        HealthMonitor: Shared health monitor
+    """
+    settings = get_settings()
+    return HealthMonitor(
+        interval=settings.HEALTH_CHECK_INTERVAL,
+        max_loop_lag=settings.HEALTH_MAX_LOOP_LAG,
+        max_log_queue_fill=settings.HEALTH_MAX_LOG_QUEUE_FILL,
+        max_rss_bytes=settings.HEALTH_MAX_RSS_MB * 1024 * 1024,
+    )
@@ -0,0 +1,290 @@
+"""
+API Keyring
+
+This module holds the API keys accepted from Express servers. Every key has
+a label, an optional expiry and an optional rate limit, so each fleet can
+have its own key and keys can be rotated by adding the new one, moving the
+fleet over and letting the old one expire.
+
+``EXPRESS_API_KEY`` is always accepted under the label ``default``. More
+keys come from ``KEYRING_FILE``, a JSON file such as:
+
+    {"keys": [
+        {"label": "fleet-a", "sha256": "<hex digest of the key>",
+         "expires": "2026-12-31T00:00:00Z", "rate_limit_per_minute": 600},
+        {"label": "fleet-b", "key": "<the key itself>"}
+    ]}
+
+Keys are looked up by their SHA-256 digest, so a lookup is one hash and one
+dictionary probe whatever the number of keys. Timing reveals nothing usable
+about the key: an attacker cannot choose a digest. A connection that
+authenticated once is remembered, and later requests on it are checked with
+a constant-time comparison against the key it presented. The file is
+re-read on settings reloads and, with ``KEYRING_WATCH_INTERVAL``, whenever
+it changes.
+"""
+
+import asyncio
+import datetime
+import hashlib
+import hmac
+import json
+import os
+import time
+from functools import lru_cache
+from typing import Callable, Dict, Hashable, NamedTuple, Optional, Tuple, Union
+
+from fastapi import Request
+
+from .config import Config as Settings, add_reload_listener, get_settings
+from .logger import logger
+from .metrics import API_KEY_LOOKUPS
+
+DEFAULT_LABEL = "default"
+
+# Connections remembered by the auth cache; the oldest are forgotten first
+MAX_CACHED_CONNECTIONS = 4096
+
+
+class ApiKey(NamedTuple):
+    """An accepted API key, identified by its label."""
+    label: str
+    expires: Optional[float] = None
+    rate_limit: Optional[int] = None
+
+
+def key_digest(api_key: Union[str, bytes]) -> bytes:
+    """Return the SHA-256 digest a key is looked up by."""
+    if isinstance(api_key, str):
+        api_key = api_key.encode("utf-8")
+    return hashlib.sha256(api_key).digest()
+
+
+def _parse_expiry(value) -> Optional[float]:
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    expires = datetime.datetime.fromisoformat(value)
+    if expires.tzinfo is None:
+        expires = expires.replace(tzinfo=datetime.timezone.utc)
+    return expires.timestamp()
+
+
+def load_keyring_file(path: str) -> Dict[bytes, ApiKey]:
+    """
+    Read the keys of a keyring file.
+
+    Args:
+        path: JSON keyring file
+
+    Returns:
+        Key digest -> key
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file or one of its keys is malformed
+    """
+    with open(path) as f:
+        data = json.load(f)
+    keys = {}
+    for index, spec in enumerate(data.get("keys", [])):
+        try:
+            label = spec["label"]
+            if "sha256" in spec:
+                digest = bytes.fromhex(spec["sha256"])
+                if len(digest) != hashlib.sha256().digest_size:
+                    raise ValueError("sha256 must be 64 hex digits")
+            else:
+                digest = key_digest(spec["key"])
+            rate_limit = spec.get("rate_limit_per_minute")
+            keys[digest] = ApiKey(label, _parse_expiry(spec.get("expires")), int(rate_limit) if rate_limit else None)
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid key #{index} in keyring {path}: {e!r}") from e
+    return keys
+
+
+class Keyring:
+    """
+    Accepted API keys with an auth cache per connection.
+
+    Args:
+        keys: Key digest -> key
+        clock: Time source for expiry checks
+    """
+
+    def __init__(self, keys: Optional[Dict[bytes, ApiKey]] = None, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._keys: Dict[bytes, ApiKey] = dict(keys or {})
+        # Connection -> (presented key, key, keyring version)
+        self._connections: Dict[Hashable, Tuple[str, ApiKey, int]] = {}
+        self.version = 0
+        self.path: Optional[str] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def replace(self, keys: Dict[bytes, ApiKey]) -> None:
+        """Swap in a new set of keys; cached connections verify again."""
+        self._keys = dict(keys)
+        self._connections = {}
+        self.version += 1
+
+    def lookup(self, api_key: Union[str, bytes, None]) -> Optional[ApiKey]:
+        """
+        Find the key matching ``api_key``, counting the lookup by label.
+
+        Args:
+            api_key: Key presented by the client
+
+        Returns:
+            The key, or None if it is missing, unknown or expired
+        """
+        if not api_key:
+            API_KEY_LOOKUPS.inc(("", "missing"))
+            return None
+        entry = self._keys.get(key_digest(api_key))
+        if entry is None:
+            API_KEY_LOOKUPS.inc(("", "unknown"))
+            return None
+        if entry.expires is not None and self.clock() >= entry.expires:
+            API_KEY_LOOKUPS.inc((entry.label, "expired"))
+            return None
+        API_KEY_LOOKUPS.inc((entry.label, "valid"))
+        return entry
+
+    def authenticate(self, api_key: Optional[str], connection: Optional[Hashable] = None) -> Optional[ApiKey]:
+        """
+        Look up ``api_key``, reusing the result of earlier requests on the same connection.
+
+        Args:
+            api_key: Key presented by the client
+            connection: Identity of the client connection, such as the
+                ASGI ``client`` address; None disables caching
+
+        Returns:
+            The key, or None if the request is not authenticated
+        """
+        if connection is None or not api_key:
+            return self.lookup(api_key)
+        cached = self._connections.get(connection)
+        if cached is not None and cached[2] == self.version:
+            presented, entry, _ = cached
+            try:
+                same = hmac.compare_digest(presented, api_key)
+            except TypeError:  # non-ASCII header value
+                same = False
+            if same and (entry.expires is None or self.clock() < entry.expires):
+                API_KEY_LOOKUPS.inc((entry.label, "cached"))
+                return entry
+        entry = self.lookup(api_key)
+        if entry is not None:
+            connections = self._connections
+            if len(connections) >= MAX_CACHED_CONNECTIONS and connection not in connections:
+                del connections[next(iter(connections))]
+            connections[connection] = (api_key, entry, self.version)
+        return entry
+
+    def apply_settings(self, settings: Settings) -> None:
+        """Rebuild the keys from ``EXPRESS_API_KEY`` and ``KEYRING_FILE`` after a reload."""
+        self.reload(settings)
+
+    def reload(self, settings: Settings) -> bool:
+        """
+        Rebuild the keys from ``EXPRESS_API_KEY`` and ``KEYRING_FILE``.
+
+        A file that fails to load is logged and the current keys stay
+        active; the file is still watched, so fixing it reloads the keys.
+
+        Args:
+            settings: Settings snapshot naming the keyring file
+
+        Returns:
+            True if the keys were replaced
+        """
+        self.path = settings.KEYRING_FILE
+        try:
+            keys = _settings_keys(settings)
+        except (OSError, ValueError) as e:
+            logger.error({"type": "keyring_reload_failed", "path": self.path, "error": str(e)})
+            return False
+        self.replace(keys)
+        return True
+
+
+def _settings_keys(settings: Settings) -> Dict[bytes, ApiKey]:
+    keys = load_keyring_file(settings.KEYRING_FILE) if settings.KEYRING_FILE else {}
+    keys.setdefault(key_digest(settings.EXPRESS_API_KEY), ApiKey(DEFAULT_LABEL))
+    return keys
+
+
+@lru_cache
+def get_keyring() -> Keyring:
+    """
+    Get the process-wide keyring, rebuilt when settings are reloaded.
+
+    Returns:
+        Keyring: Shared keyring
+    """
+    settings = get_settings()
+    keyring = Keyring(_settings_keys(settings))
+    keyring.path = settings.KEYRING_FILE
+    add_reload_listener(keyring.apply_settings)
+    return keyring
+
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+async def watch_keyring_file(keyring: Keyring, interval: float) -> None:
+    """
+    Reload the keyring whenever its file's modification time changes.
+
+    A file that fails to load is logged and the current keys stay active.
+
+    Args:
+        keyring: Keyring to reload
+        interval: Polling interval in seconds
+    """
+    last_mtime = _mtime(keyring.path) if keyring.path else None
+    while True:
+        await asyncio.sleep(interval)
+        if not keyring.path:
+            continue
+        mtime = _mtime(keyring.path)
+        if mtime == last_mtime:
+            continue
+        last_mtime = mtime
+        if keyring.reload(get_settings()):
+            logger.info({"type": "keyring_reloaded", "path": keyring.path, "keys": len(keyring)})
+
+
+# Request scope entry memoizing the key a request authenticated with
+_SCOPE_KEY = "fastapi.api_key"
+
+
+def authenticate_request(request: Request) -> Optional[ApiKey]:
+    """
+    Authenticate a request by its ``X-API-Key`` header.
+
+    The result is memoized on the request, so the rate limiter and the auth
+    dependency share one lookup, and cached per client connection.
+
+    Args:
+        request: The FastAPI request object
+
+    Returns:
+        The key, or None if the request is not authenticated
+    """
+    scope = request.scope
+    try:
+        return scope[_SCOPE_KEY]
+    except KeyError:
+        pass
+    entry = get_keyring().authenticate(request.headers.get("X-API-Key"), scope.get("client"))
+    scope[_SCOPE_KEY] = entry
+    return entry
@@ -0,0 +1,294 @@
+"""
+Production Launcher
+
+This module runs the application in pre-forked uvicorn workers. The master
+process binds the listening socket (or, with ``REUSE_PORT``, lets each
+worker bind its own so the kernel balances connections), forks the workers
+after the application has been imported, replaces workers that exit,
+recycles workers past their request count or RSS limit, and on SIGTERM
+drains in-flight requests before exiting.
+"""
+
+import importlib.util
+import os
+import random
+import signal
+import socket
+import time
+from typing import Dict, Optional
+
+import psutil
+import uvicorn
+
+from .logger import configure_file_logging, logger
+from .metrics import clear_snapshots
+
+# How often the master reaps exited workers and checks worker RSS
+MONITOR_INTERVAL = 1.0
+
+# Workers that die sooner than this after starting are respawned with a delay
+MIN_WORKER_UPTIME = 1.0
+RESPAWN_DELAY = 1.0
+
+
+def event_loop_implementation() -> str:
+    """Return ``uvloop`` when it is installed, else ``asyncio``."""
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_implementation() -> str:
+    """Return ``httptools`` when it is installed, else ``h11``."""
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def bind_socket(host: str, port: int, backlog: int, reuse_port: bool = False) -> socket.socket:
+    """
+    Create a listening TCP socket.
+
+    Args:
+        host: Address to bind
+        port: Port to bind
+        backlog: Listen backlog
+        reuse_port: Set ``SO_REUSEPORT`` so several sockets can share the port
+
+    Returns:
+        The listening socket
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Launcher:
+    """
+    Pre-fork master supervising a fixed number of uvicorn workers.
+
+    Signals:
+        SIGTERM, SIGINT: stop accepting work, let workers drain for up to
+            ``GRACEFUL_TIMEOUT`` seconds, then kill the rest.
+        SIGHUP: forwarded to every worker, which reloads its settings.
+    """
+
+    def __init__(self, app, settings):
+        self.app = app
+        self.settings = settings
+        self.workers_count = settings.WORKERS or os.cpu_count() or 1
+        self.loop = event_loop_implementation()
+        self.http = http_implementation()
+        self.workers: Dict[int, float] = {}
+        self.recycling: Dict[int, str] = {}
+        self.sock: Optional[socket.socket] = None
+        self.check_sock: Optional[socket.socket] = None
+        self.stopping = False
+
+    def run(self) -> None:
+        """Start the workers and supervise them until asked to stop."""
+        settings = self.settings
+        if settings.METRICS_DIR:
+            clear_snapshots(settings.METRICS_DIR)
+        if not settings.REUSE_PORT:
+            self.sock = bind_socket(settings.HOST, settings.PORT, settings.BACKLOG)
+        if settings.CHECK_SOCKET_PATH:
+            from src.services.check_socket import bind_check_socket, share_check_socket
+
+            # Unix sockets cannot be shared with SO_REUSEPORT; every worker accepts on this one
+            self.check_sock = bind_check_socket(settings.CHECK_SOCKET_PATH, settings.BACKLOG)
+            share_check_socket(self.check_sock)
+        if self.workers_count > 1 and settings.RATE_LIMIT_BACKEND == "memory":
+            logger.warning({
+                "type": "rate_limit_per_worker",
+                "message": "RATE_LIMIT_BACKEND=memory enforces limits per worker; use 'shared' with several workers",
+                "workers": self.workers_count,
+            })
+        logger.info({
+            "type": "launcher_started",
+            "pid": os.getpid(),
+            "host": settings.HOST,
+            "port": settings.PORT,
+            "workers": self.workers_count,
+            "loop": self.loop,
+            "http": self.http,
+            "reuse_port": settings.REUSE_PORT,
+            "backlog": settings.BACKLOG,
+            "check_socket": settings.CHECK_SOCKET_PATH,
+            "keep_alive_timeout": settings.KEEP_ALIVE_TIMEOUT,
+        })
+
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        signal.signal(signal.SIGHUP, self._handle_hup)
+
+        for _ in range(self.workers_count):
+            self._spawn()
+        while not self.stopping:
+            time.sleep(MONITOR_INTERVAL)
+            self._reap()
+            self._check_memory()
+        self._shutdown()
+
+    def _handle_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _handle_hup(self, signum, frame) -> None:
+        for pid in self.workers:
+            self._signal(pid, signal.SIGHUP)
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._serve()
+            except BaseException:
+                logger.exception({"type": "worker_failed", "pid": os.getpid()})
+                code = 1
+            finally:
+                os._exit(code)
+        self.workers[pid] = time.monotonic()
+        logger.info({"type": "worker_started", "pid": pid, "workers": len(self.workers)})
+
+    def _serve(self) -> None:
+        """Worker body: run one uvicorn server on the shared or a reuse-port socket."""
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        # Ignored until the application installs its reload handler at startup
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+        settings = self.settings
+        sock = self.sock or bind_socket(settings.HOST, settings.PORT, settings.BACKLOG, reuse_port=True)
+
+        limit_max_requests = None
+        if settings.WORKER_MAX_REQUESTS > 0:
+            # Jitter so workers started together are not all recycled together
+            jitter = settings.WORKER_MAX_REQUESTS // 10
+            limit_max_requests = settings.WORKER_MAX_REQUESTS + random.randint(0, jitter)
+
+        config = uvicorn.Config(
+            self.app,
+            loop=self.loop,
+            http=self.http,
+            backlog=settings.BACKLOG,
+            timeout_keep_alive=settings.KEEP_ALIVE_TIMEOUT,
+            timeout_graceful_shutdown=settings.GRACEFUL_TIMEOUT,
+            limit_max_requests=limit_max_requests,
+            log_level="info",
+            access_log=True,
+        )
+        uvicorn.Server(config).run(sockets=[sock])
+
+    def _reap(self) -> None:
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.workers.pop(pid, None)
+            if started is None:
+                continue
+            reason = self.recycling.pop(pid, None)
+            exit_code = os.waitstatus_to_exitcode(status)
+            if reason is None:
+                if exit_code != 0:
+                    reason = "crashed"
+                elif self.settings.WORKER_MAX_REQUESTS > 0:
+                    reason = "max_requests"
+                else:
+                    reason = "exited"
+            uptime = time.monotonic() - started
+            log = logger.info if reason != "crashed" else logger.error
+            log({
+                "type": "worker_exited",
+                "pid": pid,
+                "exit_code": exit_code,
+                "reason": reason,
+                "uptime": round(uptime, 3),
+            })
+            if not self.stopping:
+                if reason == "crashed" and uptime < MIN_WORKER_UPTIME:
+                    time.sleep(RESPAWN_DELAY)
+                self._spawn()
+
+    def _check_memory(self) -> None:
+        limit = self.settings.WORKER_MAX_RSS_MB * 1024 * 1024
+        if limit <= 0:
+            return
+        for pid in list(self.workers):
+            if pid in self.recycling:
+                continue
+            try:
+                rss = psutil.Process(pid).memory_info().rss
+            except psutil.Error:
+                continue
+            if rss > limit:
+                logger.warning({
+                    "type": "worker_recycling",
+                    "pid": pid,
+                    "reason": "max_rss",
+                    "rss_bytes": rss,
+                    "limit_bytes": limit,
+                })
+                self.recycling[pid] = "max_rss"
+                # Graceful: the worker finishes its in-flight requests before exiting
+                self._signal(pid, signal.SIGTERM)
+
+    def _shutdown(self) -> None:
+        timeout = self.settings.GRACEFUL_TIMEOUT
+        logger.info({"type": "launcher_stopping", "workers": len(self.workers), "graceful_timeout": timeout})
+        for pid in self.workers:
+            self.recycling[pid] = "shutdown"
+            self._signal(pid, signal.SIGTERM)
+        if self.sock is not None:
+            self.sock.close()
+        if self.check_sock is not None:
+            self.check_sock.close()
+            try:
+                os.unlink(self.settings.CHECK_SOCKET_PATH)
+            except FileNotFoundError:
+                pass
+        deadline = time.monotonic() + timeout
+        while self.workers and time.monotonic() < deadline:
+            time.sleep(0.1)
+            self._reap()
+        for pid in self.workers:
+            logger.warning({"type": "worker_killed", "pid": pid, "reason": "graceful_timeout"})
+            self._signal(pid, signal.SIGKILL)
+        while self.workers:
+            try:
+                pid, _ = os.waitpid(-1, 0)
+            except ChildProcessError:
+                break
+            self.workers.pop(pid, None)
+        logger.info({"type": "launcher_stopped"})
+
+    @staticmethod
+    def _signal(pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+
+def serve(app, settings) -> None:
+    """
+    Run ``app`` in pre-forked workers until SIGTERM or SIGINT.
+
+    Args:
+        app: ASGI application, imported before the workers are forked
+        settings: Application settings
+    """
+    configure_file_logging(settings)
+    Launcher(app, settings).run()
+
+
+if __name__ == "__main__":
+    from src.core.config import get_settings
+    from src.main import app
+
+    serve(app, get_settings())
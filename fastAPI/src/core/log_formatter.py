@@ -0,0 +1,136 @@
+"""
+Log Formatter
+
+This module provides a JSON log formatter that produces the same records as
+``pythonjsonlogger.jsonlogger.JsonFormatter`` configured with
+``'%(asctime)s %(levelname)s %(name)s %(message)s'``, at a fraction of the
+cost: the static part of each line is built once per logger and level,
+timestamps are rendered once per second, and dict messages are serialized
+directly (with orjson when available) instead of being encoded to a string
+first. Lines are compact JSON, one record per line.
+"""
+
+import dataclasses
+import datetime
+import enum
+import json
+import logging
+import time
+import traceback
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+# Attributes every LogRecord carries; anything else was passed via ``extra``
+RESERVED_ATTRS = frozenset(logging.LogRecord(
+    "", logging.INFO, "", 0, "", None, None
+).__dict__) | {"asctime", "message", "taskName"}
+
+
+def _default(obj: Any) -> Any:
+    """Encode values the standard JSON encoder rejects, like ``JsonFormatter`` does."""
+    if isinstance(obj, (datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, BaseException):
+        return f"{obj.__class__.__name__}: {obj}"
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, bytes):
+        return obj.decode("utf-8", errors="replace")
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, type):
+        return obj.__name__
+    if obj.__class__.__name__ == "traceback":
+        return "".join(traceback.format_tb(obj)).strip()
+    try:
+        return str(obj)
+    except Exception:
+        return None
+
+
+_json_encode = json.JSONEncoder(default=_default, separators=(",", ":")).encode
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def _encode(obj: Any) -> str:
+        try:
+            return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS).decode()
+        except orjson.JSONEncodeError:
+            # e.g. integers wider than 64 bits
+            return _json_encode(obj)
+else:
+    _encode = _json_encode
+
+
+class FastJsonFormatter(logging.Formatter):
+    """
+    JSON formatter with a precomputed envelope.
+
+    Each line holds ``asctime``, ``levelname``, ``name``, the optional static
+    fields, ``message`` and any ``extra`` fields. When the message is a dict
+    its keys are merged into the record and ``message`` is empty, exactly as
+    with ``JsonFormatter``; keys naming an envelope field replace it.
+    """
+
+    def __init__(self, static_fields: Optional[Mapping[str, Any]] = None):
+        super().__init__()
+        self.static_fields = dict(static_fields or {})
+        self._static = "".join(f",{_encode(k)}:{_encode(v)}" for k, v in self.static_fields.items())
+        self._envelope_keys = frozenset({"asctime", "levelname", "name", *self.static_fields})
+        self._envelopes: Dict[Tuple[str, str], str] = {}
+        self._second: Tuple[int, str] = (-1, "")
+
+    def _envelope(self, levelname: str, name: str) -> str:
+        key = (levelname, name)
+        envelope = self._envelopes.get(key)
+        if envelope is None:
+            envelope = f'"levelname":{_encode(levelname)},"name":{_encode(name)}{self._static},'
+            self._envelopes[key] = envelope
+        return envelope
+
+    def _asctime(self, record: logging.LogRecord) -> str:
+        second = int(record.created)
+        cached_second, prefix = self._second
+        if second != cached_second:
+            prefix = time.strftime("%Y-%m-%d %H:%M:%S", self.converter(record.created))
+            self._second = (second, prefix)
+        return "%s,%03d" % (prefix, record.msecs)
+
+    def format(self, record: logging.LogRecord) -> str:
+        msg = record.msg
+        if isinstance(msg, dict):
+            fields = {"message": ""}
+            fields.update(msg)
+        else:
+            fields = {"message": record.getMessage()}
+
+        extras = record.__dict__.keys() - RESERVED_ATTRS
+        if extras:
+            attrs = record.__dict__
+            for key in extras:
+                fields[key] = attrs[key]
+
+        if record.exc_info and not fields.get("exc_info"):
+            fields["exc_info"] = self.formatException(record.exc_info)
+        if not fields.get("exc_info") and record.exc_text:
+            fields["exc_info"] = record.exc_text
+        if record.stack_info and not fields.get("stack_info"):
+            fields["stack_info"] = self.formatStack(record.stack_info)
+
+        if not self._envelope_keys.isdisjoint(fields):
+            # Overridden envelope fields; merge instead of emitting duplicate keys
+            merged = {"asctime": self._asctime(record), "levelname": record.levelname, "name": record.name}
+            merged.update(self.static_fields)
+            merged.update(fields)
+            return _encode(merged)
+
+        return (
+            '{"asctime":"' + self._asctime(record) + '",'
+            + self._envelope(record.levelname, record.name)
+            + _encode(fields)[1:]
+        )
@@ -0,0 +1,254 @@
+"""
+Log Queue
+
+This module moves log formatting and I/O off the event loop: the ``fastapi``
+logger only enqueues records, and a background writer thread formats them
+in batches and writes each batch to its handlers with one coalesced write.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+OVERFLOW_POLICIES = ("drop_debug", "block", "drop")
+
+# Fraction of the queue above which the ``drop_debug`` policy sheds DEBUG records
+DEBUG_HIGH_WATER = 0.75
+
+# Number of records formatted between voluntary GIL releases in the writer
+YIELD_EVERY = 8
+
+_STOP = object()
+
+
+class LogPipeline:
+    """
+    Bounded log queue drained by a background writer thread.
+
+    Overflow policies:
+        drop_debug: DEBUG records are dropped once the queue passes its
+            high-water mark; any record is dropped when the queue is full.
+        block: the logging call waits for room in the queue.
+        drop: records that do not fit are dropped.
+
+    Every drop is counted.
+    """
+
+    def __init__(
+        self,
+        handlers: List[logging.Handler],
+        maxsize: int = 10000,
+        overflow: str = "drop_debug",
+        batch_size: int = 256,
+    ):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown log queue overflow policy: {overflow}")
+        self.handlers = handlers
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.batch_size = batch_size
+        self._queue: "queue.Queue" = queue.Queue(maxsize)
+        self._debug_high_water = int(maxsize * DEBUG_HIGH_WATER)
+        self._thread: Optional[threading.Thread] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.written = 0
+        self.batches = 0
+        self.max_depth = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record for the writer, applying the overflow policy."""
+        if self.overflow == "block":
+            self._queue.put(record)
+        elif (
+            self.overflow == "drop_debug"
+            and record.levelno <= logging.DEBUG
+            and self._queue.qsize() >= self._debug_high_water
+        ):
+            self.dropped += 1
+            return
+        else:
+            try:
+                self._queue.put_nowait(record)
+            except queue.Full:
+                self.dropped += 1
+                return
+        self.enqueued += 1
+
+    def start(self) -> None:
+        """Start the background writer thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Write every queued record, then stop the writer thread."""
+        if self._thread is None:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self) -> Dict[str, int]:
+        """Return queue counters."""
+        return {
+            "queue_depth": self._queue.qsize(),
+            "queue_max_depth": self.max_depth,
+            "queue_size": self.maxsize,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "written": self.written,
+            "batches": self.batches,
+        }
+
+    def _run(self) -> None:
+        get = self._queue.get
+        get_nowait = self._queue.get_nowait
+        while True:
+            batch = [get()]
+            depth = self._queue.qsize() + 1
+            if depth > self.max_depth:
+                self.max_depth = depth
+            stopping = False
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(get_nowait())
+                except queue.Empty:
+                    break
+            if any(record is _STOP for record in batch):
+                batch = [record for record in batch if record is not _STOP]
+                stopping = True
+            if batch:
+                self._write(batch)
+            if stopping:
+                self._drain()
+                return
+
+    def _drain(self) -> None:
+        remaining = []
+        while True:
+            try:
+                record = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if record is not _STOP:
+                remaining.append(record)
+        if remaining:
+            self._write(remaining)
+
+    def _write(self, batch: List[logging.LogRecord]) -> None:
+        for handler in self.handlers:
+            records = [r for r in batch if r.levelno >= handler.level and handler.filter(r)]
+            if not records:
+                continue
+            if isinstance(handler, logging.StreamHandler):
+                self._write_stream(handler, records)
+            else:
+                for record in records:
+                    handler.handle(record)
+        self.written += len(batch)
+        self.batches += 1
+
+    @staticmethod
+    def _write_stream(handler: logging.StreamHandler, records: List[logging.LogRecord]) -> None:
+        """Format a batch and write it to a stream handler in one call."""
+        lines = []
+        for i, record in enumerate(records, 1):
+            try:
+                lines.append(handler.format(record) + handler.terminator)
+            except Exception:
+                handler.handleError(record)
+            if i % YIELD_EVERY == 0:
+                # Hand the GIL back so the event loop thread is not kept
+                # waiting for a whole switch interval while a batch formats.
+                time.sleep(0)
+        if not lines:
+            return
+        handler.acquire()
+        try:
+            if handler.stream is None:
+                # FileHandler opened with delay=True, or reopened after close
+                handler.stream = handler._open()
+            rollover = getattr(handler, "maybe_rollover", None)
+            if rollover is not None:
+                # Rotating handlers switch files before the batch is written
+                rollover()
+            handler.stream.write("".join(lines))
+            handler.flush()
+        except Exception:
+            handler.handleError(records[-1])
+        finally:
+            handler.release()
+
+
+class LogQueueHandler(logging.Handler):
+    """Handler that hands records to a ``LogPipeline`` without formatting them."""
+
+    def __init__(self, pipeline: LogPipeline):
+        super().__init__()
+        self.pipeline = pipeline
+
+    def handle(self, record: logging.LogRecord) -> bool:
+        # Skip the per-handler lock: the pipeline queue is already thread-safe.
+        if self.filter(record):
+            self.pipeline.enqueue(record)
+            return True
+        return False
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.pipeline.enqueue(record)
+
+
+_pipeline: Optional[LogPipeline] = None
+
+
+def start_log_pipeline(
+    logger: logging.Logger,
+    maxsize: int = 10000,
+    overflow: str = "drop_debug",
+    batch_size: int = 256,
+) -> LogPipeline:
+    """
+    Move the logger's handlers behind a queue and start the writer thread.
+
+    Args:
+        logger: Logger whose handlers should be served by the writer
+        maxsize: Maximum number of queued records
+        overflow: Overflow policy, one of ``OVERFLOW_POLICIES``
+        batch_size: Maximum number of records formatted per write
+
+    Returns:
+        The running pipeline
+    """
+    global _pipeline
+    if _pipeline is not None:
+        return _pipeline
+    pipeline = LogPipeline(logger.handlers[:], maxsize, overflow, batch_size)
+    pipeline.start()
+    logger.handlers = [LogQueueHandler(pipeline)]
+    _pipeline = pipeline
+    return pipeline
+
+
+def stop_log_pipeline(logger: logging.Logger) -> None:
+    """
+    Flush queued records and restore the logger's original handlers.
+
+    Args:
+        logger: Logger passed to ``start_log_pipeline``
+    """
+    global _pipeline
+    pipeline = _pipeline
+    if pipeline is None:
+        return
+    logger.handlers = pipeline.handlers
+    pipeline.stop()
+    _pipeline = None
+
+
+def get_log_pipeline() -> Optional[LogPipeline]:
+    """Return the running pipeline, if queue-based logging is active."""
+    return _pipeline
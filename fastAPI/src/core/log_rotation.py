@@ -0,0 +1,321 @@
+"""
+Log Rotation
+
+This module rotates the application log file by size and by time, and
+compresses rotated segments on a background thread so that neither request
+handling nor the log writer pays for gzip.
+
+Every worker appends to the same file. A rollover renames it under an
+exclusive ``flock`` on ``<file>.lock``; the other workers notice that the
+path now names a different file before their next write and reopen it. A
+rotated segment is named ``<file>.<UTC timestamp>`` and compressed to
+``<file>.<UTC timestamp>.gz`` through a ``.gz.tmp`` file, names Filebeat's
+``exclude_files: ['\\.gz$', '\\.tmp$']`` and ``*.log`` input skip. Retention
+keeps at most a number of segments and a total size, oldest removed first.
+"""
+
+import glob
+import gzip
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+# Seconds a rotated segment must go unwritten before it is compressed, so
+# a worker still holding it open can finish the batch it was writing
+COMPRESS_GRACE = 2.0
+
+# Seconds after which a leftover ``.gz.tmp`` is considered abandoned
+STALE_TMP_AGE = 60.0
+
+_STOP = object()
+
+
+@contextmanager
+def _exclusive(lock_path: str):
+    """Hold an exclusive lock shared by every process rotating the same file."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _is_segment(path: str) -> bool:
+    return not path.endswith((".tmp", ".lock"))
+
+
+class SegmentCompressor:
+    """
+    Background thread compressing rotated segments and enforcing retention.
+
+    Args:
+        filename: Path of the active log file
+        backup_count: Maximum number of rotated segments kept; 0 keeps all
+        max_total_bytes: Maximum total size of rotated segments; 0 disables it
+        compress: Whether segments are gzipped
+    """
+
+    def __init__(self, filename: str, backup_count: int = 0, max_total_bytes: int = 0, compress: bool = True):
+        self.filename = filename
+        self.lock_path = filename + ".lock"
+        self.backup_count = backup_count
+        self.max_total_bytes = max_total_bytes
+        self.compress = compress
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self.compressed = 0
+        self.removed = 0
+
+    def submit(self, segment: Optional[str] = None) -> None:
+        """Queue a segment for compression, or only a retention pass when None."""
+        self._ensure_started()
+        self._queue.put(segment)
+
+    def recover(self) -> None:
+        """Queue segments left uncompressed by a previous run."""
+        segments = self.segments()
+        pending = [path for path in segments if not path.endswith(".gz")] if self.compress else []
+        for segment in pending:
+            self.submit(segment)
+        if segments and not pending:
+            self.submit(None)
+
+    def stop(self, timeout: float = 0.0) -> None:
+        """Stop the thread; segments still queued are picked up by ``recover`` on the next start."""
+        thread = self._thread
+        if thread is None:
+            return
+        self._queue.put(_STOP)
+        thread.join(timeout)
+        self._thread = None
+
+    def segments(self) -> List[str]:
+        """Return the rotated segments, oldest first."""
+        paths = [p for p in glob.glob(glob.escape(self.filename) + ".*") if _is_segment(p)]
+        return sorted(paths, key=self._segment_order)
+
+    def _segment_order(self, path: str) -> Tuple[str, int]:
+        # <file>.<timestamp>[-<n>][.gz], where -<n> numbers rollovers within one second
+        stamp = path[len(self.filename) + 1:]
+        if stamp.endswith(".gz"):
+            stamp = stamp[:-3]
+        stamp, _, n = stamp.partition("-")
+        return stamp, int(n) if n.isdigit() else 0
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="log-compressor", daemon=True)
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            segment = self._queue.get()
+            if segment is _STOP:
+                return
+            try:
+                if segment is not None and self.compress:
+                    self._wait_quiet(segment)
+                    self._compress(segment)
+                self._prune()
+            except OSError as e:
+                logging.getLogger(__name__).warning("log segment maintenance failed: %s", e)
+
+    @staticmethod
+    def _wait_quiet(segment: str) -> None:
+        while True:
+            try:
+                idle = time.time() - os.stat(segment).st_mtime
+            except FileNotFoundError:
+                return
+            if idle >= COMPRESS_GRACE:
+                return
+            time.sleep(COMPRESS_GRACE - idle)
+
+    def _compress(self, segment: str) -> None:
+        tmp_path = segment + ".gz.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        except FileExistsError:
+            # Another worker is compressing it, unless it died doing so
+            if time.time() - os.stat(tmp_path).st_mtime < STALE_TMP_AGE:
+                return
+            os.remove(tmp_path)
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            with open(segment, "rb") as src, os.fdopen(fd, "wb") as raw, gzip.GzipFile(
+                filename=os.path.basename(segment), mode="wb", fileobj=raw, mtime=0
+            ) as dst:
+                shutil.copyfileobj(src, dst, 1024 * 1024)
+            os.replace(tmp_path, segment + ".gz")
+            os.remove(segment)
+        except FileNotFoundError:
+            # Compressed and removed by another worker in the meantime
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.compressed += 1
+
+    def _prune(self) -> None:
+        if not self.backup_count and not self.max_total_bytes:
+            return
+        with _exclusive(self.lock_path):
+            sizes: List[Tuple[str, int]] = []
+            for path in self.segments():
+                try:
+                    sizes.append((path, os.path.getsize(path)))
+                except FileNotFoundError:
+                    continue
+            excess = len(sizes) - self.backup_count if self.backup_count else 0
+            total = sum(size for _, size in sizes)
+            for path, size in sizes:
+                if excess <= 0 and (not self.max_total_bytes or total <= self.max_total_bytes):
+                    break
+                try:
+                    os.remove(path)
+                    self.removed += 1
+                except FileNotFoundError:
+                    pass
+                excess -= 1
+                total -= size
+
+
+class RotatingLogHandler(logging.FileHandler):
+    """
+    File handler rotating its file by size and time, safe across workers.
+
+    The file is opened on the first record. A rollover is due when the file
+    reaches ``max_bytes`` or when the wall clock enters a new ``interval``
+    period (aligned to the epoch, so daily rotation happens at midnight UTC)
+    and the file holds records from the previous one.
+
+    Args:
+        filename: Path of the log file
+        max_bytes: Size (in bytes) at which the file is rotated; 0 disables it
+        interval: Period (in seconds) after which the file is rotated; 0 disables it
+        backup_count: Maximum number of rotated segments kept; 0 keeps all
+        max_total_bytes: Maximum total size of rotated segments; 0 disables it
+        compress: Whether rotated segments are gzipped
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        max_bytes: int = 0,
+        interval: float = 0,
+        backup_count: int = 0,
+        max_total_bytes: int = 0,
+        compress: bool = True,
+        encoding: str = "utf-8",
+    ):
+        super().__init__(filename, encoding=encoding, delay=True)
+        self.compressor = SegmentCompressor(self.baseFilename)
+        self._file_id: Optional[Tuple[int, int]] = None
+        self._period = 0
+        self._recovered = False
+        self.rollovers = 0
+        self.configure(max_bytes, interval, backup_count, max_total_bytes, compress)
+
+    def configure(
+        self,
+        max_bytes: int = 0,
+        interval: float = 0,
+        backup_count: int = 0,
+        max_total_bytes: int = 0,
+        compress: bool = True,
+    ) -> None:
+        """Set the rotation and retention limits."""
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.compressor.backup_count = backup_count
+        self.compressor.max_total_bytes = max_total_bytes
+        self.compressor.compress = compress
+
+    def _period_of(self, timestamp: float) -> int:
+        return int(timestamp // self.interval) if self.interval > 0 else 0
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        stream = super()._open()
+        st = os.fstat(stream.fileno())
+        self._file_id = (st.st_dev, st.st_ino)
+        self._period = self._period_of(st.st_mtime if st.st_size else time.time())
+        if not self._recovered:
+            self._recovered = True
+            self.compressor.recover()
+        return stream
+
+    def _path_id(self) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(self.baseFilename)
+        except FileNotFoundError:
+            return None
+        return st.st_dev, st.st_ino
+
+    def maybe_rollover(self) -> None:
+        """
+        Rotate the file if due, or reopen it if another worker rotated it.
+
+        Called with the handler lock held, before each write.
+        """
+        stream = self.stream
+        if stream is None:
+            return
+        size = os.fstat(stream.fileno()).st_size
+        now = time.time()
+        due = (self.max_bytes > 0 and size >= self.max_bytes) or (
+            self.interval > 0 and size > 0 and self._period_of(now) != self._period
+        )
+        if not due and self._path_id() == self._file_id:
+            return
+        if due:
+            with _exclusive(self.compressor.lock_path):
+                # Another worker may have rotated it while we waited for the lock
+                if self._path_id() == self._file_id:
+                    segment = self._segment_name(now)
+                    os.rename(self.baseFilename, segment)
+                    self.rollovers += 1
+                    self.compressor.submit(segment)
+        self.stream = None
+        stream.close()
+        self.stream = self._open()
+
+    def _segment_name(self, now: float) -> str:
+        base = f"{self.baseFilename}.{time.strftime('%Y%m%dT%H%M%S', time.gmtime(now))}"
+        name, n = base, 0
+        while os.path.exists(name) or os.path.exists(name + ".gz"):
+            n += 1
+            name = f"{base}-{n}"
+        return name
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            self.maybe_rollover()
+        except OSError:
+            self.handleError(record)
+        super().emit(record)
+
+    def close(self) -> None:
+        self.compressor.stop()
+        super().close()
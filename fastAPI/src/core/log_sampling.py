@@ -0,0 +1,92 @@
+"""
+Log Sampling
+
+This module decides which request log records are written. Clean requests
+are sampled at a per-route rate; errors, slow requests and threat verdicts
+are always kept. With a budget, an adaptive factor lowers every rate while
+a worker writes more records per second than the budget allows, and raises
+it back as traffic falls.
+
+Every written record carries the rate it was sampled at (1.0 for records
+that are always kept), so downstream counts can be reweighted by
+``1 / sample_rate``. Dropped records are still counted in
+``log_records_total``.
+"""
+
+import time
+from typing import Callable, Mapping, Optional
+
+from .metrics import LOG_RECORDS, LOG_SAMPLE_FACTOR
+
+# Lowest factor adaptive sampling goes down to
+MIN_SAMPLE_FACTOR = 0.001
+
+# Length in seconds of the window records per second are measured over
+BUDGET_WINDOW = 1.0
+
+
+class LogSampler:
+    """
+    Per-route sample rates with an optional records-per-second budget.
+
+    Rates in ``routes`` apply to paths starting with their key; the longest
+    matching prefix wins over ``rate``. The budget is per worker process.
+    """
+
+    def __init__(
+        self,
+        rate: float = 1.0,
+        routes: Optional[Mapping[str, float]] = None,
+        budget: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.clock = clock
+        self.factor = 1.0
+        self._window_start = clock()
+        self._window_records = 0
+        self.configure(rate, routes, budget)
+
+    def configure(self, rate: float, routes: Optional[Mapping[str, float]] = None, budget: float = 0.0) -> None:
+        """Replace the rates and the budget; a budget of 0 disables adaptive sampling."""
+        self.rate = rate
+        # Longest prefix first, so the first match is the most specific
+        self.routes = sorted((routes or {}).items(), key=lambda item: -len(item[0]))
+        self.budget = budget
+        if budget <= 0:
+            self.factor = 1.0
+            LOG_SAMPLE_FACTOR.set((), 1.0)
+
+    def rate_for(self, path: str) -> float:
+        """Return the current sample rate for a request to ``path``."""
+        rate = self.rate
+        for prefix, route_rate in self.routes:
+            if path.startswith(prefix):
+                rate = route_rate
+                break
+        return rate * self.factor
+
+    def record(self, record_type: str, emitted: bool) -> None:
+        """
+        Count one record, written or dropped, and adapt the factor.
+
+        Args:
+            record_type: Record ``type`` field, such as ``request_completed``
+            emitted: Whether the record was written
+        """
+        LOG_RECORDS.inc((record_type, "emitted" if emitted else "sampled_out"))
+        if self.budget <= 0:
+            return
+        if emitted:
+            self._window_records += 1
+        now = self.clock()
+        elapsed = now - self._window_start
+        if elapsed >= BUDGET_WINDOW:
+            observed = self._window_records / elapsed
+            if observed > 0:
+                factor = self.factor * self.budget / observed
+            else:
+                factor = 1.0
+            self.factor = min(1.0, max(MIN_SAMPLE_FACTOR, factor))
+            LOG_SAMPLE_FACTOR.set((), self.factor)
+            self._window_start = now
+            self._window_records = 0
@@ -1,29 +1,31 @@
 import logging
 import os
-from pythonjsonlogger import jsonlogger
+from .log_formatter import FastJsonFormatter
+from .log_rotation import RotatingLogHandler
 
-# Ensure the logs directory exists
 LOG_DIR = os.path.join(os.getcwd(), "logs")
-if not os.path.exists(LOG_DIR):
-    os.makedirs(LOG_DIR)
 
 # Create a logger
 logger = logging.getLogger("fastapi")
 logger.setLevel(logging.INFO)
 
-# File handler to write logs to logs/app.log
-file_handler = logging.FileHandler(os.path.join(LOG_DIR, "app.log"))
+# File handler to write logs to logs/app.log. It is attached by
+# configure_file_logging() at startup, not here, so importing the application
+# writes nothing to disk. These limits match the LOG_ROTATE_* /
+# LOG_RETENTION_* defaults.
+file_handler = RotatingLogHandler(
+    os.path.join(LOG_DIR, "app.log"),
+    max_bytes=100 * 1024 * 1024,
+    interval=86400,
+    backup_count=14,
+    max_total_bytes=1024 * 1024 * 1024,
+)
 file_handler.setLevel(logging.INFO)
 
 # JSON formatter for logs
-json_formatter = jsonlogger.JsonFormatter(
-    '%(asctime)s %(levelname)s %(name)s %(message)s'
-)
+json_formatter = FastJsonFormatter()
 file_handler.setFormatter(json_formatter)
 
-# Add the file handler to the logger
-logger.addHandler(file_handler)
-
 # Console handler for debugging
 console_handler = logging.StreamHandler()
 console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
@@ -31,3 +33,25 @@ logger.addHandler(console_handler)
 
 # Prevent propagation to root logger
 logger.propagate = False
+
+
+def configure_file_logging(settings) -> None:
+    """
+    Apply the rotation and retention settings and start writing logs/app.log.
+
+    Records logged before this go to the console only. Calling it again,
+    e.g. in a worker forked from a master that already did, changes the
+    limits without adding the handler twice.
+
+    Args:
+        settings: Application settings
+    """
+    file_handler.configure(
+        max_bytes=settings.LOG_ROTATE_MAX_BYTES,
+        interval=settings.LOG_ROTATE_INTERVAL,
+        backup_count=settings.LOG_RETENTION_COUNT,
+        max_total_bytes=settings.LOG_RETENTION_MAX_BYTES,
+        compress=settings.LOG_COMPRESS,
+    )
+    if file_handler not in logger.handlers:
+        logger.addHandler(file_handler)
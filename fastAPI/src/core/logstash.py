@@ -0,0 +1,382 @@
+"""
+Logstash Shipper
+
+This module ships log records straight to the Logstash ``json_lines`` TCP
+input, bypassing the ``logs/app.log`` -> Filebeat hop. Records are batched
+over a persistent connection; while Logstash is unreachable they are
+spooled to a local append-only file and replayed once it comes back.
+Delivery is at-least-once: a batch interrupted mid-send is spooled and may
+be sent twice.
+
+Every worker appends to the same spool under an exclusive ``flock`` on
+``<spool>.lock``. A worker replays it by renaming it, under the same lock,
+to ``<spool>.<pid>.replay`` first, so records appended meanwhile go to a
+new spool instead of being removed with the replayed one, and no two
+workers send the same file. Replay files left by a worker that exited
+mid-replay are adopted by the next worker that replays.
+"""
+
+import glob
+import logging
+import os
+import select
+import socket
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from .log_formatter import FastJsonFormatter
+
+RECONNECT_MIN_DELAY = 0.1
+REPLAY_CHUNK_SIZE = 1024 * 1024
+
+
+@contextmanager
+def _exclusive(lock_path: str):
+    """Hold an exclusive lock shared by every process spooling to the same file."""
+    if fcntl is None:
+        yield
+        return
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class LogstashShipper:
+    """
+    Background sender for ``json_lines`` records.
+
+    Memory is bounded by ``buffer_size`` records and the spool by
+    ``spool_max_bytes``; records that fit in neither are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        batch_size: int = 500,
+        flush_interval: float = 0.5,
+        buffer_size: int = 10000,
+        spool_path: Optional[str] = None,
+        spool_max_bytes: int = 256 * 1024 * 1024,
+        reconnect_max_delay: float = 30.0,
+        connect_timeout: float = 2.0,
+    ):
+        self.host = host
+        self.port = port
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.buffer_size = buffer_size
+        self.spool_path = spool_path
+        self.spool_max_bytes = spool_max_bytes
+        self.reconnect_max_delay = reconnect_max_delay
+        self.connect_timeout = connect_timeout
+        self._buffer: Deque[bytes] = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._sock: Optional[socket.socket] = None
+        self._reconnect_delay = RECONNECT_MIN_DELAY
+        self._next_connect = 0.0
+        self._adopt_orphans = True
+        self.shipped = 0
+        self.batches = 0
+        self.spooled = 0
+        self.replayed_bytes = 0
+        self.dropped = 0
+        self.connects = 0
+        self.send_errors = 0
+
+    def submit(self, line: bytes) -> bool:
+        """
+        Queue one newline-terminated JSON record for shipping.
+
+        Returns:
+            False if the record was dropped because the buffer is full
+        """
+        with self._cond:
+            if len(self._buffer) >= self.buffer_size:
+                self.dropped += 1
+                return False
+            self._buffer.append(line)
+            if len(self._buffer) >= self.batch_size:
+                self._cond.notify()
+        return True
+
+    def start(self) -> None:
+        """Start the shipper thread."""
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="logstash-shipper", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Ship or spool everything buffered, then close the connection."""
+        if self._thread is None:
+            return
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+        self._thread = None
+
+    @property
+    def connected(self) -> bool:
+        """Whether a connection to Logstash is currently open."""
+        return self._sock is not None
+
+    def stats(self) -> Dict[str, int]:
+        """Return shipper counters."""
+        return {
+            "buffered": len(self._buffer),
+            "shipped": self.shipped,
+            "batches": self.batches,
+            "spooled": self.spooled,
+            "spool_bytes": self._spool_size(),
+            "replayed_bytes": self.replayed_bytes,
+            "dropped": self.dropped,
+            "connects": self.connects,
+            "send_errors": self.send_errors,
+        }
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                if not self._stopping and len(self._buffer) < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                batch = [self._buffer.popleft() for _ in range(min(self.batch_size, len(self._buffer)))]
+                stopping = self._stopping and not self._buffer
+            if batch or self._spool_size():
+                self._ship(batch, retry=not stopping)
+            if stopping:
+                self._disconnect()
+                return
+
+    def _ship(self, batch: List[bytes], retry: bool = True) -> None:
+        if not self._connect(force=not retry):
+            self._spool(batch)
+            return
+        try:
+            self._replay_spool()
+            if batch:
+                self._sock.sendall(b"".join(batch))
+                self.shipped += len(batch)
+                self.batches += 1
+        except OSError:
+            self.send_errors += 1
+            self._disconnect()
+            self._spool(batch)
+
+    def _connect(self, force: bool = False) -> bool:
+        if self._sock is not None and self._peer_open():
+            return True
+        self._disconnect()
+        now = time.monotonic()
+        if now < self._next_connect and not force:
+            return False
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        except OSError:
+            self._next_connect = now + self._reconnect_delay
+            self._reconnect_delay = min(self._reconnect_delay * 2, self.reconnect_max_delay)
+            return False
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        self._sock = sock
+        self._reconnect_delay = RECONNECT_MIN_DELAY
+        self.connects += 1
+        return True
+
+    def _peer_open(self) -> bool:
+        """Detect a connection Logstash has closed before writing into it."""
+        try:
+            readable, _, _ = select.select([self._sock], [], [], 0)
+            return not readable or self._sock.recv(1, socket.MSG_PEEK) != b""
+        except OSError:
+            return False
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    @property
+    def _replay_path(self) -> str:
+        # Resolved at use, as the application may fork after creating the shipper
+        return f"{self.spool_path}.{os.getpid()}.replay"
+
+    def _spool_size(self) -> int:
+        """Size of the shared spool plus this worker's unfinished replay."""
+        if not self.spool_path:
+            return 0
+        size = 0
+        for path in (self.spool_path, self._replay_path):
+            try:
+                size += os.path.getsize(path)
+            except OSError:
+                pass
+        return size
+
+    def _spool(self, batch: List[bytes]) -> None:
+        if not batch:
+            return
+        data = b"".join(batch)
+        if not self.spool_path or self._spool_size() + len(data) > self.spool_max_bytes:
+            self.dropped += len(batch)
+            return
+        try:
+            with _exclusive(self.spool_path + ".lock"), open(self.spool_path, "ab") as spool:
+                spool.write(data)
+        except OSError:
+            self.dropped += len(batch)
+            return
+        self.spooled += len(batch)
+
+    def _claim_spool(self) -> bool:
+        """
+        Make this worker's replay file hold the next spooled records to send.
+
+        Returns:
+            False if nothing is spooled
+        """
+        replay_path = self._replay_path
+        if os.path.exists(replay_path):
+            # A replay interrupted by a send error; finish it first
+            return True
+        candidates = []
+        if self._adopt_orphans:
+            self._adopt_orphans = False
+            for path in sorted(glob.glob(glob.escape(self.spool_path) + ".*.replay")):
+                pid = path[len(self.spool_path) + 1:-len(".replay")]
+                if pid.isdigit() and not _pid_alive(int(pid)):
+                    candidates.append(path)
+        candidates.append(self.spool_path)
+        candidates = [path for path in candidates if os.path.exists(path)]
+        if not candidates:
+            return False
+        with _exclusive(self.spool_path + ".lock"):
+            for path in candidates:
+                try:
+                    os.rename(path, replay_path)
+                except FileNotFoundError:
+                    continue
+                # Orphans are adopted one per replay; look for more next time
+                self._adopt_orphans = path != self.spool_path
+                return True
+        return False
+
+    def _replay_spool(self) -> None:
+        """Send the spool ahead of new records; a replay file is removed only once fully sent."""
+        if not self.spool_path or (not self._adopt_orphans and not self._spool_size()):
+            return
+        if not self._claim_spool():
+            return
+        with open(self._replay_path, "rb") as spool:
+            while True:
+                chunk = spool.read(REPLAY_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._sock.sendall(chunk)
+                self.replayed_bytes += len(chunk)
+        os.remove(self._replay_path)
+
+
+class LogstashHandler(logging.Handler):
+    """Handler that formats records as JSON lines and hands them to a shipper."""
+
+    def __init__(self, shipper: LogstashShipper):
+        super().__init__()
+        self.shipper = shipper
+
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            line = (self.format(record) + "\n").encode("utf-8")
+        except Exception:
+            self.handleError(record)
+            return
+        self.shipper.submit(line)
+
+
+_handler: Optional[LogstashHandler] = None
+
+
+def start_logstash_shipper(logger: logging.Logger, settings) -> LogstashShipper:
+    """
+    Attach a Logstash handler to ``logger`` and start its shipper.
+
+    Records carry the ``service`` and ``environment`` fields that Filebeat
+    adds on the file path, so they land in the same index.
+
+    Args:
+        logger: Logger to ship records from
+        settings: Application settings
+
+    Returns:
+        The running shipper
+    """
+    global _handler
+    if _handler is not None:
+        return _handler.shipper
+    shipper = LogstashShipper(
+        settings.LOGSTASH_HOST,
+        settings.LOGSTASH_PORT,
+        batch_size=settings.LOGSTASH_BATCH_SIZE,
+        flush_interval=settings.LOGSTASH_FLUSH_INTERVAL,
+        buffer_size=settings.LOGSTASH_BUFFER_SIZE,
+        spool_path=settings.LOGSTASH_SPOOL_PATH,
+        spool_max_bytes=settings.LOGSTASH_SPOOL_MAX_BYTES,
+        reconnect_max_delay=settings.LOGSTASH_RECONNECT_MAX_DELAY,
+    )
+    handler = LogstashHandler(shipper)
+    handler.setLevel(logger.level)
+    handler.setFormatter(FastJsonFormatter(
+        static_fields={"service": settings.SERVICE_NAME, "environment": settings.ENVIRONMENT},
+    ))
+    shipper.start()
+    logger.addHandler(handler)
+    _handler = handler
+    return shipper
+
+
+def stop_logstash_shipper(logger: logging.Logger) -> None:
+    """
+    Detach the Logstash handler and flush its shipper.
+
+    Args:
+        logger: Logger passed to ``start_logstash_shipper``
+    """
+    global _handler
+    handler = _handler
+    if handler is None:
+        return
+    logger.removeHandler(handler)
+    handler.shipper.stop()
+    _handler = None
+
+
+def get_logstash_shipper() -> Optional[LogstashShipper]:
+    """Return the running shipper, if direct shipping is enabled."""
+    return _handler.shipper if _handler is not None else None
@@ -0,0 +1,538 @@
+"""
+Metrics
+
+This module provides an in-process metrics registry rendered in the
+Prometheus text format: fixed-bucket latency histograms, counters and
+gauges, plus collectors for event-loop lag and process resources.
+
+Recording is a dictionary lookup and a few integer updates on the event loop
+thread, cheap enough to stay on for every request. With several workers,
+each one periodically writes its snapshot to ``METRICS_DIR`` and the worker
+serving ``/metrics`` merges them: counters and histograms are summed
+(including those of workers that have since exited, so totals never go
+backwards) and gauges are reported per live worker with a ``pid`` label.
+Snapshots of exited workers are folded into one ``retired.json`` file the
+first time a scrape finds them and then deleted, so the directory holds one
+file per live worker however often workers are recycled.
+"""
+
+import asyncio
+import glob
+import json
+import os
+import tempfile
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .logger import logger
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+Labels = Tuple[str, ...]
+
+# Request latency buckets, in seconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Counters and histograms of exited workers, and the lock serializing updates to it
+RETIRED_SNAPSHOT = "retired.json"
+RETIRED_LOCK = "retired.lock"
+
+
+class Counter:
+    """Monotonic value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values: Dict[Labels, float] = {}
+
+    def inc(self, labels: Labels = (), amount: float = 1.0) -> None:
+        values = self.values
+        values[labels] = values.get(labels, 0.0) + amount
+
+    def set(self, labels: Labels, value: float) -> None:
+        """Mirror a total maintained elsewhere, such as CPU time from the OS."""
+        self.values[labels] = value
+
+    def dump(self) -> list:
+        return [[list(labels), value] for labels, value in self.values.items()]
+
+
+class Gauge(Counter):
+    """Point-in-time value per label set."""
+
+    kind = "gauge"
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram per label set.
+
+    Buckets are stored non-cumulatively as ``[count per bound..., +Inf
+    count, sum]`` and made cumulative only when rendered.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.bounds = tuple(sorted(buckets))
+        self.values: Dict[Labels, List[float]] = {}
+
+    def observe(self, labels: Labels, value: float) -> None:
+        data = self.values.get(labels)
+        if data is None:
+            data = self.values[labels] = [0] * (len(self.bounds) + 1) + [0.0]
+        data[bisect_left(self.bounds, value)] += 1
+        data[-1] += value
+
+    def dump(self) -> list:
+        return [[list(labels), list(data)] for labels, data in self.values.items()]
+
+
+class MetricsRegistry:
+    """Named collection of metrics that can be snapshotted and rendered."""
+
+    def __init__(self):
+        self.metrics: Dict[str, object] = {}
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def _register(self, metric):
+        if metric.name in self.metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self.metrics[metric.name] = metric
+        return metric
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable copy of every metric."""
+        snapshot = {}
+        for name, metric in self.metrics.items():
+            entry = {
+                "kind": metric.kind,
+                "help": metric.documentation,
+                "labelnames": list(metric.labelnames),
+                "values": metric.dump(),
+            }
+            if metric.kind == "histogram":
+                entry["buckets"] = list(metric.bounds)
+            snapshot[name] = entry
+        return snapshot
+
+
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template and status class.",
+    ("method", "route", "status"),
+)
+SECURITY_VERDICTS = REGISTRY.counter(
+    "security_verdicts_total",
+    "Security check verdicts by threat level.",
+    ("threat_level",),
+)
+BODY_SCANS = REGISTRY.counter(
+    "body_scans_total",
+    "Security check body scans by where they ran (inline or offloaded) and outcome.",
+    ("mode", "outcome"),
+)
+API_KEY_LOOKUPS = REGISTRY.counter(
+    "api_key_lookups_total",
+    "API key lookups by key label and outcome.",
+    ("key", "outcome"),
+)
+EVENT_LOOP_LAG = REGISTRY.gauge(
+    "event_loop_lag_seconds",
+    "How late the last event loop lag probe woke up.",
+)
+ADMISSION_SHED = REGISTRY.counter(
+    "admission_shed_total",
+    "Requests rejected with 503 by admission control, by router, priority class and reason.",
+    ("router", "priority", "reason"),
+)
+ADMISSION_QUEUE_TIME = REGISTRY.histogram(
+    "admission_queue_seconds",
+    "Time requests waited for an admission slot, by router.",
+    ("router",),
+)
+ADMISSION_IN_FLIGHT = REGISTRY.gauge(
+    "admission_in_flight",
+    "Requests being worked on, by router.",
+    ("router",),
+)
+LOG_RECORDS = REGISTRY.counter(
+    "log_records_total",
+    "Request log records by type and sampling outcome.",
+    ("type", "outcome"),
+)
+LOG_SAMPLE_FACTOR = REGISTRY.gauge(
+    "log_sample_factor",
+    "Multiplier applied to request log sample rates by adaptive sampling.",
+)
+PROCESS_RESIDENT_MEMORY = REGISTRY.gauge(
+    "process_resident_memory_bytes",
+    "Resident memory size in bytes.",
+)
+PROCESS_OPEN_FDS = REGISTRY.gauge(
+    "process_open_fds",
+    "Number of open file descriptors.",
+)
+PROCESS_CPU_SECONDS = REGISTRY.counter(
+    "process_cpu_seconds_total",
+    "Total user and system CPU time spent in seconds.",
+)
+
+_process = None
+
+
+def collect_process_metrics() -> None:
+    """Refresh the RSS, open FD and CPU time metrics for this process."""
+    # Imported on first use; it is not needed to import or start the application
+    import psutil
+
+    global _process
+    if _process is None or _process.pid != os.getpid():
+        _process = psutil.Process()
+    with _process.oneshot():
+        PROCESS_RESIDENT_MEMORY.set((), _process.memory_info().rss)
+        cpu = _process.cpu_times()
+        PROCESS_CPU_SECONDS.set((), cpu.user + cpu.system)
+        try:
+            PROCESS_OPEN_FDS.set((), _process.num_fds())
+        except (AttributeError, psutil.Error):  # pragma: no cover - not available on Windows
+            pass
+
+
+async def monitor_event_loop(interval: float = 0.5) -> None:
+    """
+    Measure event-loop lag: how much later than scheduled a sleep resumes.
+
+    Args:
+        interval: Seconds between probes
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        scheduled = loop.time() + interval
+        await asyncio.sleep(interval)
+        EVENT_LOOP_LAG.set((), max(0.0, loop.time() - scheduled))
+
+
+def _process_token(pid: int) -> Optional[int]:
+    """Start time of process ``pid`` in hundredths of a second, or None if it does not exist."""
+    import psutil
+
+    try:
+        return round(psutil.Process(pid).create_time() * 100)
+    except psutil.Error:
+        return None
+
+
+_own_snapshot: Tuple[int, str] = (-1, "")
+
+
+def _snapshot_name() -> str:
+    """
+    File name of this worker's snapshot: ``<pid>-<start time>.json``.
+
+    The start time tells a worker from an earlier one that had the same pid,
+    so a reused pid never overwrites the counters of an exited worker.
+    """
+    global _own_snapshot
+    pid = os.getpid()
+    if _own_snapshot[0] != pid:
+        _own_snapshot = (pid, f"{pid}-{_process_token(pid)}.json")
+    return _own_snapshot[1]
+
+
+def _write_json(directory: str, name: str, data: dict) -> None:
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            json.dump(data, tmp, separators=(",", ":"))
+        os.replace(tmp_path, os.path.join(directory, name))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_snapshot(directory: str, snapshot: Optional[dict] = None) -> None:
+    """
+    Atomically write this worker's snapshot to ``directory/<pid>-<start time>.json``.
+
+    Args:
+        directory: Directory shared by the workers
+        snapshot: Snapshot to write; defaults to the current registry
+    """
+    if snapshot is None:
+        snapshot = REGISTRY.snapshot()
+    _write_json(directory, _snapshot_name(), snapshot)
+
+
+async def flush_snapshots(directory: str, interval: float) -> None:
+    """
+    Write this worker's snapshot every ``interval`` seconds.
+
+    Args:
+        directory: Directory shared by the workers
+        interval: Seconds between writes
+    """
+    while True:
+        await asyncio.sleep(interval)
+        collect_process_metrics()
+        # Snapshot on the loop thread, which is the one recording; write off it
+        snapshot = REGISTRY.snapshot()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, write_snapshot, directory, snapshot)
+        except OSError as e:
+            logger.warning({"type": "metrics_flush_failed", "directory": directory, "error": str(e)})
+
+
+def clear_snapshots(directory: str) -> None:
+    """Remove snapshots left by a previous run; called by the launcher before forking."""
+    for path in glob.glob(os.path.join(directory, "*.json")):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _load(path: str) -> Optional[dict]:
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _read_snapshots(directory: str) -> Tuple[List[Tuple[int, dict]], Optional[dict]]:
+    """
+    Read the snapshots of the other live workers and the retired totals.
+
+    Snapshots of workers that have exited are folded into the retired
+    totals first (see ``retire_snapshots``).
+
+    Returns:
+        ``(pid, snapshot)`` pairs of live workers, and the retired snapshot if any
+    """
+    own = _snapshot_name()
+    live, dead = [], []
+    for path in glob.glob(os.path.join(directory, "*-*.json")):
+        name = os.path.basename(path)
+        if name == own:
+            continue
+        pid, _, token = name[:-5].partition("-")
+        try:
+            pid, token = int(pid), int(token)
+        except ValueError:
+            continue
+        (live if _process_token(pid) == token else dead).append((pid, path))
+    if dead:
+        retire_snapshots(directory, [path for _, path in dead])
+    snapshots = []
+    for pid, path in live:
+        snapshot = _load(path)
+        if snapshot is not None:
+            snapshots.append((pid, snapshot))
+    return snapshots, _load(os.path.join(directory, RETIRED_SNAPSHOT))
+
+
+def retire_snapshots(directory: str, paths: Sequence[str]) -> None:
+    """
+    Fold the snapshots of exited workers into ``retired.json`` and delete them.
+
+    Gauges are dropped; counters and histograms are added to the retired
+    totals. Workers scraped at the same time take turns on a file lock, and
+    each snapshot is read again under the lock, so one folded by another
+    worker meanwhile is not counted twice.
+
+    Args:
+        directory: Directory shared by the workers
+        paths: Snapshot files of exited workers
+    """
+    with open(os.path.join(directory, RETIRED_LOCK), "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        retired_path = os.path.join(directory, RETIRED_SNAPSHOT)
+        snapshots = []
+        retired = _load(retired_path)
+        if retired is not None:
+            snapshots.append((0, retired))
+        folded = []
+        for path in paths:
+            snapshot = _load(path)
+            if snapshot is not None:
+                snapshots.append((0, snapshot))
+                folded.append(path)
+        if not folded:
+            return
+        merged = merge_snapshots(snapshots)
+        _write_json(directory, RETIRED_SNAPSHOT, {
+            name: entry for name, entry in merged.items() if entry["kind"] != "gauge"
+        })
+        for path in folded:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+def merge_snapshots(snapshots: Iterable[Tuple[int, dict]], live_pids: Optional[set] = None) -> dict:
+    """
+    Merge per-worker snapshots into one.
+
+    Counters and histograms are summed; gauges get a ``pid`` label and are
+    kept only for ``live_pids`` when it is given.
+
+    Args:
+        snapshots: ``(pid, snapshot)`` pairs
+        live_pids: Workers whose gauges are still meaningful
+
+    Returns:
+        A snapshot in the format of ``MetricsRegistry.snapshot``
+    """
+    merged: Dict[str, dict] = {}
+    sums: Dict[str, Dict[Labels, object]] = {}
+    for pid, snapshot in snapshots:
+        for name, entry in snapshot.items():
+            if name not in merged:
+                merged[name] = {key: value for key, value in entry.items() if key != "values"}
+                if entry["kind"] == "gauge":
+                    merged[name]["labelnames"] = entry["labelnames"] + ["pid"]
+                sums[name] = {}
+            values = sums[name]
+            if entry["kind"] == "gauge":
+                if live_pids is None or pid in live_pids:
+                    for labels, value in entry["values"]:
+                        values[tuple(labels) + (str(pid),)] = value
+            elif entry["kind"] == "histogram":
+                for labels, data in entry["values"]:
+                    key = tuple(labels)
+                    total = values.get(key)
+                    values[key] = list(data) if total is None else [a + b for a, b in zip(total, data)]
+            else:
+                for labels, value in entry["values"]:
+                    key = tuple(labels)
+                    values[key] = values.get(key, 0.0) + value
+    for name, entry in merged.items():
+        entry["values"] = [[list(labels), value] for labels, value in sums[name].items()]
+    return merged
+
+
+def collect(directory: Optional[str] = None, registry: MetricsRegistry = REGISTRY) -> dict:
+    """
+    Snapshot this worker and, with a shared directory, merge in the others.
+
+    Args:
+        directory: Directory shared by the workers, if any
+
+    Returns:
+        A snapshot ready for ``render``
+    """
+    collect_process_metrics()
+    snapshot = registry.snapshot()
+    if not directory:
+        return snapshot
+    return merge_worker_snapshots(directory, snapshot)
+
+
+def merge_worker_snapshots(directory: str, snapshot: dict) -> dict:
+    """
+    Merge this worker's snapshot with those of the other workers.
+
+    Reads files only, so it can run off the event loop once ``snapshot``
+    has been taken on it.
+
+    Args:
+        directory: Directory shared by the workers
+        snapshot: This worker's snapshot
+
+    Returns:
+        A snapshot ready for ``render``
+    """
+    snapshots, retired = _read_snapshots(directory)
+    live_pids = {pid for pid, _ in snapshots}
+    live_pids.add(os.getpid())
+    snapshots.insert(0, (os.getpid(), snapshot))
+    if retired is not None:
+        snapshots.append((0, retired))
+    return merge_snapshots(snapshots, live_pids)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], labels: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, labels)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+def render(snapshot: dict) -> str:
+    """
+    Render a snapshot in the Prometheus text exposition format.
+
+    Args:
+        snapshot: Output of ``collect`` or ``MetricsRegistry.snapshot``
+
+    Returns:
+        The exposition text
+    """
+    lines = []
+    for name, entry in snapshot.items():
+        kind = entry["kind"]
+        labelnames = entry["labelnames"]
+        lines.append(f"# HELP {name} {entry['help']}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in entry["values"]:
+            if kind != "histogram":
+                lines.append(f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}")
+                continue
+            cumulative = 0
+            for bound, count in zip(entry["buckets"] + ["+Inf"], value[:-1]):
+                cumulative += count
+                le = 'le="+Inf"' if bound == "+Inf" else f'le="{bound}"'
+                lines.append(f"{name}_bucket{_format_labels(labelnames, labels, le)} {cumulative}")
+            lines.append(f"{name}_sum{_format_labels(labelnames, labels)} {_format_value(value[-1])}")
+            lines.append(f"{name}_count{_format_labels(labelnames, labels)} {cumulative}")
+    lines.append("")
+    return "\n".join(lines)
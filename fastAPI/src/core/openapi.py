@@ -0,0 +1,130 @@
+"""
+OpenAPI Schema
+
+This module serves the OpenAPI schema as pre-encoded bytes and lets it be
+generated ahead of time, so neither the first ``/docs`` visit nor a worker
+start pays for building it.
+
+Build the schema into a file, e.g. while building the image:
+    EXPRESS_API_KEY=build python -m src.core.openapi openapi.json
+
+and point ``OPENAPI_SCHEMA_FILE`` at it. The file is read on the first
+request for the schema. It is ignored, and the schema generated instead,
+when it was written for another application version or title, or for
+another set of routes, e.g. by a build whose settings enabled other
+routers than the running application's.
+"""
+
+import json
+import sys
+from typing import Optional, Set, Tuple
+
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from .logger import logger
+
+
+def encode_schema(schema: dict) -> bytes:
+    """Serialize a schema exactly as ``JSONResponse`` renders it."""
+    return json.dumps(schema, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def _schema_operations(schema: dict) -> Set[Tuple[str, str]]:
+    return {(path, method) for path, item in schema.get("paths", {}).items() for method in item}
+
+
+def _app_operations(app: FastAPI) -> Set[Tuple[str, str]]:
+    return {
+        (route.path_format, method.lower())
+        for route in app.routes
+        if isinstance(route, APIRoute) and route.include_in_schema
+        for method in route.methods
+    }
+
+
+def _load_schema_file(app: FastAPI, path: str) -> Optional[bytes]:
+    try:
+        with open(path, "rb") as f:
+            body = f.read()
+        schema = json.loads(body)
+    except (OSError, ValueError) as e:
+        logger.warning({"type": "openapi_schema_unavailable", "path": path, "error": str(e)})
+        return None
+    info = schema.get("info", {})
+    if info.get("version") != app.version or info.get("title") != app.title:
+        logger.warning({
+            "type": "openapi_schema_stale",
+            "path": path,
+            "schema_version": info.get("version"),
+            "app_version": app.version,
+        })
+        return None
+    operations = _schema_operations(schema)
+    expected = _app_operations(app)
+    if operations != expected:
+        logger.warning({
+            "type": "openapi_schema_stale",
+            "path": path,
+            "missing_routes": sorted(f"{method.upper()} {route}" for route, method in expected - operations),
+            "extra_routes": sorted(f"{method.upper()} {route}" for route, method in operations - expected),
+        })
+        return None
+    app.openapi_schema = schema
+    return body
+
+
+def install_cached_openapi(app: FastAPI, schema_file: Optional[str] = None) -> None:
+    """
+    Serve ``app.openapi_url`` from bytes encoded once.
+
+    On the first request the schema is read from ``schema_file`` when it
+    was built for this version and these routes of the application, and is
+    otherwise generated and encoded. Requests under a ``root_path`` get the
+    schema with their server URL added, as FastAPI serves it.
+
+    Args:
+        app: Application whose schema route is replaced
+        schema_file: Optional pre-built schema
+    """
+    if not app.openapi_url:
+        return
+    body: Optional[bytes] = None
+
+    async def openapi(request: Request) -> Response:
+        nonlocal body, schema_file
+        if schema_file:
+            # Routes included after this call are part of the comparison
+            body = _load_schema_file(app, schema_file)
+            schema_file = None
+        root_path = request.scope.get("root_path", "").rstrip("/")
+        if root_path and app.root_path_in_servers:
+            schema = app.openapi()
+            if root_path not in {server.get("url") for server in schema.get("servers", [])}:
+                schema = dict(schema)
+                schema["servers"] = [{"url": root_path}] + schema.get("servers", [])
+                return JSONResponse(schema)
+        if body is None:
+            body = encode_schema(app.openapi())
+        return Response(body, media_type="application/json")
+
+    routes = app.router.routes
+    for index, route in enumerate(routes):
+        if isinstance(route, Route) and route.path == app.openapi_url:
+            routes[index] = Route(app.openapi_url, openapi, include_in_schema=False)
+            return
+
+
+def build_schema(path: str) -> None:
+    """Write the schema of ``src.main.app`` to ``path``."""
+    from src.main import app
+
+    with open(path, "wb") as f:
+        f.write(encode_schema(app.openapi()))
+
+
+if __name__ == "__main__":
+    build_schema(sys.argv[1] if len(sys.argv) > 1 else "openapi.json")
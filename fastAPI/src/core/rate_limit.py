@@ -0,0 +1,306 @@
+"""
+Rate Limiting
+
+This module provides an in-process rate limiter used as a FastAPI dependency.
+Limits are enforced with a token bucket or a sliding window counter; per-key
+state lives either in a sharded in-memory table with idle-key eviction or in
+a shared-memory table that enforces one limit across every worker on a host.
+"""
+
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from .config import get_settings
+from .keyring import authenticate_request, key_digest
+from .timing import phase
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+State = Tuple[float, float, float]
+
+RATE_LIMIT_PERIOD = 60.0
+
+
+class Decision(NamedTuple):
+    """Outcome of one rate limit check."""
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: float
+    retry_after: float
+
+
+Algorithm = Callable[[Optional[State], float, int, float], Tuple[Decision, State]]
+
+
+def token_bucket(state: Optional[State], now: float, limit: int, period: float) -> Tuple[Decision, State]:
+    """
+    Token bucket holding ``limit`` tokens, refilled at ``limit / period`` per second.
+
+    State is ``(tokens, updated_at, unused)``.
+    """
+    rate = limit / period
+    if state is None:
+        tokens = float(limit)
+    else:
+        tokens = min(float(limit), state[0] + (now - state[1]) * rate)
+    if tokens >= 1.0:
+        tokens -= 1.0
+        decision = Decision(True, limit, int(tokens), (limit - tokens) / rate, 0.0)
+    else:
+        decision = Decision(False, limit, 0, (limit - tokens) / rate, (1.0 - tokens) / rate)
+    return decision, (tokens, now, 0.0)
+
+
+def sliding_window(state: Optional[State], now: float, limit: int, period: float) -> Tuple[Decision, State]:
+    """
+    Sliding window counter: the previous window's count is weighted by how
+    much of it still overlaps the sliding window.
+
+    State is ``(window_start, previous_count, current_count)``.
+    """
+    window_start = now - now % period
+    previous = current = 0.0
+    if state is not None:
+        if state[0] == window_start:
+            previous, current = state[1], state[2]
+        elif state[0] == window_start - period:
+            previous = state[2]
+    elapsed = now - window_start
+    estimate = previous * (1.0 - elapsed / period) + current
+    reset = period - elapsed
+    if estimate + 1 <= limit:
+        current += 1.0
+        decision = Decision(True, limit, max(0, int(limit - estimate - 1)), reset, 0.0)
+    else:
+        if previous and current < limit:
+            # Wait until enough of the previous window has slid out
+            retry_after = period * (1.0 - (limit - 1 - current) / previous) - elapsed
+        else:
+            # Wait for the next window, where this window's count is the weighted one
+            retry_after = reset + period * max(0.0, 1.0 - (limit - 1) / max(current, 1))
+        decision = Decision(False, limit, 0, reset, max(retry_after, 0.0))
+    return decision, (window_start, previous, current)
+
+
+ALGORITHMS: Dict[str, Algorithm] = {
+    "token_bucket": token_bucket,
+    "sliding_window": sliding_window,
+}
+
+
+class MemoryBackend:
+    """
+    Per-key state in a sharded dictionary.
+
+    Entries are ``[last_seen, s0, s1, s2]`` lists. Each shard is swept for keys
+    idle longer than ``idle_ttl`` once every ``sweep_every`` updates, so the
+    sweep cost is amortized across requests.
+    """
+
+    def __init__(self, shards: int = 16, idle_ttl: float = 120.0, sweep_every: int = 1024):
+        self._shards: List[Dict[str, List[float]]] = [{} for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._ops = [0] * shards
+        self.idle_ttl = idle_ttl
+        self.sweep_every = sweep_every
+        self.evicted = 0
+
+    def update(self, key: str, algorithm: Algorithm, now: float, limit: int, period: float) -> Decision:
+        index = hash(key) % len(self._shards)
+        shard = self._shards[index]
+        with self._locks[index]:
+            entry = shard.get(key)
+            decision, (s0, s1, s2) = algorithm(
+                None if entry is None else (entry[1], entry[2], entry[3]), now, limit, period
+            )
+            if entry is None:
+                shard[key] = [now, s0, s1, s2]
+            else:
+                entry[0], entry[1], entry[2], entry[3] = now, s0, s1, s2
+            self._ops[index] += 1
+            if self._ops[index] >= self.sweep_every:
+                self._ops[index] = 0
+                self._sweep(shard, now)
+        return decision
+
+    def _sweep(self, shard: Dict[str, List[float]], now: float) -> None:
+        cutoff = now - self.idle_ttl
+        idle = [key for key, entry in shard.items() if entry[0] < cutoff]
+        for key in idle:
+            del shard[key]
+        self.evicted += len(idle)
+
+    def __len__(self) -> int:
+        return sum(len(shard) for shard in self._shards)
+
+
+class SharedMemoryBackend:
+    """
+    Per-key state in a memory-mapped file shared by every worker on a host.
+
+    The file is a fixed-size hash table of buckets, each holding a few
+    ``(key hash, last_seen, s0, s1, s2)`` slots. A bucket is locked with a POSIX
+    byte-range lock while it is updated, so workers only contend on the same
+    bucket. When a bucket is full, its least recently seen slot is reused.
+    Keys are hashed with BLAKE2b so every process maps them identically.
+    """
+
+    SLOT = struct.Struct("<Qdddd")
+    SLOTS_PER_BUCKET = 4
+
+    def __init__(self, path: str, buckets: int = 16384):
+        if fcntl is None:
+            raise RuntimeError("The shared rate limit backend requires POSIX file locks")
+        self.path = path
+        self.buckets = buckets
+        self.bucket_size = self.SLOT.size * self.SLOTS_PER_BUCKET
+        size = self.bucket_size * buckets
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+        if os.fstat(self._fd).st_size < size:
+            os.ftruncate(self._fd, size)
+        self._mm = mmap.mmap(self._fd, size)
+        self._lock = threading.Lock()
+
+    def update(self, key: str, algorithm: Algorithm, now: float, limit: int, period: float) -> Decision:
+        key_hash = int.from_bytes(hashlib.blake2b(key.encode(), digest_size=8).digest(), "little") or 1
+        offset = (key_hash % self.buckets) * self.bucket_size
+        slot_size = self.SLOT.size
+        with self._lock:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, self.bucket_size, offset)
+            try:
+                target = None
+                state = None
+                oldest_seen = math.inf
+                for slot in range(offset, offset + self.bucket_size, slot_size):
+                    slot_hash, last_seen, s0, s1, s2 = self.SLOT.unpack_from(self._mm, slot)
+                    if slot_hash == key_hash:
+                        target, state = slot, (s0, s1, s2)
+                        break
+                    if last_seen < oldest_seen:
+                        target, oldest_seen = slot, last_seen
+                decision, (s0, s1, s2) = algorithm(state, now, limit, period)
+                self.SLOT.pack_into(self._mm, target, key_hash, now, s0, s1, s2)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, self.bucket_size, offset)
+        return decision
+
+    def close(self) -> None:
+        self._mm.close()
+        os.close(self._fd)
+
+
+class RateLimiter:
+    """Applies a rate limit algorithm to a state backend."""
+
+    def __init__(self, backend, algorithm: str = "sliding_window", clock: Callable[[], float] = time.time):
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown rate limit algorithm: {algorithm}")
+        self.backend = backend
+        self.algorithm = ALGORITHMS[algorithm]
+        self.clock = clock
+        self.allowed = 0
+        self.limited = 0
+
+    def hit(self, key: str, limit: int, period: float = 60.0) -> Decision:
+        """
+        Count one request for ``key`` against ``limit`` requests per ``period`` seconds.
+
+        Args:
+            key: Identity being limited
+            limit: Maximum number of requests per period
+            period: Period length in seconds
+
+        Returns:
+            Decision with the values for the rate limit headers
+        """
+        decision = self.backend.update(key, self.algorithm, self.clock(), limit, period)
+        if decision.allowed:
+            self.allowed += 1
+        else:
+            self.limited += 1
+        return decision
+
+
+def rate_limit_headers(decision: Decision) -> Dict[str, str]:
+    """Build ``RateLimit-*`` (and, when limited, ``Retry-After``) headers."""
+    headers = {
+        "RateLimit-Limit": str(decision.limit),
+        "RateLimit-Remaining": str(decision.remaining),
+        "RateLimit-Reset": str(math.ceil(decision.reset)),
+    }
+    if not decision.allowed:
+        headers["Retry-After"] = str(max(1, math.ceil(decision.retry_after)))
+    return headers
+
+
+@lru_cache
+def get_rate_limiter() -> RateLimiter:
+    """
+    Get the process-wide rate limiter.
+
+    The backend and algorithm are chosen from settings at first use; limits
+    are read from the settings snapshot on every request and follow reloads.
+
+    Returns:
+        RateLimiter: Shared rate limiter
+    """
+    settings = get_settings()
+    if settings.RATE_LIMIT_BACKEND == "shared":
+        backend = SharedMemoryBackend(settings.RATE_LIMIT_SHARED_PATH, settings.RATE_LIMIT_SHARED_BUCKETS)
+    else:
+        backend = MemoryBackend(idle_ttl=2 * RATE_LIMIT_PERIOD)
+    return RateLimiter(backend, settings.RATE_LIMIT_ALGORITHM)
+
+
+class RateLimit:
+    """
+    FastAPI dependency enforcing the rate limit for one router.
+
+    Requests with a key of the keyring are identified by the key's label,
+    so every key of one fleet shares its limit; others by the client
+    address. The limit per minute comes from the keyring entry's rate limit
+    or ``RATE_LIMIT_API_KEYS`` for the key, then ``RATE_LIMIT_ROUTES`` for
+    the router, then ``RATE_LIMIT_PER_MINUTE``. A key with a limit of its
+    own is counted in a bucket of its own, identified by the key's digest,
+    so keys sharing a label but not a limit never share a bucket.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+
+    async def __call__(self, request: Request) -> None:
+        settings = get_settings()
+        key = authenticate_request(request)
+        limit = None
+        if key is not None:
+            api_key = request.headers.get("X-API-Key")
+            limit = key.rate_limit or settings.RATE_LIMIT_API_KEYS.get(api_key)
+            identity = "key:" + key.label
+            if limit is not None:
+                identity += ":" + key_digest(api_key).hex()[:16]
+        else:
+            identity = "ip:" + (request.client.host if request.client else "unknown")
+        if limit is None:
+            limit = settings.RATE_LIMIT_ROUTES.get(self.name, settings.RATE_LIMIT_PER_MINUTE)
+
+        with phase("rate_limit"):
+            decision = get_rate_limiter().hit(f"{self.name}|{identity}", limit, RATE_LIMIT_PERIOD)
+        headers = rate_limit_headers(decision)
+        if not decision.allowed:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Rate limit exceeded",
+                headers=headers
+            )
+        request.state.rate_limit_headers = headers
@@ -0,0 +1,81 @@
+"""
+Settings Reload
+
+This module provides the explicit reload paths for the settings snapshot:
+a SIGHUP handler and an optional env-file modification watcher.
+"""
+
+import asyncio
+import os
+import signal
+from typing import Optional
+from .config import ENV_FILE, reload_settings
+from .logger import logger
+
+def reload_and_log(trigger: str) -> bool:
+    """
+    Reload settings, keeping the current snapshot if the new one is invalid.
+
+    A listener that fails (for example on an unreadable rule pack) is logged
+    as a failed reload once every other listener has run; the new snapshot
+    stays in place.
+
+    Args:
+        trigger: What caused the reload, for the log record
+
+    Returns:
+        True if a new snapshot was swapped in and every listener accepted it
+    """
+    try:
+        reload_settings()
+    except (OSError, ValueError) as e:
+        logger.error({
+            "type": "settings_reload_failed",
+            "trigger": trigger,
+            "error": str(e),
+            "error_type": e.__class__.__name__,
+        })
+        return False
+    logger.info({"type": "settings_reloaded", "trigger": trigger})
+    return True
+
+def install_sighup_handler(loop: Optional[asyncio.AbstractEventLoop] = None) -> bool:
+    """
+    Reload settings on SIGHUP.
+
+    Args:
+        loop: Event loop to install the handler on; defaults to the running loop
+
+    Returns:
+        True if the handler was installed (not supported on every platform)
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return False
+    loop = loop or asyncio.get_running_loop()
+    try:
+        loop.add_signal_handler(signal.SIGHUP, reload_and_log, "sighup")
+    except (NotImplementedError, RuntimeError, ValueError):
+        return False
+    return True
+
+def _mtime(path: str) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+async def watch_env_file(interval: float, path: str = ENV_FILE) -> None:
+    """
+    Reload settings whenever the env file's modification time changes.
+
+    Args:
+        interval: Polling interval in seconds
+        path: Env file to watch
+    """
+    last_mtime = _mtime(path)
+    while True:
+        await asyncio.sleep(interval)
+        mtime = _mtime(path)
+        if mtime != last_mtime:
+            last_mtime = mtime
+            reload_and_log("env_file")
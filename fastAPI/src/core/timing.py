@@ -0,0 +1,160 @@
+"""
+Request Timing
+
+This module times the phases of a request (authentication, rate limiting,
+decoding, validation, analysis, serialization) for the ``Server-Timing``
+header and slow-request log records, and provides a sampling profiler of
+the event loop thread whose samples are attached to slow requests.
+
+Phase durations are collected in a dictionary held by a context variable
+that ``LoggingMiddleware`` sets only when timing is enabled. Otherwise
+``phase`` returns a shared no-op context manager, so instrumented code pays
+for one context variable lookup.
+"""
+
+import collections
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Phase name -> accumulated seconds for the current request, when timing is enabled
+_phases: ContextVar[Optional[Dict[str, float]]] = ContextVar("request_phases", default=None)
+
+_NO_PHASE = nullcontext()
+
+# Seconds of event loop samples kept by the profiler
+PROFILE_WINDOW = 60.0
+
+# Stacks reported per slow request, most frequent first
+PROFILE_TOP_STACKS = 10
+
+
+class _Phase:
+    __slots__ = ("phases", "name", "start")
+
+    def __init__(self, phases: Dict[str, float], name: str):
+        self.phases = phases
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        phases = self.phases
+        phases[self.name] = phases.get(self.name, 0.0) + time.perf_counter() - self.start
+
+
+def phase(name: str):
+    """
+    Time a block as phase ``name`` of the current request.
+
+    Repeated phases, such as the analysis of each item of a batch, add up.
+
+    Args:
+        name: Phase name, used as the ``Server-Timing`` metric name
+
+    Returns:
+        A context manager
+    """
+    phases = _phases.get()
+    if phases is None:
+        return _NO_PHASE
+    return _Phase(phases, name)
+
+
+def start_request_timing() -> Tuple[Dict[str, float], object]:
+    """Start collecting phases for the current request; returns them and a reset token."""
+    phases: Dict[str, float] = {}
+    return phases, _phases.set(phases)
+
+
+def stop_request_timing(token) -> None:
+    """Stop collecting phases for the current request."""
+    _phases.reset(token)
+
+
+def server_timing(phases: Dict[str, float], total: float) -> str:
+    """
+    Format phases as a ``Server-Timing`` header value, in milliseconds.
+
+    Args:
+        phases: Phase name -> seconds
+        total: Seconds since the request started
+
+    Returns:
+        The header value
+    """
+    metrics = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in phases.items()]
+    metrics.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(metrics)
+
+
+class LoopProfiler:
+    """
+    Sampling profiler of one thread, normally the event loop thread.
+
+    A daemon thread records the sampled thread's stack every ``interval``
+    seconds into a ring buffer covering ``PROFILE_WINDOW`` seconds. The
+    stacks sampled while a slow request was in flight are what the loop was
+    running at the time; with concurrent requests they include other
+    requests' work, which is often what delayed the slow one.
+    """
+
+    def __init__(self, interval: float = 0.005, thread_id: Optional[int] = None):
+        self.interval = interval
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.pid = os.getpid()
+        self.samples: Deque[Tuple[float, Tuple[str, ...]]] = collections.deque(
+            maxlen=max(1, int(PROFILE_WINDOW / interval))
+        )
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="loop-profiler", daemon=True)
+
+    def start(self) -> "LoopProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_filename}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            stack.reverse()
+            self.samples.append((time.perf_counter(), tuple(stack)))
+
+    def snapshot(self, start: float, end: float) -> dict:
+        """
+        Aggregate the samples taken between two ``time.perf_counter`` values.
+
+        Args:
+            start: Start of the period
+            end: End of the period
+
+        Returns:
+            The sample count, the interval in milliseconds and the most
+            frequent stacks in collapsed (``frame;frame;...``) form
+        """
+        counts: Dict[Tuple[str, ...], int] = collections.Counter(
+            stack for taken, stack in list(self.samples) if start <= taken <= end
+        )
+        stacks: List[dict] = [
+            {"stack": ";".join(stack), "count": count}
+            for stack, count in counts.most_common(PROFILE_TOP_STACKS)
+        ]
+        return {
+            "samples": sum(counts.values()),
+            "interval_ms": self.interval * 1000,
+            "stacks": stacks,
+        }
@@ -2,15 +2,27 @@
 This is the main entry point for the FastAPI application.
 """
 
+import asyncio
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi_limiter.depends import RateLimiter  # Example for rate limiting
 from src.core.config import get_settings
-from src.core.logger import logger
+from src.core.health import get_health_monitor
+from src.core.keyring import get_keyring, watch_keyring_file
+from src.core.logger import configure_file_logging, logger
+from src.core.log_queue import start_log_pipeline, stop_log_pipeline
+from src.core.metrics import flush_snapshots, monitor_event_loop, write_snapshot
+from src.core.openapi import install_cached_openapi
+from src.core.rate_limit import RateLimit
+from src.core.reload import install_sighup_handler, watch_env_file
+from src.middleware.admission import AdmissionMiddleware
 from src.middleware.logging import LoggingMiddleware
+from src.middleware.metrics import MetricsMiddleware
+from src.middleware.rate_limit import RateLimitHeadersMiddleware
+from src.services.security import get_security_service
 from src.api.v1.security.router import router as security_router
 from src.api.v1.health.router import router as health_router
 from src.api.v1.test.router import router as test_router
+from src.api.v1.metrics.router import router as metrics_router
 
 def create_app() -> FastAPI:
     """Create and configure the FastAPI application."""
@@ -21,9 +33,6 @@ def create_app() -> FastAPI:
     if not trusted_origins:
         raise ValueError("No valid trusted origins found in CORS_ORIGINS.")
 
-    # Initialize logger
-    logger.info("FastAPI application starting up", extra={"timestamp": "2024-12-20T13:12:07+07:00"})
-
     # Initialize FastAPI app
     app = FastAPI(
         title=settings.PROJECT_NAME,
@@ -43,27 +52,140 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
-    # Add LoggingMiddleware
+    # Add RateLimit-* headers to responses of rate limited routes
+    app.add_middleware(RateLimitHeadersMiddleware)
+
+    # Shed requests beyond the concurrency limits before the endpoint does any
+    # work for them; health probes and metrics scrapes are always admitted
+    app.add_middleware(
+        AdmissionMiddleware,
+        routers={"/api/v1/security": "security", "/api/v1/test": "test"},
+        critical=("/api/v1/health", "/metrics"),
+    )
+
+    # Add LoggingMiddleware; outside admission control, so shed requests are logged
     app.add_middleware(LoggingMiddleware)
 
+    # Record request latency; outermost so it covers the other middleware
+    if settings.METRICS_ENABLED:
+        app.add_middleware(MetricsMiddleware)
+
     # Include routers
     app.include_router(
         security_router,
         prefix="/api/v1",
         tags=["security"],
-        dependencies=[Depends(RateLimiter(times=5, seconds=60))]
+        dependencies=[Depends(RateLimit("security"))]
     )
     app.include_router(health_router, prefix="/api/v1", tags=["health"])
     app.include_router(test_router, prefix="/api/v1/test", tags=["test"])
+    if settings.METRICS_ENABLED:
+        app.include_router(metrics_router, tags=["metrics"])
 
-    # Startup and shutdown events
+    # Serve the schema as bytes encoded once, or pre-built at image build time
+    install_cached_openapi(app, settings.OPENAPI_SCHEMA_FILE)
+
+    # Startup and shutdown events. Importing the application does no file I/O
+    # and imports optional subsystems only where they are enabled, here.
     @app.on_event("startup")
     async def startup_event():
+        configure_file_logging(settings)
+        if settings.LOGSTASH_ENABLED:
+            from src.core.logstash import start_logstash_shipper
+
+            start_logstash_shipper(logger, settings)
+        if settings.LOG_QUEUE_ENABLED:
+            start_log_pipeline(
+                logger,
+                maxsize=settings.LOG_QUEUE_SIZE,
+                overflow=settings.LOG_QUEUE_OVERFLOW,
+                batch_size=settings.LOG_BATCH_SIZE,
+            )
         logger.info("FastAPI application is starting up.", extra={"settings": settings.dict()})
+        install_sighup_handler()
+        # Load the keyring now, so a broken KEYRING_FILE fails the startup
+        keyring = get_keyring()
+        if settings.KEYRING_FILE and settings.KEYRING_WATCH_INTERVAL > 0:
+            app.state.keyring_watcher = asyncio.create_task(
+                watch_keyring_file(keyring, settings.KEYRING_WATCH_INTERVAL)
+            )
+        if settings.SETTINGS_WATCH_INTERVAL > 0:
+            app.state.settings_watcher = asyncio.create_task(
+                watch_env_file(settings.SETTINGS_WATCH_INTERVAL)
+            )
+        # Admission control sheds load on the lag measured here, with or without metrics
+        if settings.METRICS_ENABLED or (settings.ADMISSION_ENABLED and settings.ADMISSION_MAX_LOOP_LAG > 0):
+            app.state.metrics_tasks = [
+                asyncio.create_task(monitor_event_loop(settings.METRICS_LOOP_LAG_INTERVAL))
+            ]
+            if settings.METRICS_ENABLED and settings.METRICS_DIR:
+                app.state.metrics_tasks.append(asyncio.create_task(
+                    flush_snapshots(settings.METRICS_DIR, settings.METRICS_FLUSH_INTERVAL)
+                ))
+        reputation = get_security_service().reputation
+        if reputation is not None and settings.REPUTATION_SNAPSHOT_PATH:
+            from src.services.reputation import load_snapshots, persist_snapshots
+
+            restored = load_snapshots(reputation, settings.REPUTATION_SNAPSHOT_PATH)
+            logger.info({"type": "reputation_restored", "entries": restored})
+            app.state.reputation_task = asyncio.create_task(persist_snapshots(
+                reputation, settings.REPUTATION_SNAPSHOT_PATH, settings.REPUTATION_SNAPSHOT_INTERVAL
+            ))
+        if settings.BODY_SCAN_ENABLED and settings.BODY_SCAN_WORKERS > 0:
+            from src.services.body_scanner import get_body_scan_pool
+
+            # Spawn the scan workers now rather than on the first large body
+            get_body_scan_pool().start()
+        get_health_monitor().start()
+        if settings.CHECK_SOCKET_PATH:
+            from src.services.check_socket import start_check_server
+
+            app.state.check_server = await start_check_server(
+                settings.CHECK_SOCKET_PATH, get_security_service(), settings.BACKLOG
+            )
 
     @app.on_event("shutdown")
     async def shutdown_event():
         logger.info("FastAPI application is shutting down.")
+        health_monitor = get_health_monitor()
+        health_monitor.drain()
+        health_monitor.stop()
+        check_server = getattr(app.state, "check_server", None)
+        if check_server is not None:
+            from src.services.check_socket import stop_check_server
+
+            stop_check_server(check_server, settings.CHECK_SOCKET_PATH)
+        settings_watcher = getattr(app.state, "settings_watcher", None)
+        if settings_watcher is not None:
+            settings_watcher.cancel()
+        keyring_watcher = getattr(app.state, "keyring_watcher", None)
+        if keyring_watcher is not None:
+            keyring_watcher.cancel()
+        for task in getattr(app.state, "metrics_tasks", []):
+            task.cancel()
+        if settings.METRICS_ENABLED and settings.METRICS_DIR:
+            # Keep this worker's final counts in the merged totals
+            write_snapshot(settings.METRICS_DIR)
+        reputation_task = getattr(app.state, "reputation_task", None)
+        if reputation_task is not None:
+            reputation_task.cancel()
+            reputation = get_security_service().reputation
+            if reputation is not None:
+                from src.services.reputation import save_snapshot
+
+                try:
+                    save_snapshot(settings.REPUTATION_SNAPSHOT_PATH, reputation.snapshot())
+                except OSError as e:
+                    logger.warning({"type": "reputation_snapshot_failed", "error": str(e)})
+        # Checks may have started the scan pool on demand
+        from src.services.body_scanner import get_body_scan_pool
+
+        get_body_scan_pool().stop()
+        stop_log_pipeline(logger)
+        if settings.LOGSTASH_ENABLED:
+            from src.core.logstash import stop_logstash_shipper
+
+            stop_logstash_shipper(logger)
 
     @app.get("/test-log")
     async def test_log():
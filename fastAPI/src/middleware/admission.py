@@ -0,0 +1,74 @@
+"""
+Admission control middleware for FastAPI.
+"""
+from typing import Dict, Iterable, Tuple
+from fastapi import Request
+from starlette.types import ASGIApp, Receive, Scope, Send
+from src.core.admission import LOW, NORMAL, AdmissionController
+from src.core.config import Config as Settings, add_reload_listener, get_settings
+from src.core.keyring import authenticate_request
+
+OVERLOADED_BODY = b'{"detail":"Server overloaded, retry later"}'
+
+class AdmissionMiddleware:
+    """
+    Middleware applying admission control (see ``src.core.admission``).
+
+    Requests are assigned to a router by path prefix; paths matching no
+    prefix share the ``default`` router. Shed requests get a 503 with
+    ``Retry-After`` before the inner middleware or the endpoint runs; the
+    reason is left in the scope state as ``admission_shed`` for the logging
+    middleware, which runs outside this one.
+
+    Args:
+        app: The ASGI application
+        routers: Path prefix -> router name
+        critical: Path prefixes of the critical priority class
+    """
+
+    def __init__(self, app: ASGIApp, routers: Dict[str, str], critical: Iterable[str] = ()):
+        self.app = app
+        # Longest prefix first, so nested prefixes match the most specific router
+        self.routers: Tuple[Tuple[str, str], ...] = tuple(
+            sorted(routers.items(), key=lambda item: len(item[0]), reverse=True)
+        )
+        self.critical = tuple(critical)
+        self.controller = AdmissionController()
+        self.apply_settings(get_settings())
+        add_reload_listener(self.apply_settings)
+
+    def apply_settings(self, settings: Settings) -> None:
+        """Pick up whether admission control is on, its limits and the Retry-After value."""
+        self.enabled = settings.ADMISSION_ENABLED
+        self.controller.apply_settings(settings)
+        self.response_headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(OVERLOADED_BODY)).encode("latin-1")),
+            (b"retry-after", str(settings.ADMISSION_RETRY_AFTER).encode("latin-1")),
+        ]
+
+    def _router(self, path: str) -> str:
+        for prefix, name in self.routers:
+            if path.startswith(prefix):
+                return name
+        return "default"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled or scope["path"].startswith(self.critical):
+            await self.app(scope, receive, send)
+            return
+
+        # The key lookup is memoized on the scope and reused by the endpoint's dependencies
+        priority = NORMAL if authenticate_request(Request(scope)) is not None else LOW
+        controller = self.controller
+        gate = controller.gate(self._router(scope["path"]))
+        reason = await controller.acquire(gate, priority)
+        if reason is not None:
+            scope.setdefault("state", {})["admission_shed"] = reason
+            await send({"type": "http.response.start", "status": 503, "headers": self.response_headers})
+            await send({"type": "http.response.body", "body": OVERLOADED_BODY})
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            controller.release(gate)
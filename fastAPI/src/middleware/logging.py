@@ -1,73 +1,188 @@
 """
 Logging middleware for FastAPI.
 """
+import os
+import random
+import threading
 import time
 import uuid
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+from urllib.parse import parse_qsl
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.core.config import Config as Settings, add_reload_listener, get_settings
+from src.core.log_sampling import LogSampler
 from src.core.logger import logger
+from src.core.timing import LoopProfiler, server_timing, start_request_timing, stop_request_timing
 
-class LoggingMiddleware(BaseHTTPMiddleware):
+class LoggingMiddleware:
     """
     Middleware for logging request and response information.
+
+    Implemented as a plain ASGI middleware: request fields are read straight
+    from the scope and the status code and response size are captured from
+    the messages passed to ``send``, so the response is never buffered or
+    re-wrapped.
+
+    Records of clean requests are sampled (see ``LogSampler``): one draw per
+    request decides both of its records, and the completed record is always
+    written for errors, slow requests and detected threats. Requests shed by
+    admission control are errors (503) and carry the ``shed_reason``.
+
+    With ``REQUEST_TIMING_ENABLED`` the phases timed by ``src.core.timing``
+    are added to slow-request records and, with ``SERVER_TIMING_HEADER``,
+    sent in a ``Server-Timing`` header. With ``SLOW_REQUEST_PROFILE`` the
+    event loop is sampled and slow-request records carry the stacks sampled
+    while they ran.
     """
-    slow_request_threshold = 1.0  # Slow request threshold in seconds
 
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.sampler = LogSampler()
+        self.profiler = None
+        self.apply_settings(get_settings())
+        add_reload_listener(self.apply_settings)
+
+    def apply_settings(self, settings: Settings) -> None:
+        """Pick up the slow request threshold (in seconds), sample rates and timing options from settings."""
+        self.slow_request_threshold = settings.SLOW_REQUEST_THRESHOLD
+        self.sampler.configure(settings.LOG_SAMPLE_RATE, settings.LOG_SAMPLE_ROUTES, settings.LOG_SAMPLE_BUDGET)
+        self.timing_enabled = settings.REQUEST_TIMING_ENABLED
+        self.server_timing_header = settings.REQUEST_TIMING_ENABLED and settings.SERVER_TIMING_HEADER
+        self.profile_interval = settings.SLOW_REQUEST_PROFILE_INTERVAL if settings.SLOW_REQUEST_PROFILE else 0.0
+        if self.profiler is not None and self.profiler.interval != self.profile_interval:
+            self.profiler.stop()
+            self.profiler = None
+
+    def _get_profiler(self):
+        """Start the profiler on first use in this process, from the event loop thread."""
+        profiler = self.profiler
+        if profiler is None or profiler.pid != os.getpid():
+            # Threads do not survive a fork, so each worker starts its own
+            profiler = self.profiler = LoopProfiler(self.profile_interval, threading.get_ident()).start()
+        return profiler
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
         request_id = str(uuid.uuid4())
         start_time = time.perf_counter()
+        profiler = self._get_profiler() if self.profile_interval else None
+        phases = timing_token = None
+        if self.timing_enabled:
+            phases, timing_token = start_request_timing()
 
-        # Log request started
-        logger.info({
-            "type": "request_started",
-            "request_id": request_id,
-            "method": request.method,
-            "path": request.url.path,
-            "client_host": request.client.host if request.client else None,
-            "user_agent": request.headers.get("user-agent"),
-            "content_length": request.headers.get("content-length", 0),
-        })
-
-        try:
-            response = await call_next(request)
-            duration = time.perf_counter() - start_time
+        method = scope["method"]
+        path = scope["path"]
+        sampler = self.sampler
+        sample_rate = sampler.rate_for(path)
+        sampled = sample_rate >= 1.0 or random.random() < sample_rate
+        client = scope.get("client")
+        client_host = client[0] if client else None
+        user_agent = None
+        content_length = 0
+        for name, value in scope["headers"]:
+            if name == b"user-agent":
+                user_agent = value.decode("latin-1")
+            elif name == b"content-length":
+                content_length = value.decode("latin-1")
 
-            # Log request completed
-            log_data = {
-                "type": "request_completed",
+        # Log request started
+        if sampled:
+            logger.info({
+                "type": "request_started",
                 "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
-                "status_code": response.status_code,
-                "duration": duration,
-                "client_host": request.client.host if request.client else None,
-                "query_params": dict(request.query_params),
-                "user_agent": request.headers.get("user-agent"),
-                "content_length": request.headers.get("content-length", 0),
-                "response_size": response.headers.get("content-length", 0),
-            }
+                "method": method,
+                "path": path,
+                "client_host": client_host,
+                "user_agent": user_agent,
+                "content_length": content_length,
+                "sample_rate": sample_rate,
+            })
+        sampler.record("request_started", sampled)
 
-            if duration > self.slow_request_threshold:
-                log_data["performance_warning"] = "Slow request detected"
-                logger.warning(log_data)
-            else:
-                logger.info(log_data)
+        status_code = None
+        response_size = 0
 
-            return response
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, response_size
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.server_timing_header and phases is not None:
+                    header = server_timing(phases, time.perf_counter() - start_time)
+                    message = {**message, "headers": [*message.get("headers", ()), (b"server-timing", header.encode())]}
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
 
+        try:
+            await self.app(scope, receive, send_wrapper)
         except Exception as e:
             duration = time.perf_counter() - start_time
             logger.error({
                 "type": "request_failed",
                 "request_id": request_id,
-                "method": request.method,
-                "path": request.url.path,
+                "method": method,
+                "path": path,
                 "duration": duration,
-                "client_host": request.client.host if request.client else None,
-                "query_params": dict(request.query_params),
-                "user_agent": request.headers.get("user-agent"),
+                "client_host": client_host,
+                "query_params": _query_params(scope),
+                "user_agent": user_agent,
                 "error": str(e),
                 "error_type": e.__class__.__name__,
+                "sample_rate": 1.0,
+                **({"phases": phases} if phases else {}),
             })
+            sampler.record("request_failed", True)
             raise
+        finally:
+            if timing_token is not None:
+                stop_request_timing(timing_token)
+
+        duration = time.perf_counter() - start_time
+        slow = duration > self.slow_request_threshold
+
+        # Errors, slow requests and threats are always logged, the rest as sampled
+        state = scope.get("state", {})
+        if status_code is None or status_code >= 400 or slow or state.get("threat_detected"):
+            sample_rate = 1.0
+        elif not sampled:
+            sampler.record("request_completed", False)
+            return
+
+        # Log request completed
+        log_data = {
+            "type": "request_completed",
+            "request_id": request_id,
+            "method": method,
+            "path": path,
+            "status_code": status_code,
+            "duration": duration,
+            "client_host": client_host,
+            "query_params": _query_params(scope),
+            "user_agent": user_agent,
+            "content_length": content_length,
+            "response_size": response_size,
+            "sample_rate": sample_rate,
+        }
+        if "admission_shed" in state:
+            log_data["shed_reason"] = state["admission_shed"]
+
+        if slow:
+            log_data["performance_warning"] = "Slow request detected"
+            if phases is not None:
+                log_data["phases"] = phases
+            if profiler is not None:
+                log_data["profile"] = profiler.snapshot(start_time, start_time + duration)
+            logger.warning(log_data)
+        else:
+            logger.info(log_data)
+        sampler.record("request_completed", True)
+
+
+def _query_params(scope: Scope) -> dict:
+    """Decode the query string the way ``dict(request.query_params)`` does."""
+    query_string = scope.get("query_string")
+    if not query_string:
+        return {}
+    return dict(parse_qsl(query_string.decode("latin-1"), keep_blank_values=True))
@@ -0,0 +1,60 @@
+"""
+Metrics middleware for FastAPI.
+"""
+import time
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.core.metrics import HTTP_REQUEST_DURATION
+
+STATUS_CLASSES = {1: "1xx", 2: "2xx", 3: "3xx", 4: "4xx", 5: "5xx"}
+
+# Label for requests that matched no route, so unknown paths cannot grow
+# the number of histogram series without bound
+UNMATCHED_ROUTE = "<unmatched>"
+
+class MetricsMiddleware:
+    """
+    Middleware recording request latency per route template and status class.
+
+    The route template (``/api/v1/logs/{item_id}``, not the concrete path)
+    is read from the scope after routing, so series stay bounded.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUEST_DURATION.observe(
+                (
+                    scope["method"],
+                    _route_template(scope),
+                    STATUS_CLASSES.get(status_code // 100, "other"),
+                ),
+                time.perf_counter() - start_time,
+            )
+
+
+def _route_template(scope: Scope) -> str:
+    """Return the full path template of the matched route."""
+    # FastAPI versions that resolve included routers lazily record the
+    # prefixed template here; ``scope["route"]`` only has the router-local one.
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    if context is not None:
+        return context.path
+    route = scope.get("route")
+    return route.path if route is not None else UNMATCHED_ROUTE
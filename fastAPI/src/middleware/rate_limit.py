@@ -0,0 +1,36 @@
+"""
+Rate limit headers middleware for FastAPI.
+"""
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class RateLimitHeadersMiddleware:
+    """
+    Middleware adding ``RateLimit-*`` headers to allowed requests.
+
+    The ``RateLimit`` dependency stores the headers on ``request.state``;
+    endpoints that return a ``Response`` directly would otherwise drop
+    headers set by dependencies. Rejected requests carry the headers on
+    their 429 response already.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        state = scope.setdefault("state", {})
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = state.get("rate_limit_headers")
+                if headers:
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (name.lower().encode("latin-1"), value.encode("latin-1"))
+                        for name, value in headers.items()
+                    ]
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
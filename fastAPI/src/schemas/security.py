@@ -4,7 +4,7 @@ Security Schemas
 This module defines the Pydantic models for security-related requests and responses.
 """
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from pydantic import BaseModel, Field
 
 class SecurityCheckRequest(BaseModel):
@@ -20,3 +20,13 @@ class SecurityCheckResponse(BaseModel):
     threat_level: str = Field(..., description="Low, Medium, or High")
     details: Dict[str, Any] = Field(..., description="Detailed analysis results")
     recommendations: Optional[Dict[str, str]] = Field(None, description="Security recommendations")
+
+class SecurityCheckBatchItem(BaseModel):
+    """Result for one item of a batch or streaming security check."""
+    index: int = Field(..., description="Position of the item in the submitted batch")
+    result: Optional[SecurityCheckResponse] = Field(None, description="Security check result, if the item was valid")
+    error: Optional[str] = Field(None, description="Why the item could not be analyzed")
+
+class SecurityCheckBatchResponse(BaseModel):
+    """Response model for batch security checks."""
+    results: List[SecurityCheckBatchItem] = Field(..., description="Results in submission order")
@@ -0,0 +1,275 @@
+"""
+Body Scanner
+
+This module looks inside the body of a security check request for
+injection payloads. The decoded JSON is walked iteratively with an explicit
+stack, so nesting depth costs memory instead of recursion, and every
+string (values and object keys) is matched against compiled SQL injection,
+XSS and command injection signatures.
+
+The walk stops at a depth, value count and string size budget; a body
+exceeding one is reported as incomplete instead of being scanned without
+bound. Small bodies are scanned inline. Larger ones go to a pool of worker
+processes (``BodyScanPool``) that decode the raw request themselves, so
+neither the scan nor the decoding runs on the event loop.
+"""
+
+import asyncio
+import json
+import re
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Tuple
+
+from src.core.config import get_settings
+from src.core.logger import logger
+from src.services.threat_rules import DEFAULT_BODY_SIGNATURES, Signatures, freeze_signatures
+
+if TYPE_CHECKING:
+    from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+# Longest excerpt of a matched string quoted in a finding
+SNIPPET_LENGTH = 64
+
+class BodyScanResult(NamedTuple):
+    """Findings of one body scan."""
+    findings: Dict[str, str]
+    incomplete: Optional[str] = None
+    nodes: int = 0
+    scanned_chars: int = 0
+
+    @property
+    def clean(self) -> bool:
+        """Whether the body was scanned in full without findings."""
+        return not self.findings and self.incomplete is None
+
+
+def _format_path(path) -> str:
+    parts = []
+    while path is not None:
+        path, key = path
+        parts.append(f"[{key}]" if type(key) is int else f".{key}")
+    return "body" + "".join(reversed(parts))
+
+
+class BodyScanner:
+    """
+    Compiled body signatures and scan budgets.
+
+    The walk collects every string of the body; they are lowercased and
+    joined with NUL separators, and each signature is searched once over
+    the joined text instead of once per string. Signatures must not match
+    across a NUL (use ``[^...\\x00]`` rather than ``.``). A match is traced
+    back to the string it starts in only when there is one.
+
+    Args:
+        signatures: (category, regular expressions) pairs; see ``freeze_signatures``
+        max_depth: Deepest nesting level whose containers are walked
+        max_nodes: Most values visited
+        max_chars: Most string characters matched
+    """
+
+    def __init__(
+        self,
+        signatures: Signatures = freeze_signatures(DEFAULT_BODY_SIGNATURES),
+        max_depth: int = 64,
+        max_nodes: int = 200_000,
+        max_chars: int = 2_097_152,
+    ):
+        self.signatures = signatures
+        self.max_depth = max_depth
+        self.max_nodes = max_nodes
+        self.max_chars = max_chars
+        self._categories = tuple(
+            (category, tuple(re.compile(pattern) for pattern in patterns))
+            for category, patterns in signatures
+        )
+
+    @property
+    def config(self) -> tuple:
+        """Constructor arguments, sent to worker processes instead of the compiled scanner."""
+        return (self.signatures, self.max_depth, self.max_nodes, self.max_chars)
+
+    def scan(self, body: Any) -> BodyScanResult:
+        """
+        Walk ``body`` and match its strings against the signatures.
+
+        Args:
+            body: Decoded JSON body
+
+        Returns:
+            The first finding per category, and why the scan stopped early if it did
+        """
+        leaves, paths, chars, nodes, incomplete = self._collect(body)
+        findings: Dict[str, str] = {}
+        if not leaves:
+            return BodyScanResult(findings, incomplete, nodes, 0)
+        text = "\x00".join(leaves).lower()
+        if len(text) != chars + len(leaves) - 1:
+            # Some characters lowercase to several; keep offsets aligned with the strings
+            leaves = [leaf.lower() for leaf in leaves]
+            text = "\x00".join(leaves)
+        bounds = None
+        for category, regexes in self._categories:
+            for regex in regexes:
+                match = regex.search(text)
+                if match is None:
+                    continue
+                if bounds is None:
+                    bounds = list(accumulate(len(leaf) + 1 for leaf in leaves))
+                path, is_key = paths[bisect_right(bounds, match.start())]
+                where = _format_path(path) + (" (key)" if is_key else "")
+                findings[category] = f"Signature of {category} matched at {where}: {match.group()[:SNIPPET_LENGTH]!r}"
+                break
+        return BodyScanResult(findings, incomplete, nodes, chars)
+
+    def _collect(self, body: Any) -> Tuple[List[str], list, int, int, Optional[str]]:
+        """Walk ``body`` iteratively; return its strings, their paths, their length, the value count and any budget hit."""
+        leaves: List[str] = []
+        # (path, is_key) per string, where path is a (parent path, key) chain
+        paths = []
+        add_leaf, add_path = leaves.append, paths.append
+        max_depth, max_nodes, max_chars = self.max_depth, self.max_nodes, self.max_chars
+        chars = 0
+        nodes = 1
+        incomplete = None
+        if type(body) is not dict and type(body) is not list:
+            body = [body]
+        stack = [(body, 0, None)]
+        pop, push = stack.pop, stack.append
+        while stack:
+            value, depth, path = pop()
+            if depth >= max_depth:
+                incomplete = f"Body is nested deeper than {max_depth} levels; deeper values were not scanned"
+                continue
+            nodes += len(value)
+            if nodes > max_nodes:
+                incomplete = f"Body has more than {max_nodes} values; the rest was not scanned"
+                break
+            depth += 1
+            if type(value) is dict:
+                for key, child in value.items():
+                    child_path = (path, key)
+                    add_leaf(key)
+                    add_path((child_path, True))
+                    chars += len(key)
+                    kind = type(child)
+                    if kind is str:
+                        add_leaf(child)
+                        add_path((child_path, False))
+                        chars += len(child)
+                    elif kind is dict or kind is list:
+                        push((child, depth, child_path))
+            else:
+                for index, child in enumerate(value):
+                    kind = type(child)
+                    if kind is str:
+                        add_leaf(child)
+                        add_path(((path, index), False))
+                        chars += len(child)
+                    elif kind is dict or kind is list:
+                        push((child, depth, (path, index)))
+            if chars > max_chars:
+                # Cut the strings back to the budget; the last one may end mid-string
+                while chars - len(leaves[-1]) >= max_chars:
+                    chars -= len(leaves.pop())
+                    paths.pop()
+                leaves[-1] = leaves[-1][:len(leaves[-1]) - (chars - max_chars)]
+                chars = max_chars
+                incomplete = f"Body has more than {max_chars} string characters; the rest was not scanned"
+                break
+        return leaves, paths, chars, nodes, incomplete
+
+
+# Scanners of a worker process, by configuration
+_worker_scanners: Dict[tuple, BodyScanner] = {}
+
+
+def _scan_in_worker(config: tuple, body: Any = None, raw: Optional[bytes] = None) -> BodyScanResult:
+    """Run a scan in a worker process, decoding the ``body`` of the raw request when given."""
+    scanner = _worker_scanners.get(config)
+    if scanner is None:
+        scanner = _worker_scanners[config] = BodyScanner(*config)
+    if raw is not None:
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        body = data.get("body") if type(data) is dict else None
+    return scanner.scan(body)
+
+
+def _ready() -> None:
+    """Task run once per worker process at startup, so the first scan does not wait for a spawn."""
+
+
+class BodyScanPool:
+    """
+    Worker processes running scans of large bodies.
+
+    Workers are spawned, not forked: the application process runs threads
+    (the log writer, the profiler) whose locks a fork could copy while held.
+
+    Args:
+        workers: Number of worker processes
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self._executor: Optional["ProcessPoolExecutor"] = None
+
+    def start(self) -> None:
+        """Start the worker processes."""
+        if self._executor is not None:
+            return
+        # Imported on first use; processes that never scan in the pool do not need them
+        import multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        for _ in range(self.workers):
+            self._executor.submit(_ready)
+
+    def stop(self) -> None:
+        """Stop the workers, abandoning queued scans."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def scan(self, scanner: BodyScanner, body: Any = None, raw: Optional[bytes] = None) -> BodyScanResult:
+        """
+        Scan a body in a worker process.
+
+        Args:
+            scanner: Scanner whose signatures and budgets to apply
+            body: Decoded body, pickled to the worker; ignored when ``raw`` is given
+            raw: Raw JSON of the whole check request, decoded by the worker
+
+        Returns:
+            The scan result; an incomplete one if the worker failed
+        """
+        self.start()
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._executor, _scan_in_worker, scanner.config, None if raw is not None else body, raw
+            )
+        except Exception as e:
+            # A worker killed mid-scan breaks the whole pool; start a new one for the next scan
+            logger.error({"type": "body_scan_failed", "error": repr(e)})
+            self.stop()
+            return BodyScanResult({}, "Body could not be scanned")
+
+
+@lru_cache
+def get_body_scan_pool() -> BodyScanPool:
+    """
+    Get this process's body scan pool, sized by ``BODY_SCAN_WORKERS`` at first use.
+
+    Returns:
+        BodyScanPool: Shared pool
+    """
+    return BodyScanPool(get_settings().BODY_SCAN_WORKERS)
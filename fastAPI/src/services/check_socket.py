@@ -0,0 +1,409 @@
+"""
+Security Check Socket
+
+This module serves security checks over a Unix domain socket, for a caller
+on the same host that wants to skip TCP, HTTP parsing and per-request API
+key checks. The socket dispatches to the same ``SecurityService`` as
+``POST /security/check`` and answers with the same JSON verdicts.
+
+Every frame is a 9-byte big-endian header followed by its payload:
+
+    u32 payload length | u32 request id | u8 frame type | payload
+
+Frame types:
+    AUTH (1): client -> server, payload is an API key of the keyring. Must
+        be the first frame of a connection; the session stays authenticated
+        until the connection closes or its key is revoked or expires.
+    AUTH_OK (2): server -> client, empty payload.
+    CHECK (3): client -> server, payload is a security check request, the
+        JSON body of ``POST /security/check``.
+    VERDICT (4): server -> client, payload is the JSON verdict.
+    ERROR (5): server -> client, payload is ``{"status": ..., "detail": ...}``
+        with the HTTP status the endpoint would have returned. Errors
+        answering AUTH, a frame sent before AUTH and a revoked key close the
+        connection.
+
+Requests are multiplexed by id: a client may send any number of CHECK
+frames without waiting and match the answers by id. Answers are written in
+request order, except that checks whose body goes to the scan pool (see
+``SecurityService.offloads_body_scan``) are answered when their scan is
+done.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import socket
+import struct
+import time
+from typing import Dict, List, Optional, Set, Union
+
+from pydantic import ValidationError
+
+from src.core.config import get_settings
+from src.core.keyring import ApiKey, get_keyring
+from src.core.logger import logger
+from src.schemas.security import SecurityCheckRequest
+from src.services.request_decoder import decode_check_request, decode_check_request_fast
+from src.services.security import SecurityService, _format_validation_error
+
+HEADER = struct.Struct("!IIB")
+
+AUTH = 1
+AUTH_OK = 2
+CHECK = 3
+VERDICT = 4
+ERROR = 5
+
+# Permissions of the socket file: owner and group may connect
+SOCKET_MODE = 0o660
+
+# Connection write buffer above which reading from that connection pauses
+WRITE_HIGH_WATER = 1024 * 1024
+
+# Checks of one connection waiting for the scan pool above which reading
+# from that connection pauses; the frames already read wait in its buffer
+MAX_OFFLOADED = 16
+
+# Listening socket bound by the launcher before forking, shared by the workers
+_listening_socket: Optional[socket.socket] = None
+
+
+def encode_frame(kind: int, request_id: int, payload: bytes = b"") -> bytes:
+    """Return a frame of ``kind`` carrying ``payload``."""
+    return HEADER.pack(len(payload), request_id, kind) + payload
+
+
+def _error(request_id: int, status: int, detail: str) -> bytes:
+    return encode_frame(ERROR, request_id, json.dumps({"status": status, "detail": detail}).encode("utf-8"))
+
+
+def bind_check_socket(path: str, backlog: int) -> socket.socket:
+    """
+    Create the listening Unix socket, replacing a stale socket file.
+
+    Args:
+        path: Socket file path
+        backlog: Listen backlog
+
+    Returns:
+        The listening socket, inheritable by forked workers
+    """
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.bind(path)
+    os.chmod(path, SOCKET_MODE)
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def share_check_socket(sock: socket.socket) -> None:
+    """Hand a socket bound before forking to the workers' ``start_check_server``."""
+    global _listening_socket
+    _listening_socket = sock
+
+
+class CheckProtocol(asyncio.Protocol):
+    """
+    One connection of the check socket.
+
+    Frames are parsed straight from ``data_received`` and every CHECK in a
+    read is answered synchronously; the answers to one read go out in a
+    single write. Analysis has no await point, so running it inline keeps
+    the connection's answers in order without a task per frame. Only checks
+    of large bodies get a task, which waits for the scan pool; at most
+    ``MAX_OFFLOADED`` of them per connection.
+    """
+
+    def __init__(self, service: SecurityService):
+        self.service = service
+        self.transport: Optional[asyncio.Transport] = None
+        self.authenticated = False
+        self.key: Optional[ApiKey] = None
+        self._api_key = b""
+        self._keyring_version = -1
+        self._buffer = bytearray()
+        self._skip = 0
+        self._offloaded: Set[asyncio.Task] = set()
+        self._write_paused = False
+
+    def connection_made(self, transport: asyncio.Transport) -> None:
+        self.transport = transport
+        transport.set_write_buffer_limits(high=WRITE_HIGH_WATER)
+
+    def pause_writing(self) -> None:
+        self._write_paused = True
+        self._update_reading()
+
+    def resume_writing(self) -> None:
+        self._write_paused = False
+        self._update_reading()
+
+    def _update_reading(self) -> None:
+        if self.transport.is_closing():
+            return
+        if self._write_paused or len(self._offloaded) >= MAX_OFFLOADED:
+            self.transport.pause_reading()
+        else:
+            self.transport.resume_reading()
+
+    def data_received(self, data: bytes) -> None:
+        buffer = self._buffer
+        buffer += data
+        settings = get_settings()
+        max_frame = settings.MAX_CHECK_REQUEST_SIZE
+        replies: List[bytes] = []
+        offset = 0
+        while not self.transport.is_closing() and len(self._offloaded) < MAX_OFFLOADED:
+            if self._skip:
+                # Discard the payload of an oversized frame as it arrives
+                skipped = min(self._skip, len(buffer) - offset)
+                offset += skipped
+                self._skip -= skipped
+                if self._skip:
+                    break
+            if len(buffer) - offset < HEADER.size:
+                break
+            length, request_id, kind = HEADER.unpack_from(buffer, offset)
+            if length > max_frame:
+                replies.append(_error(request_id, 413, f"Request of {length} bytes exceeds limit of {max_frame}"))
+                offset += HEADER.size
+                self._skip = length
+            else:
+                end = offset + HEADER.size + length
+                if len(buffer) < end:
+                    break
+                payload = bytes(buffer[offset + HEADER.size:end])
+                offset = end
+                reply = self._handle(kind, request_id, payload, settings)
+                if reply is not None:
+                    replies.append(reply)
+            if not self.authenticated:
+                # Anything but a successful AUTH first ends the connection
+                break
+        del buffer[:offset]
+        if replies:
+            self.transport.writelines(replies)
+        if not self.authenticated and replies:
+            self.transport.close()
+        elif len(self._offloaded) >= MAX_OFFLOADED:
+            self._update_reading()
+
+    def _handle(self, kind: int, request_id: int, payload: bytes, settings) -> Optional[bytes]:
+        if not self.authenticated:
+            if kind != AUTH:
+                return _error(request_id, 401, "Authenticate first")
+            keyring = get_keyring()
+            self.key = keyring.lookup(payload)
+            if self.key is None:
+                logger.warning({"type": "check_socket_auth_failed"})
+                return _error(request_id, 403, "Invalid API key")
+            self.authenticated = True
+            self._api_key = payload
+            self._keyring_version = keyring.version
+            return encode_frame(AUTH_OK, request_id)
+        if kind != CHECK:
+            return _error(request_id, 400, f"Unexpected frame type {kind}")
+        keyring = get_keyring()
+        if keyring.version != self._keyring_version or (
+            self.key.expires is not None and time.time() >= self.key.expires
+        ):
+            # The keyring was reloaded or the key expired: verify the session again
+            self.key = keyring.lookup(self._api_key)
+            self._keyring_version = keyring.version
+            if self.key is None:
+                self.authenticated = False
+                return _error(request_id, 403, "API key revoked or expired")
+        return self._check(request_id, payload, settings)
+
+    def _check(self, request_id: int, payload: bytes, settings) -> Optional[bytes]:
+        decoded = decode_check_request_fast(payload, settings.MAX_BODY_SIZE) if settings.SECURITY_FAST_PATH else None
+        if decoded is None:
+            try:
+                decoded = decode_check_request(payload, settings.MAX_BODY_SIZE)
+            except ValueError as e:
+                return _error(request_id, 422, f"JSON decode error: {e}")
+        data, body_size = decoded
+        try:
+            check_request = SecurityCheckRequest.model_validate(data)
+        except ValidationError as e:
+            return _error(request_id, 422, _format_validation_error(e))
+        if self.service.offloads_body_scan(check_request, body_size):
+            task = asyncio.ensure_future(self._check_offloaded(request_id, check_request, body_size, payload))
+            self._offloaded.add(task)
+            task.add_done_callback(self._offload_done)
+            return None
+        try:
+            body = self.service.evaluate_json(check_request, body_size)
+        except Exception:
+            logger.exception({"type": "check_socket_failed"})
+            return _error(request_id, 500, "Internal Server Error")
+        return encode_frame(VERDICT, request_id, body)
+
+    def _offload_done(self, task: asyncio.Task) -> None:
+        at_limit = len(self._offloaded) >= MAX_OFFLOADED
+        self._offloaded.discard(task)
+        if at_limit and not self.transport.is_closing():
+            # Answer the frames left in the buffer, then read again
+            self.data_received(b"")
+            self._update_reading()
+
+    async def _check_offloaded(
+        self, request_id: int, check_request: SecurityCheckRequest, body_size: int, payload: bytes
+    ) -> None:
+        try:
+            body_scan = await self.service.scan_body(check_request, body_size, payload)
+            reply = encode_frame(VERDICT, request_id, self.service.evaluate_json(check_request, body_size, body_scan))
+        except Exception:
+            logger.exception({"type": "check_socket_failed"})
+            reply = _error(request_id, 500, "Internal Server Error")
+        if not self.transport.is_closing():
+            self.transport.write(reply)
+
+
+async def start_check_server(path: str, service: SecurityService, backlog: int = 2048) -> asyncio.AbstractServer:
+    """
+    Serve security checks on the Unix socket at ``path``.
+
+    Workers started by the launcher accept on the socket it bound before
+    forking; a single process binds the socket itself.
+
+    Args:
+        path: Socket file path
+        service: Security service answering the checks
+        backlog: Listen backlog, when the socket is bound here
+
+    Returns:
+        The running server
+    """
+    sock = _listening_socket or bind_check_socket(path, backlog)
+    loop = asyncio.get_running_loop()
+    server = await loop.create_unix_server(lambda: CheckProtocol(service), sock=sock)
+    logger.info({"type": "check_socket_started", "path": path, "pid": os.getpid()})
+    return server
+
+
+def stop_check_server(server: asyncio.AbstractServer, path: str) -> None:
+    """
+    Stop accepting checks; the socket file is removed unless the launcher owns it.
+
+    Open sessions are left to finish with the worker, as HTTP keep-alive
+    connections are.
+
+    Args:
+        server: Server returned by ``start_check_server``
+        path: Socket file path
+    """
+    server.close()
+    if _listening_socket is None:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+class CheckSocketError(Exception):
+    """Error frame returned by the check socket."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(f"{status}: {detail}")
+        self.status = status
+        self.detail = detail
+
+
+class CheckSocketClient:
+    """
+    Reference asyncio client of the check socket.
+
+    One connection carries any number of concurrent ``check`` calls.
+
+    Example:
+        client = await CheckSocketClient.connect("/run/fastapi/check.sock", api_key)
+        verdict = await client.check({"headers": {}, "path": "/", "method": "GET"})
+        await client.close()
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader_task: Optional[asyncio.Task] = None
+
+    @classmethod
+    async def connect(cls, path: str, api_key: str) -> "CheckSocketClient":
+        """
+        Open and authenticate a connection.
+
+        Raises:
+            CheckSocketError: If the API key is refused
+        """
+        reader, writer = await asyncio.open_unix_connection(path)
+        client = cls(reader, writer)
+        writer.write(encode_frame(AUTH, 0, api_key.encode("utf-8")))
+        kind, _, payload = await client._read_frame()
+        if kind != AUTH_OK:
+            writer.close()
+            raise _as_error(payload)
+        client._reader_task = asyncio.create_task(client._read_answers())
+        return client
+
+    async def check(self, request: Union[dict, bytes]) -> dict:
+        """
+        Analyze a security check request.
+
+        Args:
+            request: Check request as a dict or as its JSON encoding
+
+        Returns:
+            The verdict
+
+        Raises:
+            CheckSocketError: If the request is refused
+        """
+        payload = request if isinstance(request, bytes) else json.dumps(request).encode("utf-8")
+        request_id = next(self._ids) & 0xFFFFFFFF
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        self.writer.write(encode_frame(CHECK, request_id, payload))
+        return await future
+
+    async def close(self) -> None:
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+    async def _read_frame(self):
+        length, request_id, kind = HEADER.unpack(await self.reader.readexactly(HEADER.size))
+        return kind, request_id, await self.reader.readexactly(length)
+
+    async def _read_answers(self) -> None:
+        try:
+            while True:
+                kind, request_id, payload = await self._read_frame()
+                future = self._pending.pop(request_id, None)
+                if future is None or future.done():
+                    continue
+                if kind == VERDICT:
+                    future.set_result(json.loads(payload))
+                else:
+                    future.set_exception(_as_error(payload))
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ConnectionError(f"check socket closed: {e}"))
+            self._pending.clear()
+
+
+def _as_error(payload: bytes) -> CheckSocketError:
+    error = json.loads(payload)
+    return CheckSocketError(error["status"], error["detail"])
@@ -0,0 +1,290 @@
+"""
+Client Reputation
+
+This module keeps a bounded, in-process history of security verdicts per
+client, so the security service can escalate the threat level of clients
+that keep sending suspicious requests.
+
+Each client has a sliding window of ``BUCKETS`` time buckets holding its
+request and threat counts in a compact integer array. Updates and lookups
+touch one entry and a fixed number of buckets. Entries are kept in least
+recently active order and evicted from the idle end to stay under the
+memory cap. The store can be snapshotted to disk and reloaded at startup.
+API keys are kept only as keyed digests, so neither the store nor its
+snapshots hold credentials.
+"""
+
+import asyncio
+import glob
+import hashlib
+import hmac
+import json
+import os
+import sys
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from typing import Callable, Mapping, Optional, Tuple
+
+from src.core.logger import logger
+
+# Time buckets per window
+BUCKETS = 6
+
+# Rough per-entry bookkeeping cost (OrderedDict node, entry list, epoch int)
+# added to the key and counter array sizes when enforcing the memory cap.
+ENTRY_OVERHEAD = 160
+
+# Version 1 snapshots held raw API keys; they are deleted instead of restored
+SNAPSHOT_VERSION = 2
+
+
+def client_identity(headers: Mapping[str, str], secret: bytes) -> Optional[str]:
+    """
+    Identify the client of a checked request from its headers.
+
+    The API key wins over the address, which is the first hop of
+    ``X-Forwarded-For`` or else ``X-Real-IP``. The key is reduced to an
+    HMAC-SHA256 digest under ``secret``.
+
+    Args:
+        headers: Headers of the checked request
+        secret: HMAC key for API key digests
+
+    Returns:
+        ``key:<digest>``, ``ip:<address>``, or None when neither is present
+    """
+    api_key = forwarded = real_ip = None
+    for name, value in headers.items():
+        name = name.lower()
+        if name == "x-api-key":
+            api_key = value
+        elif name == "x-forwarded-for":
+            forwarded = value.split(",", 1)[0].strip()
+        elif name == "x-real-ip":
+            real_ip = value.strip()
+    if api_key:
+        digest = hmac.new(secret, api_key.encode("utf-8", "surrogatepass"), hashlib.sha256)
+        return "key:" + digest.hexdigest()[:32]
+    address = forwarded or real_ip
+    return "ip:" + address if address else None
+
+
+class ReputationStore:
+    """
+    Sliding-window request and threat counts per client, under a memory cap.
+
+    Counters are ``array('I')`` values laid out as ``[requests, threats]``
+    per bucket; a bucket is cleared when the window slides onto it again.
+    ``secret`` keys the API key digests of ``client_identity``; workers
+    sharing snapshots need the same one. It defaults to a random key.
+    """
+
+    def __init__(
+        self,
+        window: float = 60.0,
+        max_bytes: int = 8 * 1024 * 1024,
+        clock: Callable[[], float] = time.time,
+        secret: Optional[bytes] = None,
+    ):
+        self.window = window
+        self.secret = secret if secret is not None else os.urandom(32)
+        self.bucket_width = window / BUCKETS
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self._entries: "OrderedDict[str, list]" = OrderedDict()
+        self._array_size = sys.getsizeof(array("I", [0]) * (2 * BUCKETS))
+        self.size_bytes = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _entry_size(self, key: str) -> int:
+        return sys.getsizeof(key) + self._array_size + ENTRY_OVERHEAD
+
+    @staticmethod
+    def _advance(entry: list, epoch: int) -> array:
+        """Clear the buckets the window slid over since the entry was last updated."""
+        counts = entry[1]
+        elapsed = epoch - entry[0]
+        if elapsed >= BUCKETS:
+            for i in range(2 * BUCKETS):
+                counts[i] = 0
+        else:
+            for step in range(1, elapsed + 1):
+                index = 2 * ((entry[0] + step) % BUCKETS)
+                counts[index] = counts[index + 1] = 0
+        entry[0] = epoch
+        return counts
+
+    @staticmethod
+    def _totals(counts: array) -> Tuple[int, int]:
+        return sum(counts[0::2]), sum(counts[1::2])
+
+    def record(self, key: str, is_threat: bool) -> Tuple[int, int]:
+        """
+        Count one verdict for ``key``.
+
+        Args:
+            key: Client identity
+            is_threat: Whether the verdict was a threat
+
+        Returns:
+            The client's requests and threats within the window, including this one
+        """
+        epoch = int(self.clock() // self.bucket_width)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = [epoch, array("I", [0]) * (2 * BUCKETS)]
+            self.size_bytes += self._entry_size(key)
+            self._evict()
+            counts = entry[1]
+        else:
+            self._entries.move_to_end(key)
+            counts = self._advance(entry, epoch) if epoch > entry[0] else entry[1]
+        index = 2 * (epoch % BUCKETS)
+        counts[index] += 1
+        if is_threat:
+            counts[index + 1] += 1
+        return self._totals(counts)
+
+    def lookup(self, key: str) -> Tuple[int, int]:
+        """Return the client's requests and threats within the window."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return 0, 0
+        epoch = int(self.clock() // self.bucket_width)
+        counts = self._advance(entry, epoch) if epoch > entry[0] else entry[1]
+        return self._totals(counts)
+
+    def _evict(self) -> None:
+        entries = self._entries
+        while self.size_bytes > self.max_bytes and entries:
+            key, _ = entries.popitem(last=False)
+            self.size_bytes -= self._entry_size(key)
+            self.evictions += 1
+
+    def snapshot(self) -> dict:
+        """Return a JSON-serializable copy of every entry still inside the window."""
+        oldest = int(self.clock() // self.bucket_width) - BUCKETS + 1
+        return {
+            "version": SNAPSHOT_VERSION,
+            "bucket_width": self.bucket_width,
+            "entries": [
+                [key, epoch, counts.tolist()]
+                for key, (epoch, counts) in self._entries.items()
+                if epoch >= oldest
+            ],
+        }
+
+    def restore(self, snapshot: dict) -> int:
+        """
+        Merge a snapshot into the store, keeping the larger count per bucket.
+
+        Taking the maximum rather than the sum means a state restored and
+        saved again is not counted twice. Snapshots taken with another
+        bucket width are ignored.
+
+        Args:
+            snapshot: Output of ``snapshot``
+
+        Returns:
+            The number of entries restored
+        """
+        if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get("bucket_width") != self.bucket_width:
+            return 0
+        epoch_now = int(self.clock() // self.bucket_width)
+        restored = 0
+        # Oldest first, so the most recently active entries end up least likely to be evicted
+        for key, epoch, saved in sorted(snapshot["entries"], key=lambda item: item[1]):
+            if epoch_now - epoch >= BUCKETS or len(saved) != 2 * BUCKETS:
+                continue
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = [epoch, array("I", [0]) * (2 * BUCKETS)]
+                self.size_bytes += self._entry_size(key)
+            else:
+                self._entries.move_to_end(key)
+            # Bring both sides to the same epoch before merging
+            counts = self._advance(entry, max(entry[0], epoch))
+            staged = self._advance([epoch, array("I", saved)], entry[0])
+            for i in range(2 * BUCKETS):
+                if staged[i] > counts[i]:
+                    counts[i] = staged[i]
+            restored += 1
+        self._evict()
+        return restored
+
+
+def save_snapshot(path: str, snapshot: dict) -> None:
+    """
+    Atomically write a reputation snapshot to ``<path>.<pid>``.
+
+    Args:
+        path: Snapshot path prefix shared by the workers
+        snapshot: Output of ``ReputationStore.snapshot``
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as tmp:
+            json.dump(snapshot, tmp, separators=(",", ":"))
+        os.replace(tmp_path, f"{path}.{os.getpid()}")
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_snapshots(store: ReputationStore, path: str) -> int:
+    """
+    Restore every worker snapshot found under ``path`` into ``store``.
+
+    Files no longer covering any part of the window, and files of an older
+    snapshot version, are deleted.
+
+    Args:
+        store: Store to restore into
+        path: Snapshot path prefix shared by the workers
+
+    Returns:
+        The number of entries restored
+    """
+    restored = 0
+    cutoff = time.time() - store.window
+    for file_path in glob.glob(glob.escape(path) + ".*[0-9]"):
+        try:
+            if os.path.getmtime(file_path) < cutoff:
+                os.remove(file_path)
+                continue
+            with open(file_path) as f:
+                snapshot = json.load(f)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                os.remove(file_path)
+                continue
+            restored += store.restore(snapshot)
+        except (OSError, ValueError) as e:
+            logger.warning({"type": "reputation_restore_failed", "path": file_path, "error": str(e)})
+    return restored
+
+
+async def persist_snapshots(store: ReputationStore, path: str, interval: float) -> None:
+    """
+    Write the store's snapshot every ``interval`` seconds.
+
+    Args:
+        store: Store to snapshot
+        path: Snapshot path prefix shared by the workers
+        interval: Seconds between writes
+    """
+    while True:
+        await asyncio.sleep(interval)
+        # Snapshot on the loop thread, which is the one updating; write off it
+        snapshot = store.snapshot()
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, save_snapshot, path, snapshot)
+        except OSError as e:
+            logger.warning({"type": "reputation_snapshot_failed", "path": path, "error": str(e)})
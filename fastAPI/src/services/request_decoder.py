@@ -0,0 +1,173 @@
+"""
+Request Decoder
+
+This module decodes security check requests from raw JSON bytes and
+measures the analyzed body by the bytes it occupies in the request,
+instead of re-serializing the decoded value.
+"""
+
+import json
+import json.decoder
+import json.scanner
+import re
+from typing import Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
+
+_scan_once = json.scanner.make_scanner(json.JSONDecoder())
+_scanstring = json.decoder.scanstring
+_whitespace = re.compile(r"[ \t\n\r]*").match
+_JSON_WHITESPACE = " \t\n\r"
+_WHITESPACE_CHARS = frozenset(_JSON_WHITESPACE)
+
+
+def _skip_ws(text: str, idx: int) -> int:
+    # Most positions are not whitespace; skip the regex for them
+    if text[idx:idx + 1] not in _WHITESPACE_CHARS:
+        return idx
+    return _whitespace(text, idx + 1).end()
+
+
+def decode_with_span(text: str, key: str, stop_at_key: bool = False) -> Tuple[Any, Optional[Tuple[int, int]]]:
+    """
+    Decode a JSON document, noting where ``key`` of the top-level object sits.
+
+    The top-level object is walked with the C scanner of the ``json`` module,
+    so the span of each member comes for free from where its value ends.
+
+    Args:
+        text: JSON document
+        key: Top-level member whose raw text span is wanted
+        stop_at_key: Stop where the member's value starts, without decoding
+            it; the span end is then -1 and the document is partial
+
+    Returns:
+        The decoded document and the ``(start, end)`` of the member's value,
+        or None when the document is not an object or lacks the member
+
+    Raises:
+        json.JSONDecodeError: If the document is not valid JSON
+    """
+    idx = _skip_ws(text, 0)
+    if not text.startswith("{", idx):
+        return json.loads(text), None
+
+    obj = {}
+    span = None
+    idx = _skip_ws(text, idx + 1)
+    if text.startswith("}", idx):
+        idx += 1
+    else:
+        while True:
+            if not text.startswith('"', idx):
+                raise json.JSONDecodeError("Expecting property name enclosed in double quotes", text, idx)
+            name, idx = _scanstring(text, idx + 1)
+            idx = _skip_ws(text, idx)
+            if not text.startswith(":", idx):
+                raise json.JSONDecodeError("Expecting ':' delimiter", text, idx)
+            start = idx = _skip_ws(text, idx + 1)
+            if stop_at_key and name == key:
+                return obj, (start, -1)
+            try:
+                value, idx = _scan_once(text, idx)
+            except StopIteration as e:
+                raise json.JSONDecodeError("Expecting value", text, e.value) from None
+            obj[name] = value
+            if name == key:
+                span = (start, idx)
+            idx = _skip_ws(text, idx)
+            if text.startswith(",", idx):
+                idx = _skip_ws(text, idx + 1)
+            elif text.startswith("}", idx):
+                idx += 1
+                break
+            else:
+                raise json.JSONDecodeError("Expecting ',' delimiter", text, idx)
+    idx = _skip_ws(text, idx)
+    if idx != len(text):
+        raise json.JSONDecodeError("Extra data", text, idx)
+    return obj, span
+
+
+def decode_check_request(raw: bytes, max_body_size: int) -> Tuple[Any, int]:
+    """
+    Decode a security check request and size its ``body`` from the raw bytes.
+
+    When the whole request fits within ``max_body_size`` the body cannot
+    exceed it, so the request size is returned as an upper bound and the
+    body is not measured.
+
+    Args:
+        raw: Request bytes
+        max_body_size: Body size limit (in bytes)
+
+    Returns:
+        The decoded request and the size of its body in bytes
+
+    Raises:
+        json.JSONDecodeError: If the request is not valid JSON
+        UnicodeDecodeError: If the request is not valid UTF-8
+    """
+    text = raw.decode("utf-8")
+    if len(raw) <= max_body_size:
+        return json.loads(text), len(raw)
+    data, span = decode_with_span(text, "body")
+    if span is None or data["body"] is None:
+        return data, 0
+    start, end = span
+    if raw.isascii():
+        return data, end - start
+    return data, len(text[start:end].encode("utf-8"))
+
+
+def decode_check_request_fast(raw: bytes, max_body_size: int) -> Optional[Tuple[dict, int]]:
+    """
+    Decode a security check request with orjson, sizing its body cheaply.
+
+    When the body has to be measured and is the last member, as clients
+    send it, its end is the end of the document, so only the members before
+    it are walked instead of the whole request. A repeated ``body`` member is
+    then counted in full. Anything but a valid JSON object returns None, and
+    the caller falls back to ``decode_check_request`` so errors are reported
+    exactly as before.
+
+    Args:
+        raw: Request bytes
+        max_body_size: Body size limit (in bytes)
+
+    Returns:
+        The decoded request and the size of its body in bytes, or None
+    """
+    if orjson is None:
+        return None
+    try:
+        data = orjson.loads(raw)
+    except orjson.JSONDecodeError:
+        return None
+    if type(data) is not dict:
+        return None
+    if len(raw) <= max_body_size:
+        return data, len(raw)
+    if data.get("body") is None:
+        return data, 0
+
+    text = raw.decode("utf-8")
+    if next(reversed(data)) == "body":
+        _, (start, _) = decode_with_span(text, "body", stop_at_key=True)
+        # orjson has validated the document, so the body ends at its closing brace
+        end = len(text[:len(text.rstrip(_JSON_WHITESPACE)) - 1].rstrip(_JSON_WHITESPACE))
+    else:
+        _, (start, end) = decode_with_span(text, "body")
+    if raw.isascii():
+        return data, end - start
+    return data, len(text[start:end].encode("utf-8"))
+
+
+def encoded_size(body: Any) -> int:
+    """Size in bytes of a decoded body in compact JSON, for bodies without raw bytes."""
+    if not body:
+        return 0
+    return len(json.dumps(body, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
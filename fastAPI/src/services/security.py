@@ -4,17 +4,82 @@ Security Service
 This module contains the business logic for security threat analysis.
 """
 
+import hashlib
+import json
+from functools import lru_cache
+from typing import Any, Optional, Tuple
 from fastapi import Request
+from pydantic import ValidationError
 from src.schemas.security import SecurityCheckRequest, SecurityCheckResponse
-from src.core.config import get_settings
+from src.core.config import Config as Settings, add_reload_listener, get_settings
+from src.core.metrics import BODY_SCANS, SECURITY_VERDICTS
+from src.core.timing import phase
+from src.services.body_scanner import BodyScanner, BodyScanResult, get_body_scan_pool
+from src.services.reputation import ReputationStore, client_identity
+from src.services.request_decoder import encoded_size
+from src.services.threat_rules import ThreatPatternEngine, load_threat_engine
+from src.services.verdict_cache import VerdictCache
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is listed in requirements.txt
+    orjson = None
 
 class SecurityService:
     """Service for analyzing security threats in incoming requests."""
     
+    def __init__(
+        self,
+        engine: Optional[ThreatPatternEngine] = None,
+        cache: Optional[VerdictCache] = None,
+        reputation: Optional[ReputationStore] = None,
+        reputation_threshold: int = 10,
+        body_scanner: Optional[BodyScanner] = None,
+        body_scan_inline_max: int = 32768
+    ):
+        self.engine = engine or ThreatPatternEngine()
+        self.cache = cache
+        self.reputation = reputation
+        self.reputation_threshold = reputation_threshold
+        self.body_scanner = body_scanner
+        self.body_scan_inline_max = body_scan_inline_max
+    
+    def apply_settings(self, settings: Settings) -> None:
+        """
+        Rebuild the threat engine and body scanner and resize the verdict
+        cache and reputation store after a reload.
+        
+        Changed rules or limits invalidate cached verdicts on their next
+        lookup; a changed reputation window starts a new store.
+        
+        Args:
+            settings: The new settings snapshot
+        """
+        self.reputation_threshold = settings.REPUTATION_THREAT_THRESHOLD
+        if not settings.REPUTATION_ENABLED:
+            self.reputation = None
+        elif self.reputation is None or self.reputation.window != settings.REPUTATION_WINDOW:
+            self.reputation = _create_reputation_store(settings)
+        else:
+            self.reputation.max_bytes = settings.REPUTATION_MAX_BYTES
+        self.engine = load_threat_engine(settings.THREAT_RULES_FILE)
+        self.body_scanner = _create_body_scanner(self.engine, settings)
+        self.body_scan_inline_max = settings.BODY_SCAN_INLINE_MAX_BYTES
+        if not settings.VERDICT_CACHE_ENABLED:
+            self.cache = None
+        elif self.cache is None:
+            self.cache = _create_verdict_cache(settings)
+        else:
+            self.cache.max_entries = settings.VERDICT_CACHE_MAX_ENTRIES
+            self.cache.max_bytes = settings.VERDICT_CACHE_MAX_BYTES
+            self.cache.ttl = settings.VERDICT_CACHE_TTL
+    
     async def analyze_request(
         self,
         request: Request,
-        check_request: SecurityCheckRequest
+        check_request: SecurityCheckRequest,
+        body_size: Optional[int] = None,
+        raw: Optional[bytes] = None
     ) -> dict:
         """
         Analyze a request for potential security threats.
@@ -22,74 +87,294 @@ class SecurityService:
         Args:
             request: The FastAPI request object
             check_request: The security check request data
+            body_size: Size of the body in bytes as received, or an upper
+                bound of it; measured from the decoded body when omitted
+            raw: The check request as received, decoded again by a scan
+                worker instead of pickling a large body to it
+            
+        Returns:
+            Dictionary containing security analysis results; cached results
+            are shared and must not be mutated
+        """
+        if body_size is None:
+            body_size = encoded_size(check_request.body)
+        body_scan = await self.scan_body(check_request, body_size, raw)
+        result = self._evaluate(check_request, body_size=body_size, body_scan=body_scan)[0]
+        _note_verdict(request, result)
+        return result
+    
+    async def analyze_request_json(
+        self,
+        request: Request,
+        check_request: SecurityCheckRequest,
+        body_size: Optional[int] = None,
+        raw: Optional[bytes] = None
+    ) -> bytes:
+        """
+        Analyze a request and return the result as a JSON response body.
+        
+        The body is byte-for-byte what ``JSONResponse`` would render; cache
+        hits return it without re-serializing.
+        
+        Args:
+            request: The FastAPI request object
+            check_request: The security check request data
+            body_size: Size of the body in bytes as received, or an upper
+                bound of it; measured from the decoded body when omitted
+            raw: The check request as received, decoded again by a scan
+                worker instead of pickling a large body to it
+            
+        Returns:
+            Security analysis results encoded as JSON
+        """
+        if body_size is None:
+            body_size = encoded_size(check_request.body)
+        body_scan = await self.scan_body(check_request, body_size, raw)
+        result, body = self._evaluate(check_request, serialize=True, body_size=body_size, body_scan=body_scan)
+        _note_verdict(request, result)
+        return body
+    
+    def evaluate_json(
+        self,
+        check_request: SecurityCheckRequest,
+        body_size: Optional[int] = None,
+        body_scan: Optional[BodyScanResult] = None
+    ) -> bytes:
+        """
+        Analyze a request received outside HTTP and return the JSON verdict.
+        
+        Used by the check socket, which has no ``Request`` to flag and
+        awaits only the scans of large bodies (see ``offloads_body_scan``).
+        
+        Args:
+            check_request: The security check request data
+            body_size: Size of the body in bytes as received, or an upper
+                bound of it; measured from the decoded body when omitted
+            body_scan: Result of ``scan_body``; the body is scanned inline
+                when omitted
+            
+        Returns:
+            Security analysis results encoded as JSON
+        """
+        if body_scan is None:
+            body_scan = self._scan_inline(check_request)
+        return self._evaluate(check_request, serialize=True, body_size=body_size, body_scan=body_scan)[1]
+    
+    def offloads_body_scan(self, check_request: SecurityCheckRequest, body_size: int) -> bool:
+        """Whether ``scan_body`` would send this body to the scan pool."""
+        return (
+            self.body_scanner is not None
+            and bool(check_request.body)
+            and body_size > self.body_scan_inline_max
+            and get_body_scan_pool().workers > 0
+        )
+    
+    async def scan_body(
+        self,
+        check_request: SecurityCheckRequest,
+        body_size: int,
+        raw: Optional[bytes] = None
+    ) -> BodyScanResult:
+        """
+        Match the body against the body signatures.
+        
+        Bodies up to ``BODY_SCAN_INLINE_MAX_BYTES`` are scanned inline;
+        larger ones in the scan pool, so the event loop keeps serving other
+        requests meanwhile.
+        
+        Args:
+            check_request: The security check request data
+            body_size: Size of the body in bytes as received
+            raw: The check request as received; the scan worker decodes it
+                instead of receiving the decoded body
             
         Returns:
-            Dictionary containing security analysis results
+            The scan result
+        """
+        if not self.offloads_body_scan(check_request, body_size):
+            return self._scan_inline(check_request)
+        with phase("scan"):
+            result = await get_body_scan_pool().scan(self.body_scanner, check_request.body, raw)
+        _count_body_scan("offloaded", result)
+        return result
+    
+    def _scan_inline(self, check_request: SecurityCheckRequest) -> BodyScanResult:
+        if self.body_scanner is None or not check_request.body:
+            return _NOT_SCANNED
+        with phase("scan"):
+            result = self.body_scanner.scan(check_request.body)
+        _count_body_scan("inline", result)
+        return result
+    
+    def _evaluate(
+        self,
+        check_request: SecurityCheckRequest,
+        serialize: bool = False,
+        body_size: Optional[int] = None,
+        body_scan: Optional[BodyScanResult] = None
+    ) -> Tuple[dict, bytes]:
+        """Return the verdict and, when cached or requested, its JSON body."""
+        max_body_size = get_settings().MAX_BODY_SIZE
+        if body_size is None:
+            body_size = encoded_size(check_request.body)
+        
+        if body_scan is not None and not body_scan.clean:
+            # Body findings depend on the body, which cache keys leave out
+            with phase("analyze"):
+                result = self._compute_verdict(check_request, body_size, max_body_size, body_scan)
+            body = None
+        elif self.cache is None:
+            with phase("analyze"):
+                result = self._compute_verdict(check_request, body_size, max_body_size)
+            body = None
+        else:
+            self.cache.ensure_generation((self.engine.fingerprint, max_body_size))
+            key = (
+                check_request.method.upper(),
+                check_request.path,
+                # Names, and values of headers that value rules inspect
+                self.engine.header_cache_key(check_request.headers),
+                # Every body within the limit yields the same verdict; oversized
+                # bodies are keyed exactly since their size appears in the details.
+                body_size if body_size > max_body_size else 0,
+            )
+            cached = self.cache.get(key)
+            if cached is None:
+                with phase("analyze"):
+                    result = self._compute_verdict(check_request, body_size, max_body_size)
+                with phase("serialize"):
+                    cached = (result, encode_verdict(result))
+                self.cache.put(key, *cached)
+            result, body = cached
+        
+        if self.reputation is not None:
+            escalated = self._apply_reputation(check_request, result)
+            if escalated is not result:
+                result, body = escalated, None
+        
+        SECURITY_VERDICTS.inc((result["threat_level"],))
+        if not serialize:
+            return result, body or b""
+        if body is None:
+            with phase("serialize"):
+                body = encode_verdict(result)
+        return result, body
+    
+    def _apply_reputation(self, check_request: SecurityCheckRequest, result: dict) -> dict:
+        """
+        Record the verdict against the client and escalate repeat offenders.
+        
+        A threat from a client with more than ``REPUTATION_THREAT_THRESHOLD``
+        threats in the reputation window is raised one threat level. The
+        cached verdict is left untouched; an escalated copy is returned.
         """
-        settings = get_settings()
+        identity = client_identity(check_request.headers, self.reputation.secret)
+        if identity is None:
+            return result
+        _, threats = self.reputation.record(identity, result["is_threat"])
+        if not result["is_threat"] or threats <= self.reputation_threshold:
+            return result
+        levels = ["Low"] + [level for level, _ in reversed(self.engine.levels)]
+        current = levels.index(result["threat_level"]) if result["threat_level"] in levels else 0
+        if current + 1 >= len(levels):
+            return result
+        return {
+            "is_threat": True,
+            "threat_level": levels[current + 1],
+            "details": {
+                **result["details"],
+                "reputation": f"Client sent {threats} threats in the last {self.reputation.window:g} seconds",
+            },
+            "recommendations": {
+                **result["recommendations"],
+                "reputation": "Consider throttling or blocking this client",
+            },
+        }
+    
+    def _compute_verdict(
+        self,
+        check_request: SecurityCheckRequest,
+        body_size: int,
+        max_body_size: int,
+        body_scan: Optional[BodyScanResult] = None
+    ) -> dict:
+        """Run the threat checks for one request."""
         threat_details = {}
-        threat_level = "Low"
+        score = 0
+        scores = self.engine.scores
         
         # Check body size
-        if check_request.body:
-            body_size = len(str(check_request.body))
-            if body_size > settings.MAX_BODY_SIZE:
-                threat_details["body_size"] = f"Body size {body_size} exceeds limit of {settings.MAX_BODY_SIZE}"
-                threat_level = "Medium"
+        if body_size > max_body_size:
+            threat_details["body_size"] = f"Body size {body_size} exceeds limit of {max_body_size}"
+            score += scores["body_size"]
         
         # Check for suspicious headers
-        suspicious_headers = self._check_suspicious_headers(check_request.headers)
+        suspicious_headers, header_score = self._check_suspicious_headers(check_request.headers)
         if suspicious_headers:
             threat_details["suspicious_headers"] = suspicious_headers
-            threat_level = "High" if len(suspicious_headers) > 2 else "Medium"
+            score += header_score
         
         # Check for suspicious paths
         if self._is_suspicious_path(check_request.path):
             threat_details["suspicious_path"] = f"Suspicious path pattern detected: {check_request.path}"
-            threat_level = "High"
+            score += scores["path"]
+        
+        # Add the findings of the body scan
+        if body_scan is not None:
+            if body_scan.findings:
+                threat_details["body_signatures"] = dict(body_scan.findings)
+                score += sum(scores.get(category, scores["body_signature"]) for category in body_scan.findings)
+            if body_scan.incomplete is not None:
+                threat_details["body_scan"] = body_scan.incomplete
+                score += scores["body_scan"]
         
         is_threat = bool(threat_details)
         
         return {
             "is_threat": is_threat,
-            "threat_level": threat_level if is_threat else "Low",
+            "threat_level": self.engine.threat_level(score) if is_threat else "Low",
             "details": threat_details,
             "recommendations": self._get_recommendations(threat_details) if is_threat else {}
         }
     
-    def _check_suspicious_headers(self, headers: dict) -> dict:
-        """Check for suspicious headers."""
-        suspicious = {}
-        
-        # List of potentially dangerous headers
-        dangerous_headers = [
-            "x-forwarded-for",
-            "x-real-ip",
-            "x-remote-addr",
-            "x-originating-ip",
-            "x-remote-ip"
-        ]
-        
-        for header in dangerous_headers:
-            if header in headers.keys():
-                suspicious[header] = "Potentially dangerous header detected"
-                
-        return suspicious
+    async def analyze_item(
+        self,
+        request: Request,
+        index: int,
+        item: Any,
+        size_hint: Optional[int] = None
+    ) -> dict:
+        """
+        Validate and analyze one item of a batch or streaming check.
+        
+        Invalid items produce an error entry instead of failing the batch.
+        
+        Args:
+            request: The FastAPI request object carrying the batch
+            index: Position of the item in the batch
+            item: Raw decoded item
+            size_hint: Size in bytes of the item as received; when it is within
+                ``MAX_BODY_SIZE`` the body is not measured
+            
+        Returns:
+            Dictionary with the item index and either a result or an error
+        """
+        try:
+            check_request = SecurityCheckRequest.model_validate(item)
+        except ValidationError as e:
+            return {"index": index, "result": None, "error": _format_validation_error(e)}
+        if size_hint is not None and size_hint > get_settings().MAX_BODY_SIZE:
+            size_hint = None
+        result = await self.analyze_request(request, check_request, size_hint)
+        return {"index": index, "result": result, "error": None}
+    
+    def _check_suspicious_headers(self, headers: dict) -> Tuple[dict, int]:
+        """Check for suspicious headers, returning the findings and their score."""
+        return self.engine.inspect_headers(headers)
     
     def _is_suspicious_path(self, path: str) -> bool:
         """Check if the path contains suspicious patterns."""
-        suspicious_patterns = [
-            "../",
-            "..\\",
-            "exec",
-            "eval",
-            "system",
-            "/etc/",
-            "cmd",
-            "powershell"
-        ]
-        
-        return any(pattern in path.lower() for pattern in suspicious_patterns)
+        return self.engine.match_path(path) is not None
     
     def _get_recommendations(self, threat_details: dict) -> dict:
         """Generate security recommendations based on threats."""
@@ -104,4 +389,125 @@ class SecurityService:
         if "suspicious_path" in threat_details:
             recommendations["path"] = "Implement strict path validation and consider using a web application firewall"
             
+        if "body_signatures" in threat_details:
+            recommendations["body"] = "Validate and encode body fields; use parameterized queries and never pass them to a shell"
+            
+        if "body_scan" in threat_details:
+            recommendations["body_scan"] = "Reject deeply nested or oversized JSON bodies before they reach the application"
+            
         return recommendations
+
+
+# Result for requests without a body, or with body scanning disabled
+_NOT_SCANNED = BodyScanResult({})
+
+
+def _count_body_scan(mode: str, result: BodyScanResult) -> None:
+    if result.findings:
+        outcome = "threat"
+    elif result.incomplete is not None:
+        outcome = "incomplete"
+    else:
+        outcome = "clean"
+    BODY_SCANS.inc((mode, outcome))
+
+
+def _note_verdict(request: Optional[Request], result: dict) -> None:
+    """Flag the request as a threat so its log record is never sampled out."""
+    if result["is_threat"] and request is not None:
+        request.state.threat_detected = True
+
+
+def _encode_verdict_json(result: dict) -> bytes:
+    return json.dumps(
+        result,
+        ensure_ascii=False,
+        allow_nan=False,
+        indent=None,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+# The verdict for a clean request never changes; its body is built once
+_CLEAN_VERDICT = {"is_threat": False, "threat_level": "Low", "details": {}, "recommendations": {}}
+_CLEAN_VERDICT_JSON = _encode_verdict_json(_CLEAN_VERDICT)
+
+
+def encode_verdict(result: dict) -> bytes:
+    """
+    Serialize a verdict exactly as ``JSONResponse`` renders it.
+
+    orjson, when installed, writes the same compact UTF-8 JSON as
+    ``json.dumps(ensure_ascii=False, separators=(",", ":"))``.
+    """
+    if not result["is_threat"] and result == _CLEAN_VERDICT:
+        return _CLEAN_VERDICT_JSON
+    if orjson is not None:
+        return orjson.dumps(result)
+    return _encode_verdict_json(result)
+
+
+def _format_validation_error(error: ValidationError) -> str:
+    """Flatten a Pydantic validation error into a single line."""
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'item'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def _create_verdict_cache(settings: Settings) -> VerdictCache:
+    return VerdictCache(
+        max_entries=settings.VERDICT_CACHE_MAX_ENTRIES,
+        max_bytes=settings.VERDICT_CACHE_MAX_BYTES,
+        ttl=settings.VERDICT_CACHE_TTL,
+    )
+
+
+def _create_reputation_store(settings: Settings) -> ReputationStore:
+    # Derived from a secret every worker has, so their snapshots use the same identities
+    secret = hashlib.sha256(b"reputation:" + settings.EXPRESS_API_KEY.encode()).digest()
+    return ReputationStore(
+        window=settings.REPUTATION_WINDOW, max_bytes=settings.REPUTATION_MAX_BYTES, secret=secret
+    )
+
+
+def _create_body_scanner(engine: ThreatPatternEngine, settings: Settings) -> Optional[BodyScanner]:
+    if not settings.BODY_SCAN_ENABLED:
+        return None
+    return BodyScanner(
+        engine.body_signatures,
+        max_depth=settings.BODY_SCAN_MAX_DEPTH,
+        max_nodes=settings.BODY_SCAN_MAX_NODES,
+        max_chars=settings.BODY_SCAN_MAX_CHARS,
+    )
+
+
+@lru_cache
+def get_security_service() -> SecurityService:
+    """
+    Get the application-wide security service.
+
+    The threat engine is compiled once from ``THREAT_RULES_FILE`` (or the
+    built-in rules) and reused for every request, together with the verdict
+    cache when ``VERDICT_CACHE_ENABLED`` is set and the client reputation
+    store when ``REPUTATION_ENABLED`` is set and the body scanner when
+    ``BODY_SCAN_ENABLED`` is set. All are rebuilt when settings are
+    reloaded.
+
+    Returns:
+        SecurityService: Shared security service instance
+    """
+    settings = get_settings()
+    cache = _create_verdict_cache(settings) if settings.VERDICT_CACHE_ENABLED else None
+    reputation = _create_reputation_store(settings) if settings.REPUTATION_ENABLED else None
+    engine = load_threat_engine(settings.THREAT_RULES_FILE)
+    service = SecurityService(
+        engine,
+        cache,
+        reputation,
+        settings.REPUTATION_THREAT_THRESHOLD,
+        _create_body_scanner(engine, settings),
+        settings.BODY_SCAN_INLINE_MAX_BYTES,
+    )
+    add_reload_listener(service.apply_settings)
+    return service
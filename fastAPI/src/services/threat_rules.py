@@ -0,0 +1,373 @@
+"""
+Threat Rules
+
+This module compiles path signatures and declarative header rules into a
+long-lived matching engine used by the security service, holds the body
+signatures applied by ``src.services.body_scanner``, and turns the scores
+of the findings into a threat level.
+"""
+
+import hashlib
+import json
+import re
+from typing import Dict, Hashable, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+
+DEFAULT_PATH_PATTERNS = [
+    "../",
+    "..\\",
+    "exec",
+    "eval",
+    "system",
+    "/etc/",
+    "cmd",
+    "powershell",
+]
+
+DEFAULT_HEADER_NAMES = [
+    "x-forwarded-for",
+    "x-real-ip",
+    "x-remote-addr",
+    "x-originating-ip",
+    "x-remote-ip",
+]
+
+# Rule name matching every header
+ANY_HEADER = "*"
+
+PRESENT_MESSAGE = "Potentially dangerous header detected"
+
+# Signature category -> regular expressions, matched against lowercased text.
+# Most start with a literal, which the regex engine finds with a fast
+# substring search instead of trying the pattern at every position.
+DEFAULT_BODY_SIGNATURES = {
+    "sql_injection": [
+        r"union\s+(?:all\s+)?select\b",
+        # Quote-breaking tautologies (' or '1'='1) and trailing comments (admin'--)
+        r"['\"`]\s*(?:(?:or|and)\s+(['\"`]?)(\w+)\1\s*(?:=|like\b)\s*['\"`]?\2\b|(?:--|#)\s*(?=\x00|$)|/\*)",
+        r" (?:or|and)\s+(\d+)\s*=\s*\1\b",
+        r";\s*(?:drop\s+(?:table|database)|delete\s+from|insert\s+into|update\s+\w+\s+set|alter\s+table"
+        r"|truncate\s+table|create\s+(?:table|user)|exec(?:ute)?\s+(?:xp_|sp_|master\.)|shutdown\s*(?:--|#|/\*|with\b))",
+        r"sleep\s*\(\s*\d+\s*\)",
+        r"benchmark\s*\(\s*\d+\s*,",
+        r"waitfor\s+delay\s+'",
+        r"information_schema",
+        r"xp_cmdshell",
+    ],
+    "xss": [
+        r"</?(?:script|iframe|object|embed|applet|meta|base|svg)\b",
+        # Event handler attributes inside a tag: <img src=x onerror=...>
+        r"<[a-z][^>\x00]{0,256}?\son[a-z]+\s*=",
+        r"javascript:[^\s\x00]",
+        r"vbscript:[^\s\x00]",
+        r"data\s*:\s*text/html",
+        r"document\s*\.\s*(?:cookie|domain|write)\b",
+    ],
+    "command_injection": [
+        # A command after a shell separator, ending the string or followed by an argument-like token
+        r"[;&|`]\s*(?:cat|ls|id|whoami|uname|wget|curl|nc|ncat|bash|sh|zsh|python[23]?|perl|ruby|php|rm|chmod"
+        r"|powershell|cmd(?:\.exe)?)(?:\s*(?=[\x00;&|<>`)]|$)|\s+(?:[-/.~$'\"\d]|(?:https?|ftp)://))",
+        r"\$\(\s*(?:cat|ls|id|whoami|uname|wget|curl|nc|bash|sh|rm)\b",
+        r"\$\{ifs\}",
+        r"/bin/(?:ba|z|da)?sh\b",
+        r"/etc/(?:passwd|shadow)\b",
+    ],
+}
+
+# Score added by the non-header checks; body signature categories without
+# a score of their own use "body_signature"
+DEFAULT_SCORES = {"path": 3, "body_size": 1, "body_signature": 3, "body_scan": 1}
+
+# Minimum total score per threat level, highest first; lower scores are Low
+DEFAULT_LEVELS = (("High", 3), ("Medium", 1))
+
+
+# Signatures as (category, patterns) pairs, hashable so worker processes can cache their scanner
+Signatures = Tuple[Tuple[str, Tuple[str, ...]], ...]
+
+
+def freeze_signatures(signatures: Mapping[str, Iterable[str]]) -> Signatures:
+    """Return signatures as sorted, hashable (category, patterns) pairs."""
+    return tuple(sorted((category, tuple(patterns)) for category, patterns in signatures.items() if patterns))
+
+
+class HeaderRule(NamedTuple):
+    """
+    Declarative header rule.
+
+    A rule applies to the header named ``name`` (case-insensitive; ``*``
+    applies to every header) and matches when all of its conditions hold:
+    a value matches ``pattern``, a value is longer than ``max_length``, or
+    the header has more than ``max_count`` values, counting repeated names
+    and comma-separated items. A rule without conditions matches whenever
+    the header is present.
+    """
+    name: str
+    pattern: Optional[str] = None
+    max_length: Optional[int] = None
+    max_count: Optional[int] = None
+    score: int = 1
+    message: Optional[str] = None
+
+
+class _CompiledHeaderRule(NamedTuple):
+    regex: Optional["re.Pattern[str]"]
+    max_length: Optional[int]
+    max_count: Optional[int]
+    score: int
+    message: str
+
+
+def _compile_header_rule(rule: HeaderRule) -> _CompiledHeaderRule:
+    message = rule.message
+    if message is None:
+        if rule.pattern is not None:
+            message = f"Header value matches suspicious pattern {rule.pattern!r}"
+        elif rule.max_length is not None:
+            message = f"Header value longer than {rule.max_length} characters"
+        elif rule.max_count is not None:
+            message = f"Header repeated more than {rule.max_count} times"
+        else:
+            message = PRESENT_MESSAGE
+    regex = re.compile(rule.pattern) if rule.pattern is not None else None
+    return _CompiledHeaderRule(regex, rule.max_length, rule.max_count, rule.score, message)
+
+
+def _inspects_values(rule: HeaderRule) -> bool:
+    """Whether the rule looks at header values rather than only at the header's presence."""
+    return rule.pattern is not None or rule.max_length is not None or rule.max_count is not None
+
+
+def _header_rule_matches(rule: _CompiledHeaderRule, values: Sequence[str]) -> bool:
+    if rule.max_count is not None and sum(value.count(",") + 1 for value in values) <= rule.max_count:
+        return False
+    if rule.max_length is not None and all(len(value) <= rule.max_length for value in values):
+        return False
+    if rule.regex is not None and not any(rule.regex.search(value) for value in values):
+        return False
+    return True
+
+
+def _compile_trie(patterns: Iterable[str]) -> Optional["re.Pattern[str]"]:
+    """
+    Compile substring patterns into a single trie-shaped regular expression.
+
+    Shared prefixes are merged so that, at each position of the input, the
+    regex engine only follows one branch per character instead of trying
+    every pattern in turn. A pattern that extends another one can never
+    produce an earlier match and is dropped.
+
+    Args:
+        patterns: Lowercase substring signatures
+
+    Returns:
+        The compiled pattern, or None when there are no signatures
+    """
+    trie: Dict[str, dict] = {}
+    for pattern in patterns:
+        if not pattern:
+            continue
+        node = trie
+        for char in pattern:
+            if "" in node:
+                break
+            node = node.setdefault(char, {})
+        else:
+            node.clear()
+            node[""] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        if "" in node:
+            return ""
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items())]
+        if len(branches) == 1:
+            return branches[0]
+        return "(?:" + "|".join(branches) + ")"
+
+    if not trie:
+        return None
+    return re.compile(build(trie))
+
+
+class ThreatPatternEngine:
+    """
+    Compiled path signatures and header rules.
+
+    The engine is built once and shared across requests; matching cost
+    depends on the size of the request, not on the number of signatures.
+    Header rules are indexed by lowercase header name, so a request only
+    evaluates the rules of the headers it carries.
+    """
+
+    def __init__(
+        self,
+        path_patterns: Iterable[str] = DEFAULT_PATH_PATTERNS,
+        header_names: Iterable[str] = DEFAULT_HEADER_NAMES,
+        header_rules: Iterable[HeaderRule] = (),
+        scores: Optional[Mapping[str, int]] = None,
+        levels: Optional[Mapping[str, int]] = None,
+        body_signatures: Mapping[str, Iterable[str]] = DEFAULT_BODY_SIGNATURES,
+    ):
+        self.path_patterns = tuple(dict.fromkeys(p.lower() for p in path_patterns if p))
+        self.header_names = frozenset(h.lower() for h in header_names if h)
+        # Listed header names are presence rules
+        self.header_rules = tuple(HeaderRule(name) for name in sorted(self.header_names)) + tuple(
+            rule._replace(name=rule.name.lower()) for rule in header_rules
+        )
+        self.scores = {**DEFAULT_SCORES, **(scores or {})}
+        self.levels = tuple(sorted(levels.items(), key=lambda item: -item[1])) if levels else DEFAULT_LEVELS
+        self.body_signatures = freeze_signatures(body_signatures)
+        for _, patterns in self.body_signatures:
+            # Compiled here so a broken rule pack fails to load, not in a scan worker
+            for pattern in patterns:
+                re.compile(pattern)
+        self._path_regex = _compile_trie(self.path_patterns)
+        self._header_table: Dict[str, List[_CompiledHeaderRule]] = {}
+        self._any_header_rules: List[_CompiledHeaderRule] = []
+        for rule in self.header_rules:
+            compiled = _compile_header_rule(rule)
+            if rule.name == ANY_HEADER:
+                self._any_header_rules.append(compiled)
+            else:
+                self._header_table.setdefault(rule.name, []).append(compiled)
+        # Headers whose values decide findings, and so must be part of cache keys
+        self._value_header_names = frozenset(
+            rule.name for rule in self.header_rules if rule.name != ANY_HEADER and _inspects_values(rule)
+        )
+        self._all_header_values = any(
+            _inspects_values(rule) for rule in self.header_rules if rule.name == ANY_HEADER
+        )
+        self.fingerprint = hash((
+            self.path_patterns,
+            self.header_rules,
+            tuple(sorted(self.scores.items())),
+            self.levels,
+            self.body_signatures,
+        ))
+
+    @classmethod
+    def from_file(cls, rules_file: str) -> "ThreatPatternEngine":
+        """
+        Load a rule pack from a JSON file.
+
+        The file holds an object with optional ``path_patterns`` and
+        ``header_names`` lists and ``body_signatures`` mapping (category to
+        lowercase regular expressions), where a missing entry falls back to
+        the defaults, and optional ``header_rules`` (objects with the fields
+        of ``HeaderRule``), ``scores`` and ``levels`` mappings.
+
+        Args:
+            rules_file: Path to the rule pack
+
+        Returns:
+            Compiled engine for the rule pack
+        """
+        with open(rules_file, encoding="utf-8") as fh:
+            pack = json.load(fh)
+        return cls(
+            path_patterns=pack.get("path_patterns", DEFAULT_PATH_PATTERNS),
+            header_names=pack.get("header_names", DEFAULT_HEADER_NAMES),
+            header_rules=[HeaderRule(**rule) for rule in pack.get("header_rules", ())],
+            scores=pack.get("scores"),
+            levels=pack.get("levels"),
+            body_signatures=pack.get("body_signatures", DEFAULT_BODY_SIGNATURES),
+        )
+
+    @property
+    def rule_count(self) -> int:
+        """Total number of compiled signatures and header rules."""
+        return len(self.path_patterns) + len(self.header_rules)
+
+    def match_path(self, path: str) -> Optional[str]:
+        """Return the first path signature found in ``path``, if any."""
+        if self._path_regex is None:
+            return None
+        match = self._path_regex.search(path.lower())
+        return match.group() if match else None
+
+    def match_headers(self, headers: Mapping[str, str]) -> List[str]:
+        """Return the lowercase names of suspicious headers present in ``headers``."""
+        return list(self.inspect_headers(headers)[0])
+
+    def inspect_headers(self, headers: Mapping[str, str]) -> Tuple[Dict[str, str], int]:
+        """
+        Evaluate the header rules against ``headers``.
+
+        Args:
+            headers: Request headers
+
+        Returns:
+            The message per suspicious lowercase header name and the total
+            score of the matched rules
+        """
+        table = self._header_table
+        any_rules = self._any_header_rules
+        present: Dict[str, List[str]] = {}
+        for name, value in headers.items():
+            name = name.lower()
+            if any_rules or name in table:
+                values = present.get(name)
+                if values is None:
+                    present[name] = [value]
+                else:
+                    values.append(value)
+
+        findings: Dict[str, str] = {}
+        score = 0
+        for name, values in present.items():
+            messages = []
+            for rules in (table.get(name, ()), any_rules):
+                for rule in rules:
+                    if _header_rule_matches(rule, values):
+                        messages.append(rule.message)
+                        score += rule.score
+            if messages:
+                findings[name] = "; ".join(messages)
+        return findings, score
+
+    def header_cache_key(self, headers: Mapping[str, str]) -> Hashable:
+        """
+        Reduce ``headers`` to what ``inspect_headers`` depends on, for verdict cache keys.
+
+        The lowercase header names, plus a digest of the values of every
+        header a value, length or count rule applies to, so requests that
+        only differ in such a value do not share a cached verdict.
+
+        Args:
+            headers: Request headers
+
+        Returns:
+            Hashable key part
+        """
+        names = tuple(sorted(name.lower() for name in headers))
+        value_names = self._value_header_names
+        if not value_names and not self._all_header_values:
+            return names
+        inspected = sorted(
+            (name.lower(), value) for name, value in headers.items()
+            if self._all_header_values or name.lower() in value_names
+        )
+        if not inspected:
+            return names
+        return names, hashlib.blake2b(json.dumps(inspected).encode(), digest_size=16).digest()
+
+    def threat_level(self, score: int) -> str:
+        """Map a total score to Low, Medium or High (or a custom level)."""
+        for level, minimum in self.levels:
+            if score >= minimum:
+                return level
+        return "Low"
+
+
+def load_threat_engine(rules_file: Optional[str] = None) -> ThreatPatternEngine:
+    """
+    Build the threat engine from a rule pack file or the built-in defaults.
+
+    Args:
+        rules_file: Optional path to a JSON rule pack
+
+    Returns:
+        Compiled threat engine
+    """
+    if rules_file:
+        return ThreatPatternEngine.from_file(rules_file)
+    return ThreatPatternEngine()
@@ -0,0 +1,110 @@
+"""
+Verdict Cache
+
+This module provides a bounded in-process cache for security check verdicts,
+keyed by a normalized fingerprint of the checked request.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Rough per-entry bookkeeping cost (key tuple, OrderedDict node, result dict)
+# added on top of the serialized body when enforcing the memory cap.
+ENTRY_OVERHEAD = 512
+
+
+class VerdictCache:
+    """
+    LRU cache with TTL expiry and a memory cap.
+
+    Each entry stores the verdict both as a dictionary and as the JSON body
+    sent on the wire, so a hit needs neither analysis nor serialization.
+    Entries are dropped wholesale whenever the generation (rule set and
+    limits the verdicts were computed with) changes.
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 16 * 1024 * 1024, ttl: float = 300.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, dict, bytes, int]]" = OrderedDict()
+        self._generation: Optional[Hashable] = None
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def ensure_generation(self, generation: Hashable) -> None:
+        """Invalidate the cache if ``generation`` differs from the cached one."""
+        if generation != self._generation:
+            if self._entries:
+                self.invalidations += 1
+            self.clear()
+            self._generation = generation
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self.size_bytes = 0
+
+    def get(self, key: Hashable) -> Optional[Tuple[dict, bytes]]:
+        """
+        Look up a verdict.
+
+        Args:
+            key: Request fingerprint
+
+        Returns:
+            The cached (result, body) pair, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, result, body, size = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.size_bytes -= size
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return result, body
+
+    def put(self, key: Hashable, result: dict, body: bytes) -> None:
+        """
+        Store a verdict, evicting least recently used entries as needed.
+
+        Args:
+            key: Request fingerprint
+            result: Verdict dictionary; must not be mutated afterwards
+            body: The verdict serialized as a response body
+        """
+        size = len(body) + ENTRY_OVERHEAD
+        if size > self.max_bytes or self.max_entries <= 0:
+            return
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.size_bytes -= previous[3]
+        self._entries[key] = (time.monotonic() + self.ttl, result, body, size)
+        self.size_bytes += size
+        while len(self._entries) > self.max_entries or self.size_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size_bytes -= evicted[3]
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return cache counters."""
+        return {
+            "entries": len(self._entries),
+            "size_bytes": self.size_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
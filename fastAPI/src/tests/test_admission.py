@@ -0,0 +1,58 @@
+import asyncio
+
+from src.core.admission import LOW, LOOP_LAG, NO_SLOT, NORMAL, QUEUE_FULL, QUEUE_TIMEOUT, AdmissionController
+from src.core.metrics import EVENT_LOOP_LAG
+
+
+def test_queue_hands_slots_over_in_order_and_sheds_beyond_bounds():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=1, queue_size=1, queue_timeout=0.05, max_loop_lag=0)
+        gate = controller.gate("security")
+        assert await controller.acquire(gate, NORMAL) is None
+        # Unauthenticated requests never wait
+        assert await controller.acquire(gate, LOW) == NO_SLOT
+        waiting = asyncio.ensure_future(controller.acquire(gate, NORMAL))
+        await asyncio.sleep(0)
+        assert await controller.acquire(gate, NORMAL) == QUEUE_FULL
+        controller.release(gate)
+        assert await waiting is None
+        assert gate.in_flight == 1
+        assert await controller.acquire(gate, NORMAL) == QUEUE_TIMEOUT
+        assert not gate.waiters
+        controller.release(gate)
+        assert gate.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_loop_lag_sheds_at_once():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=10, max_loop_lag=0.1)
+        gate = controller.gate("security")
+        EVENT_LOOP_LAG.set((), 0.5)
+        try:
+            assert await controller.acquire(gate, NORMAL) == LOOP_LAG
+        finally:
+            EVENT_LOOP_LAG.set((), 0.0)
+        assert await controller.acquire(gate, NORMAL) is None
+
+    asyncio.run(scenario())
+
+
+def test_lowered_limit_applies_while_requests_queue():
+    async def scenario():
+        controller = AdmissionController(max_in_flight=2, queue_size=4, queue_timeout=1.0, max_loop_lag=0)
+        gate = controller.gate("security")
+        for _ in range(2):
+            assert await controller.acquire(gate, NORMAL) is None
+        waiting = asyncio.ensure_future(controller.acquire(gate, NORMAL))
+        await asyncio.sleep(0)
+        gate.limit = 1
+        controller.release(gate)
+        await asyncio.sleep(0)
+        assert not waiting.done() and gate.in_flight == 1
+        controller.release(gate)
+        assert await waiting is None
+        assert gate.in_flight == 1
+
+    asyncio.run(scenario())
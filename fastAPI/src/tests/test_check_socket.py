@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from src.services import check_socket
+from src.services.check_socket import CheckSocketClient, CheckSocketError, start_check_server, stop_check_server
+from src.services.security import SecurityService
+
+
+def test_session_answers_pipelined_checks(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    path = str(tmp_path / "check.sock")
+
+    async def scenario():
+        server = await start_check_server(path, SecurityService())
+        try:
+            with pytest.raises(CheckSocketError) as refused:
+                await CheckSocketClient.connect(path, "wrong")
+            assert refused.value.status == 403
+
+            client = await CheckSocketClient.connect(path, "test")
+            checks = [{"headers": {}, "path": f"/items/{i}", "method": "GET"} for i in range(50)]
+            checks.append({"headers": {}, "path": "/../etc/passwd", "method": "GET"})
+            verdicts = await asyncio.gather(*(client.check(check) for check in checks))
+            assert [v["is_threat"] for v in verdicts] == [False] * 50 + [True]
+            with pytest.raises(CheckSocketError) as invalid:
+                await client.check({"path": "/"})
+            assert invalid.value.status == 422
+            await client.close()
+        finally:
+            stop_check_server(server, path)
+
+    asyncio.run(scenario())
+
+
+class SlowScanService(SecurityService):
+    """Sends every body to a scan that finishes when released, counting the scans waiting."""
+
+    def __init__(self):
+        super().__init__()
+        self.waiting = 0
+        self.most_waiting = 0
+        self.release = asyncio.Event()
+
+    def offloads_body_scan(self, check_request, body_size):
+        return True
+
+    async def scan_body(self, check_request, body_size, raw=None):
+        self.waiting += 1
+        self.most_waiting = max(self.most_waiting, self.waiting)
+        await self.release.wait()
+        self.waiting -= 1
+        return None
+
+
+def test_offloaded_checks_are_capped_per_connection(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    monkeypatch.setattr(check_socket, "MAX_OFFLOADED", 4)
+    path = str(tmp_path / "check.sock")
+
+    async def scenario():
+        service = SlowScanService()
+        server = await start_check_server(path, service)
+        try:
+            client = await CheckSocketClient.connect(path, "test")
+            checks = [{"headers": {}, "path": f"/items/{i}", "method": "POST", "body": {"i": i}} for i in range(20)]
+            pending = asyncio.gather(*(client.check(check) for check in checks))
+            await asyncio.sleep(0.1)
+            assert service.waiting == 4
+            service.release.set()
+            verdicts = await asyncio.wait_for(pending, 10)
+            assert len(verdicts) == 20 and service.most_waiting == 4
+            await client.close()
+        finally:
+            stop_check_server(server, path)
+
+    asyncio.run(scenario())
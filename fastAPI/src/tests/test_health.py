@@ -0,0 +1,53 @@
+import asyncio
+import json
+
+import pytest
+
+from src.core.health import FAIL, OK, HealthMonitor
+
+
+class StubMonitor(HealthMonitor):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.status = OK
+        self.runs = 0
+
+    def run_checks(self):
+        self.runs += 1
+        return {"stub": {"status": self.status}}
+
+
+@pytest.fixture(autouse=True)
+def api_key(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+
+
+def test_probes_serve_the_last_snapshot():
+    monitor = StubMonitor()
+    assert monitor.ready_response()[0] == 503
+    monitor.refresh()
+    status_code, body = monitor.ready_response()
+    assert status_code == 200 and json.loads(body)["status"] == "ready"
+    monitor.status = FAIL
+    # Probing does not run the checks
+    assert monitor.ready_response()[0] == 200
+    assert monitor.runs == 1
+    monitor.refresh()
+    assert json.loads(monitor.ready_response()[1])["status"] == "not_ready"
+    monitor.status = OK
+    monitor.drain()
+    status_code, body = monitor.ready_response()
+    assert status_code == 503 and json.loads(body)["status"] == "draining"
+
+
+def test_liveness_follows_the_refresh_task():
+    async def scenario():
+        monitor = StubMonitor(interval=0.01)
+        monitor.start()
+        await asyncio.sleep(0.05)
+        assert monitor.runs > 1
+        assert monitor.live_response()[0] == 200
+        assert not monitor.live(now=monitor.snapshot.checked_at + 1.0)
+        monitor.stop()
+
+    asyncio.run(scenario())
@@ -0,0 +1,57 @@
+import hashlib
+import json
+from types import SimpleNamespace
+
+from src.core.keyring import ApiKey, Keyring, key_digest, load_keyring_file
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_keyring_file_accepts_digests_and_expiries(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"keys": [
+        {"label": "fleet-a", "sha256": hashlib.sha256(b"secret-a").hexdigest(), "rate_limit_per_minute": 600},
+        {"label": "fleet-b", "key": "secret-b", "expires": "1970-01-01T00:20:00Z"},
+    ]}))
+    clock = FakeClock()
+    keyring = Keyring(load_keyring_file(str(path)), clock=clock)
+    assert keyring.lookup("secret-a") == ApiKey("fleet-a", None, 600)
+    assert keyring.lookup("secret-b").label == "fleet-b"
+    clock.now = 1200.0
+    assert keyring.lookup("secret-b") is None
+    assert keyring.lookup("secret-c") is None
+
+
+def test_connection_cache_checks_the_presented_key():
+    keyring = Keyring({key_digest("a"): ApiKey("a")})
+    connection = ("10.0.0.1", 40000)
+    assert keyring.authenticate("a", connection).label == "a"
+    assert keyring.authenticate("a", connection).label == "a"
+    assert keyring.authenticate("b", connection) is None
+    keyring.authenticate("a", connection)
+    # Rotating the keys drops what connections had verified
+    keyring.replace({key_digest("b"): ApiKey("b")})
+    assert keyring.authenticate("a", connection) is None
+    assert keyring.authenticate("b", connection).label == "b"
+
+
+def test_bad_keyring_file_keeps_the_current_keys(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"keys": [{"label": "fleet-a", "key": "secret-a"}]}))
+    settings = SimpleNamespace(EXPRESS_API_KEY="default", KEYRING_FILE=str(path))
+    keyring = Keyring({})
+    assert keyring.reload(settings)
+    path.write_text("{not json")
+    # As a reload listener it must not raise, or later listeners would be skipped
+    keyring.apply_settings(settings)
+    assert keyring.lookup("secret-a").label == "fleet-a"
+    assert keyring.path == str(path)
+    path.write_text(json.dumps({"keys": [{"label": "fleet-b", "key": "secret-b"}]}))
+    assert keyring.reload(settings)
+    assert keyring.lookup("secret-a") is None and keyring.lookup("default") is not None
@@ -0,0 +1,95 @@
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.core import launcher
+from src.core.launcher import Launcher
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def _record(self, record):
+        self.records.append(record)
+
+    info = warning = error = exception = _record
+
+
+class StubLauncher(Launcher):
+    """Launcher whose workers exit with a scripted code, or wait to be signalled."""
+
+    def __init__(self, settings, exit_codes):
+        super().__init__(None, settings)
+        self.exit_codes = list(exit_codes)
+        self.spawned = 0
+        self.exit_code = None
+
+    def _spawn(self):
+        self.exit_code = self.exit_codes[self.spawned] if self.spawned < len(self.exit_codes) else None
+        self.spawned += 1
+        super()._spawn()
+
+    def _serve(self):
+        if self.exit_code is None:
+            time.sleep(30)
+        elif self.exit_code:
+            raise RuntimeError("worker failed")
+
+
+def settings(**overrides):
+    values = dict(WORKERS=1, WORKER_MAX_REQUESTS=0, WORKER_MAX_RSS_MB=0, GRACEFUL_TIMEOUT=5, CHECK_SOCKET_PATH=None)
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.fixture
+def records(monkeypatch):
+    recorder = RecordingLogger()
+    monkeypatch.setattr(launcher, "logger", recorder)
+    monkeypatch.setattr(launcher, "RESPAWN_DELAY", 0.0)
+    return recorder.records
+
+
+def reap_until(master: Launcher, condition) -> None:
+    deadline = time.monotonic() + 10
+    while not condition():
+        assert time.monotonic() < deadline, "workers were not reaped in time"
+        master._reap()
+        time.sleep(0.01)
+
+
+def exit_reasons(records) -> list:
+    return [record["reason"] for record in records if record["type"] == "worker_exited"]
+
+
+def test_crashed_workers_are_replaced_and_shutdown_stops_respawning(records):
+    master = StubLauncher(settings(), exit_codes=[1])
+    master._spawn()
+    reap_until(master, lambda: master.spawned == 2)
+    assert exit_reasons(records) == ["crashed"]
+    assert len(master.workers) == 1
+
+    master.stopping = True
+    master._shutdown()
+    assert master.workers == {}
+    assert master.spawned == 2
+    assert exit_reasons(records) == ["crashed", "shutdown"]
+
+
+def test_workers_are_recycled_past_max_requests_and_rss(records):
+    master = StubLauncher(settings(WORKER_MAX_REQUESTS=1000), exit_codes=[0])
+    master._spawn()
+    reap_until(master, lambda: master.spawned == 2)
+    assert exit_reasons(records) == ["max_requests"]
+
+    master.settings.WORKER_MAX_RSS_MB = 1
+    master._check_memory()
+    assert list(master.recycling.values()) == ["max_rss"]
+    reap_until(master, lambda: master.spawned == 3)
+    assert exit_reasons(records) == ["max_requests", "max_rss"]
+
+    master.stopping = True
+    master._shutdown()
+    assert master.workers == {}
@@ -0,0 +1,48 @@
+import json
+import logging
+
+import pytest
+from pythonjsonlogger import jsonlogger
+
+from src.core.log_formatter import FastJsonFormatter
+
+FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+
+def make_record(msg, extra=None) -> logging.LogRecord:
+    record = logging.getLogger("fastapi").makeRecord(
+        "fastapi", logging.WARNING, __file__, 1, msg, None, None, extra=extra
+    )
+    record.created = 1_700_000_000.25
+    record.msecs = 250.0
+    return record
+
+
+def decode_unique(line: str) -> dict:
+    def no_duplicates(pairs):
+        keys = [key for key, _ in pairs]
+        assert len(keys) == len(set(keys)), f"duplicate keys in {line}"
+        return dict(pairs)
+
+    return json.loads(line, object_pairs_hook=no_duplicates)
+
+
+@pytest.mark.parametrize("msg, extra", [
+    ("plain %s", None),
+    ({"type": "request_completed", "status_code": 200}, None),
+    ({"type": "custom", "name": "worker", "levelname": "AUDIT"}, None),
+    ({"type": "custom", "asctime": "now"}, {"request_id": "abc"}),
+])
+def test_records_match_json_formatter(msg, extra):
+    legacy = jsonlogger.JsonFormatter(FORMAT)
+    fast = FastJsonFormatter()
+    assert decode_unique(fast.format(make_record(msg, extra))) == json.loads(legacy.format(make_record(msg, extra)))
+
+
+def test_message_keys_replace_static_fields():
+    legacy = jsonlogger.JsonFormatter(FORMAT, static_fields={"service": "fastapi"})
+    fast = FastJsonFormatter(static_fields={"service": "fastapi"})
+    msg = {"service": "worker"}
+    fast_record = decode_unique(fast.format(make_record(msg)))
+    assert fast_record == json.loads(legacy.format(make_record(msg)))
+    assert fast_record["service"] == "worker"
@@ -0,0 +1,59 @@
+import io
+import logging
+
+import pytest
+
+from src.core.log_queue import LogPipeline
+
+
+def record(message: str, level: int = logging.INFO) -> logging.LogRecord:
+    return logging.LogRecord("fastapi", level, __file__, 1, message, None, None)
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_drop_policy_counts_records_that_do_not_fit():
+    pipeline = LogPipeline([], maxsize=3, overflow="drop")
+    for i in range(5):
+        pipeline.enqueue(record(str(i)))
+    stats = pipeline.stats()
+    assert stats["enqueued"] == 3 and stats["dropped"] == 2 and stats["queue_depth"] == 3
+
+
+def test_drop_debug_sheds_debug_records_past_the_high_water_mark():
+    pipeline = LogPipeline([], maxsize=4, overflow="drop_debug")
+    for i in range(3):
+        pipeline.enqueue(record(str(i)))
+    pipeline.enqueue(record("debug", logging.DEBUG))
+    assert pipeline.dropped == 1
+    pipeline.enqueue(record("info"))
+    pipeline.enqueue(record("overflow"))
+    assert pipeline.enqueued == 4 and pipeline.dropped == 2
+
+
+def test_unknown_overflow_policy_is_refused():
+    with pytest.raises(ValueError):
+        LogPipeline([], overflow="spill")
+
+
+def test_stop_writes_every_queued_record_in_order():
+    stream = io.StringIO()
+    stream_handler = logging.StreamHandler(stream)
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    list_handler = ListHandler()
+    list_handler.setLevel(logging.WARNING)
+    pipeline = LogPipeline([stream_handler, list_handler], maxsize=1000, batch_size=7)
+    for i in range(100):
+        pipeline.enqueue(record(str(i), logging.WARNING if i % 10 == 0 else logging.INFO))
+    pipeline.start()
+    pipeline.stop()
+    assert stream.getvalue().splitlines() == [str(i) for i in range(100)]
+    assert list_handler.messages == [str(i) for i in range(0, 100, 10)]
+    assert pipeline.written == 100 and pipeline.stats()["queue_depth"] == 0
@@ -0,0 +1,35 @@
+import gzip
+import logging
+import os
+import re
+
+from src.core import log_rotation
+from src.core.log_rotation import RotatingLogHandler
+
+
+def make_record(message: str) -> logging.LogRecord:
+    return logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+
+
+def test_workers_share_rotation_and_segments_are_compressed(tmp_path, monkeypatch):
+    monkeypatch.setattr(log_rotation, "COMPRESS_GRACE", 0.0)
+    path = str(tmp_path / "app.log")
+    # Two handlers on one file stand in for two workers
+    first = RotatingLogHandler(path, max_bytes=100, backup_count=2)
+    second = RotatingLogHandler(path, max_bytes=100, backup_count=2)
+    for i in range(40):
+        (first if i % 2 else second).handle(make_record(f"record {i:02d} " + "x" * 10))
+    for handler in (first, second):
+        handler.compressor.stop(timeout=5)
+        handler.close()
+
+    segments = sorted(os.listdir(tmp_path))
+    gz_segments = [name for name in segments if name.endswith(".gz")]
+    assert gz_segments and len(gz_segments) <= 2
+    # Rotated segments never match Filebeat's `*.log` input or escape its exclude_files
+    assert all(re.search(r"\.gz$", name) for name in segments if name.startswith("app.log.") and name != "app.log.lock")
+    kept = "".join(gzip.open(tmp_path / name, "rt").read() for name in gz_segments)
+    kept += (tmp_path / "app.log").read_text()
+    # Nothing is lost or written twice between the newest retained segments and the live file
+    numbers = [int(n) for n in re.findall(r"record (\d+)", kept)]
+    assert numbers == sorted(numbers) and numbers[-1] == 39 and len(numbers) == len(set(numbers))
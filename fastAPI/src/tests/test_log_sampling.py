@@ -0,0 +1,38 @@
+from src.core.log_sampling import MIN_SAMPLE_FACTOR, LogSampler
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_longest_route_prefix_wins():
+    sampler = LogSampler(rate=0.5, routes={"/api/v1/health": 0.01, "/api/v1/health/live": 0.0})
+    assert sampler.rate_for("/api/v1/security/check") == 0.5
+    assert sampler.rate_for("/api/v1/health") == 0.01
+    assert sampler.rate_for("/api/v1/health/live") == 0.0
+
+
+def test_budget_lowers_and_restores_the_factor():
+    clock = FakeClock()
+    sampler = LogSampler(rate=1.0, budget=100, clock=clock)
+    for _ in range(1000):
+        sampler.record("request_completed", True)
+    clock.now = 1.0
+    sampler.record("request_completed", True)
+    assert abs(sampler.factor - 100 / 1001) < 1e-9
+    assert abs(sampler.rate_for("/") - sampler.factor) < 1e-9
+
+    clock.now = 2.0
+    sampler.record("request_completed", False)
+    assert sampler.factor == 1.0
+
+    sampler.configure(1.0, budget=1)
+    for _ in range(10_000):
+        sampler.record("request_completed", True)
+    clock.now = 3.0
+    sampler.record("request_completed", True)
+    assert sampler.factor == MIN_SAMPLE_FACTOR
@@ -0,0 +1,113 @@
+import asyncio
+
+import pytest
+
+from src.middleware import logging as logging_middleware
+from src.middleware.admission import AdmissionMiddleware
+from src.middleware.logging import LoggingMiddleware
+
+
+class RecordingLogger:
+    def __init__(self):
+        self.records = []
+
+    def info(self, record):
+        self.records.append(("info", record))
+
+    def warning(self, record):
+        self.records.append(("warning", record))
+
+    def error(self, record):
+        self.records.append(("error", record))
+
+
+@pytest.fixture
+def records(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    recorder = RecordingLogger()
+    monkeypatch.setattr(logging_middleware, "logger", recorder)
+    return recorder.records
+
+
+def scope(path: str = "/items", query: bytes = b"q=1") -> dict:
+    return {
+        "type": "http", "method": "POST", "path": path, "query_string": query,
+        "client": ("10.0.0.1", 5000),
+        "headers": [(b"user-agent", b"tests"), (b"content-length", b"2")],
+    }
+
+
+def run(app, scope: dict) -> list:
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b"{}", "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+
+    middleware = LoggingMiddleware(app)
+    middleware.sampler.configure(1.0)
+    asyncio.run(middleware(scope, receive, send))
+    return sent
+
+
+def test_status_and_response_size_are_logged_without_buffering(records):
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 201, "headers": []})
+        await send({"type": "http.response.body", "body": b"abc", "more_body": True})
+        await send({"type": "http.response.body", "body": b"de"})
+
+    sent = run(app, scope())
+    assert [message.get("body") for message in sent[1:]] == [b"abc", b"de"]
+    assert [record["type"] for _, record in records] == ["request_started", "request_completed"]
+    level, completed = records[1]
+    assert level == "info"
+    assert completed["status_code"] == 201
+    assert completed["response_size"] == 5
+    assert completed["query_params"] == {"q": "1"}
+    assert completed["user_agent"] == "tests" and completed["content_length"] == "2"
+    assert completed["client_host"] == "10.0.0.1"
+
+
+def test_exceptions_are_logged_and_reraised(records):
+    async def app(scope, receive, send):
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        run(app, scope())
+    level, failed = records[-1]
+    assert level == "error"
+    assert failed["type"] == "request_failed"
+    assert failed["error"] == "boom" and failed["error_type"] == "RuntimeError"
+
+
+def test_non_http_scopes_pass_through(records):
+    called = []
+
+    async def app(scope, receive, send):
+        called.append(scope["type"])
+
+    run(app, {"type": "lifespan"})
+    assert called == ["lifespan"] and records == []
+
+
+def test_requests_shed_by_admission_control_are_always_logged(records):
+    async def app(scope, receive, send):
+        raise AssertionError("a shed request reaches the endpoint")
+
+    admission = AdmissionMiddleware(app, routers={"/items": "items"})
+    admission.enabled = True
+    admission.controller.max_in_flight = 0
+    middleware = LoggingMiddleware(admission)
+    middleware.sampler.configure(0.0)
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(middleware(scope(), None, send))
+    assert sent[0]["status"] == 503
+    [(level, record)] = records
+    assert record["type"] == "request_completed" and record["status_code"] == 503
+    assert record["shed_reason"] == "no_slot"
@@ -0,0 +1,151 @@
+import json
+import os
+import socket
+import threading
+import time
+
+from src.core.logstash import LogstashShipper
+
+
+class FakeLogstash:
+    """Minimal json_lines TCP server collecting every received record."""
+
+    def __init__(self, port=0):
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.server.bind(("127.0.0.1", port))
+        self.server.listen()
+        self.port = self.server.getsockname()[1]
+        self.records = []
+        self._lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._read, args=(conn,), daemon=True).start()
+
+    def _read(self, conn):
+        buffer = b""
+        with conn:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    return
+                buffer += data
+                *lines, buffer = buffer.split(b"\n")
+                with self._lock:
+                    self.records.extend(json.loads(line) for line in lines)
+
+    def wait_for(self, count, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._lock:
+                if len(self.records) >= count:
+                    return True
+            time.sleep(0.01)
+        return False
+
+    def close(self):
+        self.server.close()
+
+
+def line(i):
+    return (json.dumps({"message": f"record {i}", "n": i}) + "\n").encode()
+
+
+def test_ships_batches_over_one_connection():
+    server = FakeLogstash()
+    shipper = LogstashShipper("127.0.0.1", server.port, batch_size=50, flush_interval=0.05)
+    shipper.start()
+    try:
+        for i in range(500):
+            assert shipper.submit(line(i))
+        assert server.wait_for(500)
+        assert [r["n"] for r in server.records] == list(range(500))
+        assert shipper.connects == 1
+    finally:
+        shipper.stop()
+        server.close()
+
+
+def test_spools_while_unreachable_and_replays_in_order(tmp_path):
+    probe = socket.socket()
+    probe.bind(("127.0.0.1", 0))
+    port = probe.getsockname()[1]
+    probe.close()
+
+    spool = tmp_path / "logstash.spool"
+    shipper = LogstashShipper(
+        "127.0.0.1", port, batch_size=10, flush_interval=0.05,
+        spool_path=str(spool), reconnect_max_delay=0.2,
+    )
+    shipper.start()
+    server = None
+    try:
+        for i in range(30):
+            shipper.submit(line(i))
+        deadline = time.monotonic() + 5
+        while shipper.spooled < 30 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert shipper.spooled == 30
+        assert spool.exists()
+
+        server = FakeLogstash(port)
+        for i in range(30, 40):
+            shipper.submit(line(i))
+        assert server.wait_for(40)
+        assert [r["n"] for r in server.records] == list(range(40))
+        assert not spool.exists()
+    finally:
+        shipper.stop()
+        if server is not None:
+            server.close()
+
+
+def test_drops_when_buffer_and_spool_are_full():
+    shipper = LogstashShipper("127.0.0.1", 9, buffer_size=5, spool_path=None)
+    accepted = [shipper.submit(line(i)) for i in range(8)]
+    assert accepted == [True] * 5 + [False] * 3
+    assert shipper.dropped == 3
+
+
+class WorkerShipper(LogstashShipper):
+    """Shipper standing in for a worker process with its own pid."""
+
+    def __init__(self, pid, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pid = pid
+
+    @property
+    def _replay_path(self):
+        return f"{self.spool_path}.{self.pid}.replay"
+
+
+def test_workers_sharing_a_spool_send_each_record_once(tmp_path):
+    spool = str(tmp_path / "logstash.spool")
+    server = FakeLogstash()
+    first, second = (WorkerShipper(pid, "127.0.0.1", server.port, spool_path=spool) for pid in (1, 2))
+    try:
+        first._spool([line(0), line(1)])
+        # The first worker takes the spool to replay it; records the second spools meanwhile are kept
+        assert first._claim_spool()
+        second._spool([line(2)])
+        # Left by a worker that exited mid-replay
+        with open(f"{spool}.999999999.replay", "wb") as orphan:
+            orphan.write(line(3))
+
+        first._ship([line(4)])
+        second._ship([line(5)])
+        second._ship([])
+        assert server.wait_for(6)
+        time.sleep(0.1)
+        assert sorted(r["n"] for r in server.records) == list(range(6))
+        assert sorted(os.listdir(tmp_path)) == ["logstash.spool.lock"]
+    finally:
+        first._disconnect()
+        second._disconnect()
+        server.close()
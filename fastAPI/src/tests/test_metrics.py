@@ -0,0 +1,77 @@
+import json
+import os
+
+from src.core.metrics import (
+    RETIRED_SNAPSHOT,
+    MetricsRegistry,
+    _process_token,
+    merge_snapshots,
+    merge_worker_snapshots,
+    render,
+)
+
+
+def worker_snapshot(requests: float, in_flight: float, latencies=()) -> dict:
+    registry = MetricsRegistry()
+    registry.counter("requests_total", "Requests.", ("route",)).inc(("/check",), requests)
+    registry.gauge("in_flight", "In flight.").set((), in_flight)
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for latency in latencies:
+        histogram.observe((), latency)
+    return registry.snapshot()
+
+
+def values(snapshot: dict, name: str) -> dict:
+    return {tuple(labels): value for labels, value in snapshot[name]["values"]}
+
+
+def test_merge_sums_counters_and_histograms_and_labels_live_gauges():
+    merged = merge_snapshots(
+        [(1, worker_snapshot(2, 5, [0.05])), (2, worker_snapshot(3, 7, [0.5, 5.0]))],
+        live_pids={2},
+    )
+    assert values(merged, "requests_total") == {("/check",): 5}
+    assert values(merged, "latency_seconds") == {(): [1, 1, 1, 5.55]}
+    assert merged["in_flight"]["labelnames"] == ["pid"]
+    assert values(merged, "in_flight") == {("2",): 7}
+
+
+def test_render_makes_buckets_cumulative_and_escapes_labels():
+    registry = MetricsRegistry()
+    registry.counter("errors_total", "Errors.", ("path",)).inc(('/a"b\\c',), 3)
+    histogram = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for latency in (0.05, 0.5, 5.0):
+        histogram.observe((), latency)
+    lines = render(registry.snapshot()).splitlines()
+    assert "# TYPE errors_total counter" in lines
+    assert 'errors_total{path="/a\\"b\\\\c"} 3' in lines
+    assert [line for line in lines if line.startswith("latency_seconds")] == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 2',
+        'latency_seconds_bucket{le="+Inf"} 3',
+        "latency_seconds_sum 5.55",
+        "latency_seconds_count 3",
+    ]
+
+
+def test_snapshots_of_exited_workers_are_folded_once(tmp_path):
+    directory = str(tmp_path)
+    parent = os.getppid()
+    with open(tmp_path / f"{parent}-{_process_token(parent)}.json", "w") as f:
+        json.dump(worker_snapshot(10, 1), f)
+    # An exited worker, and an earlier worker whose pid was reused by this one
+    with open(tmp_path / "999999999-1.json", "w") as f:
+        json.dump(worker_snapshot(100, 4), f)
+    with open(tmp_path / f"{os.getpid()}-1.json", "w") as f:
+        json.dump(worker_snapshot(1000, 4), f)
+
+    for _ in range(2):
+        merged = merge_worker_snapshots(directory, worker_snapshot(1, 2))
+        assert values(merged, "requests_total") == {("/check",): 1111}
+        assert values(merged, "in_flight") == {(str(os.getpid()),): 2, (str(parent),): 1}
+    assert sorted(os.listdir(directory)) == sorted([f"{parent}-{_process_token(parent)}.json", RETIRED_SNAPSHOT, "retired.lock"])
+
+    with open(tmp_path / "999999998-1.json", "w") as f:
+        json.dump(worker_snapshot(10000, 4), f)
+    merged = merge_worker_snapshots(directory, worker_snapshot(1, 2))
+    assert values(merged, "requests_total") == {("/check",): 11111}
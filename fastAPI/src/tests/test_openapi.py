@@ -0,0 +1,39 @@
+import json
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.core.openapi import encode_schema, install_cached_openapi
+
+
+def make_app(with_metrics: bool) -> FastAPI:
+    app = FastAPI(title="Service", version="1.0")
+
+    @app.get("/items")
+    async def items():
+        return []
+
+    if with_metrics:
+        @app.get("/metrics")
+        async def metrics():
+            return ""
+
+    return app
+
+
+def test_prebuilt_schema_is_served_only_for_the_same_routes(tmp_path):
+    path = tmp_path / "openapi.json"
+    built = make_app(with_metrics=True).openapi()
+    built["info"]["description"] = "prebuilt"
+    path.write_bytes(encode_schema(built))
+
+    same = make_app(with_metrics=True)
+    install_cached_openapi(same, str(path))
+    assert TestClient(same).get("/openapi.json").content == path.read_bytes()
+
+    # A build with metrics enabled does not describe an application without them
+    fewer = make_app(with_metrics=False)
+    install_cached_openapi(fewer, str(path))
+    schema = json.loads(TestClient(fewer).get("/openapi.json").content)
+    assert "prebuilt" not in json.dumps(schema)
+    assert set(schema["paths"]) == {"/items"}
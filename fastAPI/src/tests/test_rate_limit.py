@@ -0,0 +1,132 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException, Request
+
+from src.core import rate_limit
+from src.core.config import get_settings
+from src.core.keyring import ApiKey
+from src.core.rate_limit import (
+    MemoryBackend,
+    RateLimit,
+    RateLimiter,
+    SharedMemoryBackend,
+    sliding_window,
+    token_bucket,
+)
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_token_bucket_refills_at_the_limit_rate():
+    state = None
+    for _ in range(2):
+        decision, state = token_bucket(state, 0.0, 2, 60.0)
+        assert decision.allowed
+    decision, state = token_bucket(state, 0.0, 2, 60.0)
+    assert not decision.allowed and decision.retry_after == 30.0
+    decision, state = token_bucket(state, 30.0, 2, 60.0)
+    assert decision.allowed and decision.remaining == 0
+
+
+def test_sliding_window_weights_the_previous_window():
+    state = None
+    for _ in range(10):
+        decision, state = sliding_window(state, 30.0, 10, 60.0)
+        assert decision.allowed
+    decision, state = sliding_window(state, 30.0, 10, 60.0)
+    assert not decision.allowed and decision.retry_after > 0
+    # 15 s into the next window, 75% of the previous count still applies
+    allowed = 0
+    while True:
+        decision, state = sliding_window(state, 75.0, 10, 60.0)
+        if not decision.allowed:
+            break
+        allowed += 1
+    assert allowed == 2
+    assert 0 < decision.retry_after <= 60.0
+
+
+def test_unknown_algorithm_is_refused():
+    with pytest.raises(ValueError):
+        RateLimiter(MemoryBackend(), "leaky_bucket")
+
+
+def test_memory_backend_evicts_idle_keys():
+    backend = MemoryBackend(shards=1, idle_ttl=10.0, sweep_every=2)
+    backend.update("a", token_bucket, 0.0, 5, 60.0)
+    backend.update("b", token_bucket, 100.0, 5, 60.0)
+    assert len(backend) == 1 and backend.evicted == 1
+
+
+def test_shared_backend_is_shared_and_reuses_the_oldest_slot(tmp_path):
+    path = str(tmp_path / "ratelimit.bin")
+    first, second = SharedMemoryBackend(path, buckets=1), SharedMemoryBackend(path, buckets=1)
+    try:
+        assert first.update("a", token_bucket, 1.0, 1, 1000.0).allowed
+        # Another worker mapping the same file sees the spent token
+        assert not second.update("a", token_bucket, 1.5, 1, 1000.0).allowed
+        for now, key in enumerate("bcd", start=2):
+            second.update(key, token_bucket, float(now), 1, 1000.0)
+        # The bucket is full; "e" takes the slot of "a", the least recently seen
+        first.update("e", token_bucket, 5.0, 1, 1000.0)
+        assert first.update("a", token_bucket, 6.0, 1, 1000.0).allowed
+    finally:
+        first.close()
+        second.close()
+
+
+def test_unknown_keys_are_limited_by_client_address(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    limiter = RateLimiter(MemoryBackend(), clock=FakeClock())
+    monkeypatch.setattr(rate_limit, "get_rate_limiter", lambda: limiter)
+    dependency = RateLimit("security")
+    limit = get_settings().RATE_LIMIT_ROUTES.get("security", get_settings().RATE_LIMIT_PER_MINUTE)
+
+    def request(api_key: str, host: str = "10.0.0.9") -> Request:
+        return Request({
+            "type": "http", "method": "POST", "path": "/api/v1/security/check", "query_string": b"",
+            "headers": [(b"x-api-key", api_key.encode())], "client": (host, 40000),
+        })
+
+    # Rotating the presented key does not buy a fresh limit
+    for i in range(limit):
+        asyncio.run(dependency(request(f"guess-{i}")))
+    with pytest.raises(HTTPException) as limited:
+        asyncio.run(dependency(request("guess-again")))
+    assert limited.value.status_code == 429
+    assert "Retry-After" in limited.value.headers
+    # Other clients and valid keys have limits of their own
+    asyncio.run(dependency(request("guess", host="10.0.0.10")))
+    asyncio.run(dependency(request("test")))
+
+
+def test_keys_with_a_limit_of_their_own_do_not_share_the_label_bucket(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    limiter = RateLimiter(MemoryBackend(), clock=FakeClock())
+    monkeypatch.setattr(rate_limit, "get_rate_limiter", lambda: limiter)
+    keys = {"limited": ApiKey("fleet", rate_limit=2), "plain": ApiKey("fleet")}
+    monkeypatch.setattr(rate_limit, "authenticate_request", lambda request: keys[request.headers["X-API-Key"]])
+    dependency = RateLimit("security")
+
+    def request(api_key: str) -> Request:
+        return Request({
+            "type": "http", "method": "POST", "path": "/api/v1/security/check", "query_string": b"",
+            "headers": [(b"x-api-key", api_key.encode())], "client": ("10.0.0.9", 40000),
+        })
+
+    for _ in range(3):
+        asyncio.run(dependency(request("plain")))
+    # Requests under the label's other key do not count against this key's limit
+    for _ in range(2):
+        asyncio.run(dependency(request("limited")))
+    with pytest.raises(HTTPException):
+        asyncio.run(dependency(request("limited")))
+    # The other key of the label keeps the router limit
+    asyncio.run(dependency(request("plain")))
@@ -0,0 +1,80 @@
+import asyncio
+import json
+
+from src.schemas.security import SecurityCheckRequest
+from src.services.reputation import SNAPSHOT_VERSION, ReputationStore, client_identity, load_snapshots, save_snapshot
+from src.services.security import SecurityService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_counts_slide_out_of_the_window():
+    clock = FakeClock()
+    store = ReputationStore(window=60, clock=clock)
+    store.record("ip:1", True)
+    clock.now += 30
+    assert store.record("ip:1", False) == (2, 1)
+    clock.now += 35
+    assert store.lookup("ip:1") == (1, 0)
+    clock.now += 600
+    assert store.lookup("ip:1") == (0, 0)
+
+
+def test_memory_cap_evicts_least_recently_active():
+    store = ReputationStore(max_bytes=0)
+    store.max_bytes = store._entry_size("ip:1") * 2
+    store.record("ip:1", True)
+    store.record("ip:2", True)
+    store.record("ip:1", True)
+    store.record("ip:3", True)
+    assert store.lookup("ip:2") == (0, 0)
+    assert store.lookup("ip:1") == (2, 2)
+    assert store.size_bytes <= store.max_bytes
+
+
+def test_snapshot_restore_is_idempotent():
+    clock = FakeClock()
+    store = ReputationStore(clock=clock)
+    for _ in range(3):
+        store.record("key:a", True)
+    restored = ReputationStore(clock=clock)
+    for _ in range(2):
+        assert restored.restore(store.snapshot()) == 1
+    assert restored.lookup("key:a") == (3, 3)
+
+
+def test_repeat_offenders_are_escalated(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    service = SecurityService(reputation=ReputationStore(), reputation_threshold=2)
+    check_request = SecurityCheckRequest(
+        headers={"X-Forwarded-For": "10.0.0.1, 10.0.0.2"}, path="/", method="GET"
+    )
+    assert client_identity(check_request.headers, service.reputation.secret) == "ip:10.0.0.1"
+    levels = [asyncio.run(service.analyze_request(None, check_request))["threat_level"] for _ in range(3)]
+    assert levels == ["Medium", "Medium", "High"]
+
+
+def test_api_keys_are_stored_as_keyed_digests(tmp_path):
+    store = ReputationStore(secret=b"s" * 32)
+    identity = client_identity({"X-API-Key": "secret-key", "X-Real-IP": "10.0.0.1"}, store.secret)
+    assert identity.startswith("key:") and "secret-key" not in identity
+    assert identity == client_identity({"x-api-key": "secret-key"}, b"s" * 32)
+    assert identity != client_identity({"x-api-key": "secret-key"}, b"t" * 32)
+    store.record(identity, True)
+
+    path = str(tmp_path / "reputation")
+    save_snapshot(path, store.snapshot())
+    with open(tmp_path / "reputation.1", "w") as f:
+        json.dump({"version": SNAPSHOT_VERSION - 1, "bucket_width": 10.0, "entries": [["key:raw", 0, [0] * 12]]}, f)
+    assert "secret-key" not in "".join(p.read_text() for p in tmp_path.iterdir())
+    restored = ReputationStore(secret=store.secret)
+    assert load_snapshots(restored, path) == 1
+    assert restored.lookup(identity) == (1, 1)
+    # Snapshots of the version holding raw keys are deleted
+    assert not (tmp_path / "reputation.1").exists()
@@ -0,0 +1,58 @@
+import json
+
+import pytest
+
+from src.services.request_decoder import decode_check_request, decode_check_request_fast, decode_with_span
+from src.services.security import _encode_verdict_json, encode_verdict
+
+
+def test_body_size_is_raw_byte_size():
+    body = '{ "name": "café", "n": [1, 2,  3] }'
+    raw = ('{"method": "POST", "path": "/x", "headers": {}, "body": ' + body + '}').encode()
+    data, size = decode_check_request(raw, max_body_size=10)
+    assert data["body"] == {"name": "café", "n": [1, 2, 3]}
+    assert size == len(body.encode())
+
+
+def test_small_request_is_not_measured():
+    raw = json.dumps({"method": "GET", "path": "/", "headers": {}, "body": {"a": 1}}).encode()
+    data, size = decode_check_request(raw, max_body_size=len(raw))
+    assert data["body"] == {"a": 1}
+    assert size == len(raw)
+
+
+def test_missing_or_null_body_has_no_size():
+    raw = json.dumps({"method": "GET", "path": "/", "headers": {"x": "y" * 50}, "body": None}).encode()
+    assert decode_check_request(raw, max_body_size=10)[1] == 0
+
+
+@pytest.mark.parametrize("text", ['{"a": 1,}', '{"a" 1}', '{"a": 1} x', '{"a": }', '{1: 2}'])
+def test_invalid_json_is_rejected_like_json_loads(text):
+    with pytest.raises(json.JSONDecodeError):
+        json.loads(text)
+    with pytest.raises(json.JSONDecodeError):
+        decode_with_span(text, "a")
+
+
+@pytest.mark.parametrize("raw", [
+    b'{"method": "POST", "path": "/x", "headers": {}, "body": { "name": "caf\xc3\xa9", "n": [1,  2] } }\n',
+    b'{"body": {"a": "\\"}"}, "method": "GET", "path": "/", "headers": {"k": "v"}}',
+    b'{"method": "GET", "path": "/", "headers": {}, "body": null}',
+    b'{"method": "GET", "path": "/", "headers": {}, "body": {"a": 1}}',
+])
+def test_fast_decoder_matches_full_decoder(raw):
+    for max_body_size in (10, len(raw)):
+        assert decode_check_request_fast(raw, max_body_size) == decode_check_request(raw, max_body_size)
+
+
+@pytest.mark.parametrize("raw", [b'{"a": 1,}', b'[1]', b'{"a": NaN}', b'\xff'])
+def test_fast_decoder_defers_to_full_decoder(raw):
+    assert decode_check_request_fast(raw, 10) is None
+
+
+@pytest.mark.parametrize("result", [
+    {"is_threat": False, "threat_level": "Low", "details": {}, "recommendations": {}},
+    {"is_threat": True, "threat_level": "High", "details": {"p": "\u00e9\u2028\\\"\x7f\x00 \U0001f600"}, "recommendations": {}},
+])
+def test_verdict_encoding_matches_json_dumps(result):
+    assert encode_verdict(result) == _encode_verdict_json(result)
@@ -0,0 +1,70 @@
+import asyncio
+import json
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api.v1.security.router import _iter_ndjson_lines, router
+from src.core.config import get_settings
+from src.services.security import SecurityService, get_security_service
+
+BENIGN = {"headers": {}, "path": "/items/1", "method": "GET"}
+TRAVERSAL = {"headers": {}, "path": "/../etc/passwd", "method": "GET"}
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    app = FastAPI()
+    app.include_router(router)
+    service = SecurityService()
+    app.dependency_overrides[get_security_service] = lambda: service
+    with TestClient(app, headers={"X-API-Key": "test"}) as client:
+        yield client
+
+
+def test_batch_answers_in_order_with_per_item_errors(client):
+    response = client.post("/security/check/batch", json=[BENIGN, {"path": "/"}, TRAVERSAL])
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["index"] for item in results] == [0, 1, 2]
+    assert results[0]["result"]["is_threat"] is False and results[0]["error"] is None
+    assert results[1]["result"] is None and "headers" in results[1]["error"]
+    assert results[2]["result"]["is_threat"] is True
+
+
+def test_batch_is_capped_in_bytes_before_parsing(client):
+    oversized = b"[" + b" " * get_settings().MAX_CHECK_REQUEST_SIZE + b"]"
+    response = client.post("/security/check/batch", content=oversized, headers={"Content-Type": "application/json"})
+    assert response.status_code == 413
+    assert client.post("/security/check/batch", json={"items": []}).status_code == 422
+    assert client.post("/security/check/batch", content=b"[{", headers={"Content-Type": "application/json"}).status_code == 422
+
+
+def test_stream_answers_each_line(client):
+    lines = [json.dumps(BENIGN), "", "{not json", json.dumps({"path": "/"}), json.dumps(TRAVERSAL)]
+    response = client.post(
+        "/security/check/stream",
+        content="\n".join(lines).encode(),
+        headers={"Content-Type": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [item["index"] for item in results] == [0, 1, 2, 3]
+    assert results[0]["result"]["is_threat"] is False
+    assert results[1]["error"].startswith("Invalid JSON")
+    assert results[2]["result"] is None and results[2]["error"]
+    assert results[3]["result"]["is_threat"] is True
+
+
+def test_oversized_lines_are_reported_without_buffering():
+    class StreamingRequest:
+        async def stream(self):
+            for chunk in (b'{"a": 1}\n' + b"x" * 10, b"x" * 10, b'\n{"b": 2}'):
+                yield chunk
+
+    async def collect():
+        return [line async for line in _iter_ndjson_lines(StreamingRequest(), max_line_size=16)]
+
+    assert asyncio.run(collect()) == [b'{"a": 1}', None, b'{"b": 2}']
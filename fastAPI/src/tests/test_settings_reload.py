@@ -0,0 +1,62 @@
+import gc
+
+import pytest
+
+from src.core import config
+from src.core.config import ReloadListenerError, add_reload_listener, get_settings, reload_settings
+from src.core.reload import reload_and_log
+
+
+@pytest.fixture(autouse=True)
+def listeners(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    previous = get_settings()
+    registered = list(config._reload_listeners)
+    config._reload_listeners[:] = []
+    yield config._reload_listeners
+    config._reload_listeners[:] = registered
+    config._swap_settings(previous)
+
+
+def test_every_listener_runs_and_failures_are_raised_together(monkeypatch):
+    seen = []
+
+    def broken(settings):
+        raise OSError("keyring unreadable")
+
+    def also_broken(settings):
+        raise ValueError("bad rule pack")
+
+    def record(settings):
+        seen.append(settings)
+
+    add_reload_listener(broken)
+    add_reload_listener(record)
+    add_reload_listener(also_broken)
+    monkeypatch.setenv("MAX_BODY_SIZE", "5000")
+    with pytest.raises(ReloadListenerError) as failed:
+        reload_settings()
+    assert [e.__class__ for e in failed.value.errors] == [OSError, ValueError]
+    # The new snapshot is in place and later listeners saw it
+    assert get_settings().MAX_BODY_SIZE == 5000
+    assert seen == [get_settings()]
+    assert reload_and_log("test") is False
+    assert len(seen) == 2
+
+
+def test_listeners_of_collected_objects_are_dropped(listeners):
+    class Owner:
+        calls = 0
+
+        def apply_settings(self, settings):
+            Owner.calls += 1
+
+    owner = Owner()
+    add_reload_listener(owner.apply_settings)
+    reload_settings()
+    assert Owner.calls == 1
+    del owner
+    gc.collect()
+    reload_settings()
+    assert Owner.calls == 1
+    assert listeners == []
@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+
+# Import plus app creation budget for a fresh interpreter, in seconds
+STARTUP_BUDGET = float(os.environ.get("STARTUP_BUDGET_SECONDS", "1.5"))
+
+TIMER = (
+    "import time\n"
+    "start = time.perf_counter()\n"
+    "import src.main\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def test_startup_stays_within_budget_and_writes_nothing(tmp_path):
+    project_root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, EXPRESS_API_KEY="test", PYTHONPATH=project_root)
+    # Best of a few runs, so a busy machine does not fail the budget
+    elapsed = min(
+        float(subprocess.run(
+            [sys.executable, "-c", TIMER], cwd=tmp_path, env=env,
+            capture_output=True, text=True, check=True,
+        ).stdout.strip().splitlines()[-1])
+        for _ in range(3)
+    )
+    assert elapsed < STARTUP_BUDGET, f"startup took {elapsed:.2f}s, budget {STARTUP_BUDGET}s"
+    # The log directory and file are only created once the application starts
+    assert os.listdir(tmp_path) == []
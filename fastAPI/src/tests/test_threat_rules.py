@@ -0,0 +1,65 @@
+import asyncio
+
+from src.schemas.security import SecurityCheckRequest
+from src.services.security import SecurityService
+from src.services.threat_rules import PRESENT_MESSAGE, HeaderRule, ThreatPatternEngine
+from src.services.verdict_cache import VerdictCache
+
+
+def test_header_names_are_matched_case_insensitively():
+    engine = ThreatPatternEngine()
+    findings, score = engine.inspect_headers({"X-Forwarded-For": "1.2.3.4", "x-forwarded-for": "5.6.7.8", "Host": "a"})
+    assert findings == {"x-forwarded-for": PRESENT_MESSAGE}
+    assert score == 1
+    assert engine.threat_level(score) == "Medium"
+
+
+def test_value_length_and_count_rules():
+    engine = ThreatPatternEngine(
+        header_names=(),
+        header_rules=[
+            HeaderRule("User-Agent", pattern=r"(?i)sqlmap|nikto", score=3, message="Scanner"),
+            HeaderRule("x-forwarded-for", max_count=2),
+            HeaderRule("*", max_length=10),
+        ],
+    )
+    assert engine.inspect_headers({"user-agent": "Mozilla", "X-Forwarded-For": "a, b"}) == ({}, 0)
+
+    findings, score = engine.inspect_headers({"user-agent": "SQLMap/1.0", "X-Forwarded-For": "a, b, c"})
+    assert findings == {"user-agent": "Scanner", "x-forwarded-for": "Header repeated more than 2 times"}
+    assert engine.threat_level(score) == "High"
+
+    findings, score = engine.inspect_headers({"cookie": "x" * 11})
+    assert findings == {"cookie": "Header value longer than 10 characters"}
+    assert score == 1
+
+
+def test_rule_conditions_must_all_hold():
+    engine = ThreatPatternEngine(header_names=(), header_rules=[HeaderRule("referer", pattern="<", max_length=5)])
+    assert engine.inspect_headers({"referer": "<a>"}) == ({}, 0)
+    assert engine.inspect_headers({"referer": "<script>"})[1] == 1
+
+
+def test_cached_verdicts_follow_inspected_header_values(monkeypatch):
+    monkeypatch.setenv("EXPRESS_API_KEY", "test")
+    engine = ThreatPatternEngine(
+        header_names=(),
+        header_rules=[
+            HeaderRule("user-agent", pattern=r"(?i)sqlmap", score=3),
+            HeaderRule("*", max_length=100),
+        ],
+    )
+    service = SecurityService(engine=engine, cache=VerdictCache())
+
+    def level(headers):
+        check_request = SecurityCheckRequest(headers=headers, path="/", method="GET")
+        return asyncio.run(service.analyze_request(None, check_request))["threat_level"]
+
+    assert level({"User-Agent": "Mozilla", "Cookie": "a"}) == "Low"
+    assert level({"User-Agent": "sqlmap/1.7", "Cookie": "a"}) == "High"
+    assert level({"User-Agent": "Mozilla", "Cookie": "a" * 101}) == "Medium"
+    assert level({"User-Agent": "Mozilla", "Cookie": "a"}) == "Low"
+    assert service.cache.stats()["hits"] == 1
+    # A "*" value rule keys every value; presence rules only key names
+    assert engine.header_cache_key({"A": "1"}) != engine.header_cache_key({"A": "2"})
+    assert ThreatPatternEngine().header_cache_key({"A": "1"}) == ThreatPatternEngine().header_cache_key({"a": "2"})
@@ -0,0 +1,17 @@
+from src.core.timing import phase, server_timing, start_request_timing, stop_request_timing
+
+
+def test_phases_are_collected_only_while_timing():
+    with phase("auth"):
+        pass
+    phases, token = start_request_timing()
+    try:
+        for _ in range(3):
+            with phase("analyze"):
+                pass
+    finally:
+        stop_request_timing(token)
+    with phase("serialize"):
+        pass
+    assert list(phases) == ["analyze"]
+    assert server_timing({"auth": 0.0012}, 0.5) == "auth;dur=1.200, total;dur=500.000"
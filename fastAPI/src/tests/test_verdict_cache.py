@@ -0,0 +1,48 @@
+from src.services.verdict_cache import ENTRY_OVERHEAD, VerdictCache
+
+
+def put(cache: VerdictCache, key: str, body: bytes = b"{}") -> None:
+    cache.put(key, {"key": key}, body)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = VerdictCache(max_entries=2)
+    put(cache, "a")
+    put(cache, "b")
+    assert cache.get("a") == ({"key": "a"}, b"{}")
+    put(cache, "c")
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_expired_entries_are_misses():
+    cache = VerdictCache(ttl=-1.0)
+    put(cache, "a")
+    assert cache.get("a") is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1 and stats["entries"] == 0 and stats["size_bytes"] == 0
+
+
+def test_byte_cap_evicts_and_refuses_oversized_verdicts():
+    cache = VerdictCache(max_bytes=2 * (ENTRY_OVERHEAD + 100))
+    for key in "abc":
+        put(cache, key, b"x" * 100)
+    assert cache.get("a") is None
+    assert cache.size_bytes == 2 * (ENTRY_OVERHEAD + 100)
+    put(cache, "huge", b"x" * cache.max_bytes)
+    assert cache.get("huge") is None
+    # Replacing an entry does not count its old size twice
+    put(cache, "c", b"x" * 10)
+    assert cache.size_bytes == 2 * ENTRY_OVERHEAD + 110
+
+
+def test_generation_change_drops_every_entry():
+    cache = VerdictCache()
+    cache.ensure_generation("rules-1")
+    put(cache, "a")
+    cache.ensure_generation("rules-1")
+    assert cache.get("a") is not None
+    cache.ensure_generation("rules-2")
+    assert cache.get("a") is None
+    assert cache.stats()["invalidations"] == 1 and cache.size_bytes == 0